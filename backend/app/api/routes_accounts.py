@@ -1,30 +1,94 @@
-from decimal import Decimal
-from fastapi import APIRouter, Depends, HTTPException
+from datetime import date
+from fastapi import APIRouter, Depends, HTTPException, Query, Request, status
 from sqlalchemy.orm import Session
-from ..deps import get_session_db, require_session
-from ..db import models as orm
+from ..config import get_settings
+from ..db.routing import reads_pinned
+from ..deps import get_read_session_db, require_session
+from ..domain.models import AccountSummaryResponse, BalanceAsOfResponse
+from ..domain.session import SessionInfo
+from ..services import snapshots
 from ..services.account import AccountService
 
 router = APIRouter()
 
 @router.get("/account/balance")
 def get_balance(
-    current_session: orm.Session = Depends(require_session),
-    db: Session = Depends(get_session_db),
+    request: Request,
+    current_session: SessionInfo = Depends(require_session),
+    db: Session = Depends(get_read_session_db),
 ):
     """
     Get the authenticated user's account balance.
 
     Parameters:
-        current_session (orm.Session): Authenticated session (injected via require_session).
-        db (Session): Database session (injected via get_session_db).
+        request (Request): Incoming request; its read-your-writes cookie bypasses the balance cache.
+        current_session (SessionInfo): Authenticated session (injected via require_session).
+        db (Session): Replica or primary session (injected via get_read_session_db).
 
     Returns:
         dict: JSON object with formatted 'balance'.
     """
     service = AccountService()
     try:
-        result = service.get_balance(db, current_session)
+        result = service.get_balance(db, current_session, pinned=reads_pinned(request))
     except ValueError as exc:
         raise HTTPException(status_code=404 if "Account" in str(exc) else 401, detail=str(exc))
     return {"balance": f"{result.balance:.2f}"}
+
+
+@router.get("/account/balance/as-of", response_model=BalanceAsOfResponse)
+def get_balance_as_of(
+    day: date = Query(..., alias="date"),
+    current_session: SessionInfo = Depends(require_session),
+    db: Session = Depends(get_read_session_db),
+) -> BalanceAsOfResponse:
+    """
+    Get the authenticated user's balance at the end of a UTC day, from the daily snapshots.
+
+    Parameters:
+        day (date): Day to report, passed as ?date=YYYY-MM-DD.
+        current_session (SessionInfo): Authenticated session (injected via require_session).
+        db (Session): Replica or primary session (injected via get_read_session_db).
+
+    Returns:
+        BalanceAsOfResponse: The day and the balance it closed at.
+    """
+    try:
+        account_id = AccountService().resolve_account_id(current_session)
+        balance = snapshots.balance_as_of(db, account_id, day)
+    except ValueError as exc:
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail=str(exc))
+    return BalanceAsOfResponse(asOf=day, balance=balance)
+
+
+@router.get("/account/summary", response_model=AccountSummaryResponse)
+def get_summary(
+    start: date,
+    end: date,
+    current_session: SessionInfo = Depends(require_session),
+    db: Session = Depends(get_read_session_db),
+) -> AccountSummaryResponse:
+    """
+    Summarize the authenticated user's activity between two UTC days, inclusive.
+
+    Answered from one daily snapshot per active day, never from the
+    transaction rows.
+
+    Parameters:
+        start (date): First day, as YYYY-MM-DD.
+        end (date): Last day, as YYYY-MM-DD; at most SUMMARY_MAX_DAYS after start.
+        current_session (SessionInfo): Authenticated session (injected via require_session).
+        db (Session): Replica or primary session (injected via get_read_session_db).
+
+    Returns:
+        AccountSummaryResponse: Opening/closing balance, deposit and withdrawal totals, and the active days.
+    """
+    if end < start:
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="end is before start")
+    if (end - start).days + 1 > get_settings().summary_max_days:
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="Range too long")
+    try:
+        account_id = AccountService().resolve_account_id(current_session)
+        return snapshots.summarize(db, account_id, start, end)
+    except ValueError as exc:
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail=str(exc))
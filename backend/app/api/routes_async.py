@@ -0,0 +1,249 @@
+import math
+from datetime import datetime, timezone
+from typing import Optional
+from fastapi import APIRouter, Depends, HTTPException, Response, status, Request
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from ..config import get_settings
+from ..db.routing import reads_pinned
+from ..deps import (
+    get_async_read_session_db,
+    get_async_session_db,
+    pin_reads_to_primary,
+    require_session_async,
+)
+from ..domain.errors import IdempotencyConflictError, LoginRateLimitedError, PinHasherBusyError
+from ..domain.models import (
+    BatchMutationRequest,
+    BatchMutationResponse,
+    PinLoginRequest,
+    PinLoginResponse,
+    TransactionsResponse,
+    MoneyMutationRequest,
+    MoneyMutationResponse,
+)
+from ..domain.session import SessionInfo
+from ..services.account import AsyncAccountService
+from ..services.auth import AsyncAuthService
+from .routes_transactions import _recent_transactions
+
+
+router = APIRouter(tags=["async"])
+
+# Async handlers used when DB_ASYNC is enabled. They are registered ahead of the
+# sync routers so they shadow them; endpoints without an async variant fall
+# through to the sync implementation.
+
+
+@router.post("/auth/pin", response_model=PinLoginResponse)
+async def login_pin(
+    payload: PinLoginRequest,
+    response: Response,
+    request: Request,
+    db: AsyncSession = Depends(get_async_session_db),
+) -> PinLoginResponse:
+    """
+    Authenticate using a PIN and set an httponly session cookie.
+
+    Parameters:
+        payload (PinLoginRequest): Payload containing cardToken and pin.
+        response (Response): FastAPI response object used to set the session cookie.
+        request (Request): Incoming request.
+        db (AsyncSession): Async database session dependency.
+
+    Returns:
+        PinLoginResponse: Response model with customerName and cardNetwork.
+
+    Raises:
+        HTTPException: 401 Unauthorized when authentication fails.
+        HTTPException: 429 Too Many Requests when the card or client IP is rate limited.
+        HTTPException: 503 Service Unavailable when PIN verification is saturated.
+    """
+    service = AsyncAuthService()
+    try:
+        result, raw_token, session_obj = await service.login_pin(
+            db, payload, request.client.host if request.client else None
+        )
+    except LoginRateLimitedError as exc:
+        raise HTTPException(
+            status_code=status.HTTP_429_TOO_MANY_REQUESTS,
+            detail=str(exc),
+            headers={"Retry-After": str(math.ceil(exc.retry_after))},
+        )
+    except PinHasherBusyError as exc:
+        raise HTTPException(
+            status_code=status.HTTP_503_SERVICE_UNAVAILABLE, detail=str(exc), headers={"Retry-After": "1"}
+        )
+    except ValueError as exc:
+        raise HTTPException(status_code=status.HTTP_401_UNAUTHORIZED, detail=str(exc))
+    now = datetime.now(timezone.utc)
+    response.set_cookie(
+        key="atm_sess",
+        value=raw_token,
+        httponly=True,
+        secure=False,
+        samesite="lax",
+        max_age=int((session_obj.expires_at - now).total_seconds()),
+        path="/",
+    )
+    return result
+
+
+@router.post("/auth/logout")
+async def logout(
+    response: Response,
+    sess: SessionInfo = Depends(require_session_async),
+    db: AsyncSession = Depends(get_async_session_db),
+) -> dict[str, bool]:
+    """
+    Revoke the current session and remove the session cookie.
+
+    Parameters:
+        response (Response): FastAPI response object used to delete the session cookie.
+        sess (SessionInfo): Authenticated session injected via require_session_async.
+        db (AsyncSession): Async database session dependency.
+
+    Returns:
+        dict[str, bool]: Simple status object.
+    """
+    service = AsyncAuthService()
+    await service.logout(db, sess)
+    response.delete_cookie(key="atm_sess", path="/")
+    return {"ok": True}
+
+
+@router.get("/account/balance")
+async def get_balance(
+    request: Request,
+    current_session: SessionInfo = Depends(require_session_async),
+    db: AsyncSession = Depends(get_async_read_session_db),
+):
+    """
+    Get the authenticated user's account balance.
+
+    Parameters:
+        request (Request): Incoming request; its read-your-writes cookie bypasses the balance cache.
+        current_session (SessionInfo): Authenticated session (injected via require_session_async).
+        db (AsyncSession): Async replica or primary session (injected via get_async_read_session_db).
+
+    Returns:
+        dict: JSON object with formatted 'balance'.
+    """
+    service = AsyncAccountService()
+    try:
+        result = await service.get_balance(db, current_session, pinned=reads_pinned(request))
+    except ValueError as exc:
+        raise HTTPException(status_code=404 if "Account" in str(exc) else 401, detail=str(exc))
+    return {"balance": f"{result.balance:.2f}"}
+
+
+@router.get("/transactions", response_model=TransactionsResponse)
+async def list_transactions(
+    limit: int = 10,
+    cursor: Optional[str] = None,
+    sess: SessionInfo = Depends(require_session_async),
+    db: AsyncSession = Depends(get_async_read_session_db),
+) -> Response:
+    """
+    Return a page of the current user's transactions, newest first.
+
+    Parameters:
+        limit (int): Page size (default 10, capped at TRANSACTIONS_MAX_PAGE_SIZE).
+        cursor (Optional[str]): nextCursor from the previous page; omit for the first page.
+        sess (SessionInfo): Authenticated session injected via require_session_async.
+        db (AsyncSession): Async replica or primary session injected via get_async_read_session_db.
+
+    Returns:
+        Response: Pre-encoded TransactionsResponse JSON (items and the next cursor).
+    """
+    return await db.run_sync(_recent_transactions, sess, limit, cursor)
+
+
+@router.post(
+    "/account/deposit", response_model=MoneyMutationResponse, dependencies=[Depends(pin_reads_to_primary)]
+)
+async def deposit_route(
+    payload: MoneyMutationRequest,
+    sess: SessionInfo = Depends(require_session_async),
+    db: AsyncSession = Depends(get_async_session_db),
+) -> MoneyMutationResponse:
+    """
+    Deposit an amount into the authenticated user's account.
+
+    Parameters:
+        payload (MoneyMutationRequest): Amount and idempotency key for the deposit.
+        sess (SessionInfo): Authenticated session injected via require_session_async.
+        db (AsyncSession): Async database session injected via get_async_session_db.
+
+    Returns:
+        MoneyMutationResponse: DTO with the updated balance.
+    """
+    service = AsyncAccountService()
+    try:
+        result = await service.deposit(db, sess, payload)
+    except IdempotencyConflictError as exc:
+        raise HTTPException(status_code=status.HTTP_409_CONFLICT, detail=str(exc))
+    except ValueError as exc:
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail=str(exc))
+    return result
+
+
+@router.post(
+    "/account/withdraw", response_model=MoneyMutationResponse, dependencies=[Depends(pin_reads_to_primary)]
+)
+async def withdraw_route(
+    payload: MoneyMutationRequest,
+    sess: SessionInfo = Depends(require_session_async),
+    db: AsyncSession = Depends(get_async_session_db),
+) -> MoneyMutationResponse:
+    """
+    Withdraw an amount from the authenticated user's account.
+
+    Parameters:
+        payload (MoneyMutationRequest): Amount and idempotency key for the withdrawal.
+        sess (SessionInfo): Authenticated session injected via require_session_async.
+        db (AsyncSession): Async database session injected via get_async_session_db.
+
+    Returns:
+        MoneyMutationResponse: DTO with the updated balance.
+    """
+    service = AsyncAccountService()
+    try:
+        result = await service.withdraw(db, sess, payload)
+    except IdempotencyConflictError as exc:
+        raise HTTPException(status_code=status.HTTP_409_CONFLICT, detail=str(exc))
+    except ValueError as exc:
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail=str(exc))
+    return result
+
+
+@router.post(
+    "/account/batch", response_model=BatchMutationResponse, dependencies=[Depends(pin_reads_to_primary)]
+)
+async def batch_route(
+    payload: BatchMutationRequest,
+    sess: SessionInfo = Depends(require_session_async),
+    db: AsyncSession = Depends(get_async_session_db),
+) -> BatchMutationResponse:
+    """
+    Apply several deposits and withdrawals in order, in one transaction and under one account lock.
+
+    Parameters:
+        payload (BatchMutationRequest): Ordered operations, each with its own idempotency key, and the mode.
+        sess (SessionInfo): Authenticated session injected via require_session_async.
+        db (AsyncSession): Async database session injected via get_async_session_db.
+
+    Returns:
+        BatchMutationResponse: Per-operation results in request order and the final balance.
+        With mode all_or_nothing a failing operation fails the whole request (400, or 409 for a
+        key used by another account) and nothing is applied.
+    """
+    if len(payload.operations) > get_settings().batch_max_operations:
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="Too many operations")
+    service = AsyncAccountService()
+    try:
+        return await service.apply_batch(db, sess, payload)
+    except IdempotencyConflictError as exc:
+        raise HTTPException(status_code=status.HTTP_409_CONFLICT, detail=str(exc))
+    except ValueError as exc:
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail=str(exc))
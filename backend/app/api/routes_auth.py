@@ -1,9 +1,11 @@
+import math
 from datetime import datetime, timezone, timedelta
 from fastapi import APIRouter, Depends, HTTPException, Response, status, Request
 from sqlalchemy.orm import Session
 from ..deps import get_session_db, require_session
-from ..db import models as orm
+from ..domain.errors import LoginRateLimitedError, PinHasherBusyError
 from ..domain.models import PinLoginRequest, PinLoginResponse
+from ..domain.session import SessionInfo
 from ..services.auth import AuthService
 
 
@@ -32,10 +34,22 @@ def login_pin(
 
     Raises:
         HTTPException: 401 Unauthorized when authentication fails.
+        HTTPException: 429 Too Many Requests when the card or client IP is rate limited.
+        HTTPException: 503 Service Unavailable when PIN verification is saturated.
     """
     service = AuthService()
     try:
         result, raw_token, session_obj = service.login_pin(db, payload, request.client.host if request.client else None)
+    except LoginRateLimitedError as exc:
+        raise HTTPException(
+            status_code=status.HTTP_429_TOO_MANY_REQUESTS,
+            detail=str(exc),
+            headers={"Retry-After": str(math.ceil(exc.retry_after))},
+        )
+    except PinHasherBusyError as exc:
+        raise HTTPException(
+            status_code=status.HTTP_503_SERVICE_UNAVAILABLE, detail=str(exc), headers={"Retry-After": "1"}
+        )
     except ValueError as exc:
         raise HTTPException(status_code=status.HTTP_401_UNAUTHORIZED, detail=str(exc))
     now = datetime.now(timezone.utc)
@@ -54,7 +68,7 @@ def login_pin(
 @router.post("/logout")
 def logout(
     response: Response,
-    sess: orm.Session = Depends(require_session),
+    sess: SessionInfo = Depends(require_session),
     db: Session = Depends(get_session_db),
 ) -> dict[str, bool]:
     """
@@ -62,7 +76,7 @@ def logout(
 
     Parameters:
         response (Response): FastAPI response object used to delete the session cookie.
-        sess (orm.Session): Authenticated session injected via require_session.
+        sess (SessionInfo): Authenticated session injected via require_session.
         db (Session): Database session dependency.
 
     Returns:
@@ -0,0 +1,55 @@
+import hmac
+from typing import Optional
+
+from fastapi import APIRouter, Header, HTTPException, Query, status
+from fastapi.responses import PlainTextResponse
+
+from ..config import get_settings
+from ..metrics.profiler import get_profiler
+from ..metrics.registry import REGISTRY
+
+
+router = APIRouter(tags=["metrics"])
+
+# Prometheus scrape endpoint and the operator-only profiler switch.
+
+@router.get("/metrics", response_class=PlainTextResponse, include_in_schema=False)
+def metrics() -> PlainTextResponse:
+    """
+    Render all registered metrics in the Prometheus text exposition format.
+
+    Returns:
+        PlainTextResponse: Metrics text, version 0.0.4.
+    """
+    return PlainTextResponse(REGISTRY.render(), media_type="text/plain; version=0.0.4")
+
+
+@router.post("/debug/profile", include_in_schema=False)
+def start_profile(
+    seconds: float = Query(30.0, gt=0, le=600),
+    sample_rate: float = Query(1.0, gt=0, le=1),
+    x_profiler_token: Optional[str] = Header(default=None),
+) -> dict[str, str]:
+    """
+    Run the sampling profiler in this worker for a while and write collapsed stacks to PROFILE_DIR.
+
+    Parameters:
+        seconds (float): How long to sample (at most 600).
+        sample_rate (float): Fraction of requests to profile; 1.0 samples continuously.
+        x_profiler_token (Optional[str]): Must match PROFILER_TOKEN.
+
+    Returns:
+        dict[str, str]: Path of the profile that will be written when the run ends.
+
+    Raises:
+        HTTPException: 404 Not Found when PROFILER_TOKEN is unset or the token does not match.
+        HTTPException: 409 Conflict when a run is already in progress.
+    """
+    expected = get_settings().profiler_token
+    if not expected or not x_profiler_token or not hmac.compare_digest(expected, x_profiler_token):
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Not Found")
+    try:
+        path = get_profiler().start(seconds, sample_rate)
+    except RuntimeError as exc:
+        raise HTTPException(status_code=status.HTTP_409_CONFLICT, detail=str(exc))
+    return {"output": path}
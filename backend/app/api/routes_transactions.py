@@ -1,93 +1,163 @@
 
-from decimal import Decimal
-from fastapi import APIRouter, Depends, HTTPException, status
+import base64
+from datetime import datetime
+from typing import Literal, Optional, Tuple
+from fastapi import APIRouter, Depends, HTTPException, Request, Response, status
+from fastapi.responses import StreamingResponse
+from sqlalchemy import tuple_
 from sqlalchemy.orm import Session
 
-from ..deps import get_session_db, require_session
+from ..config import get_settings
+
+from ..db.routing import read_session_factory
+from ..deps import get_read_session_db, get_session_db, pin_reads_to_primary, require_session
 from ..db import models as orm
+from ..domain import encoders
+from ..domain.errors import IdempotencyConflictError
+from ..domain.session import SessionInfo
 from ..domain.models import (
+    BatchMutationRequest,
+    BatchMutationResponse,
     TransactionsResponse,
-    TransactionItem,
     MoneyMutationRequest,
     MoneyMutationResponse,
 )
 from ..services.account import AccountService
+from ..services.statements import MEDIA_TYPES, stream_statement
 
 
 router = APIRouter(prefix="", tags=["transactions"])
 
 
-def _get_account_for_session(db: Session, sess: orm.Session) -> orm.Account:
+@router.get("/transactions", response_model=TransactionsResponse)
+def list_transactions(
+    limit: int = 10,
+    cursor: Optional[str] = None,
+    sess: SessionInfo = Depends(require_session),
+    db: Session = Depends(get_read_session_db),
+) -> Response:
     """
-    Resolve the logged-in session to the user's Account.
+    Return a page of the current user's transactions, newest first.
 
     Parameters:
-        db (Session): Database session dependency.
-        sess (orm.Session): Authenticated session object.
+        limit (int): Page size (default 10, capped at TRANSACTIONS_MAX_PAGE_SIZE).
+        cursor (Optional[str]): nextCursor from the previous page; omit for the first page.
+        sess (SessionInfo): Authenticated session injected via require_session.
+        db (Session): Replica or primary session injected via get_read_session_db.
 
     Returns:
-        orm.Account: The account associated with the session's card.
+        Response: Pre-encoded TransactionsResponse JSON (items and the next cursor).
     """
-    card = db.get(orm.Card, sess.card_id)
-    if not card:
-        raise HTTPException(
-            status_code=status.HTTP_401_UNAUTHORIZED, detail="Invalid session"
-        )
+    return _recent_transactions(db, sess, limit, cursor)
 
-    account = (
-        db.query(orm.Account)
-        .filter(orm.Account.customer_id == card.customer_id)
-        .first()
-    )
-    if not account:
-        raise HTTPException(
-            status_code=status.HTTP_404_NOT_FOUND, detail="Account not found"
-        )
-    return account
 
+def _encode_cursor(created_at: datetime, tx_id: int) -> str:
+    # Opaque keyset cursor for the (created_at, id) position of the last row on a page.
+    raw = f"{created_at.isoformat()}|{tx_id}".encode()
+    return base64.urlsafe_b64encode(raw).decode().rstrip("=")
 
-@router.get("/transactions", response_model=TransactionsResponse)
-def list_transactions(
-    limit: int = 10,
-    sess: orm.Session = Depends(require_session),
-    db: Session = Depends(get_session_db),
-) -> TransactionsResponse:
+
+def _decode_cursor(cursor: str) -> Tuple[datetime, int]:
+    # Inverse of _encode_cursor; rejects anything it did not produce.
+    try:
+        raw = base64.urlsafe_b64decode(cursor + "=" * (-len(cursor) % 4)).decode()
+        created_at, tx_id = raw.split("|")
+        return datetime.fromisoformat(created_at), int(tx_id)
+    except (ValueError, UnicodeDecodeError):
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="Invalid cursor")
+
+
+def _recent_transactions(
+    db: Session, sess: SessionInfo, limit: int, cursor: Optional[str] = None
+) -> Response:
     """
-    Return a limited list of recent transactions for the current user.
+    Load one keyset page of transactions for the session's account.
+
+    Rows are ordered by (created_at, id) descending and the page starts strictly
+    after the cursor position, so the cost does not grow with how far back the
+    caller pages (served by ix_tbl_txn_account_created). Rows are fetched as
+    plain tuples, validated into the DTO once and serialized by
+    encoders.transactions_page; returning a Response means FastAPI does not
+    validate the body against response_model again, which is kept only for
+    the OpenAPI schema.
 
     Parameters:
-        limit (int): Maximum number of transactions to return (default 10).
-        sess (orm.Session): Authenticated session injected via require_session.
-        db (Session): Database session injected via get_session_db.
+        db (Session): Database session.
+        sess (SessionInfo): Authenticated session object.
+        limit (int): Requested page size.
+        cursor (Optional[str]): Position returned as nextCursor by the previous page.
 
     Returns:
-        TransactionsResponse: DTO containing a list of TransactionItem objects.
+        Response: JSON body shaped like TransactionsResponse.
     """
-    account = _get_account_for_session(db, sess)
-
-    transactions = (
-        db.query(orm.Transaction)
-        .filter(orm.Transaction.account_id == account.id)
-        .order_by(orm.Transaction.created_at.desc())
-        .limit(limit)
+    try:
+        account_id = AccountService().resolve_account_id(sess)
+    except ValueError as exc:
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail=str(exc))
+    page_size = max(1, min(limit, get_settings().transactions_max_page_size))
+
+    query = db.query(
+        orm.Transaction.id, orm.Transaction.type, orm.Transaction.amount, orm.Transaction.created_at
+    ).filter(orm.Transaction.account_id == account_id)
+    if cursor:
+        created_at, tx_id = _decode_cursor(cursor)
+        query = query.filter(
+            tuple_(orm.Transaction.created_at, orm.Transaction.id) < tuple_(created_at, tx_id)
+        )
+    rows = (
+        query.order_by(orm.Transaction.created_at.desc(), orm.Transaction.id.desc())
+        .limit(page_size + 1)
         .all()
     )
-    items = [
-        TransactionItem(
-            id=tx.id,
-            type=tx.type,
-            amount=Decimal(tx.amount),
-            createdAt=tx.created_at,
-        )
-        for tx in transactions
-    ]
-    return TransactionsResponse(items=items)
+    next_cursor = None
+    if len(rows) > page_size:
+        rows = rows[:page_size]
+        last = rows[-1]
+        next_cursor = _encode_cursor(last.created_at, last.id)
+    return Response(encoders.transactions_page(rows, next_cursor), media_type="application/json")
+
+
+@router.get("/transactions/export")
+def export_transactions(
+    request: Request,
+    format: Literal["ndjson", "csv"] = "ndjson",
+    sess: SessionInfo = Depends(require_session),
+) -> StreamingResponse:
+    """
+    Stream the current user's full transaction history, oldest first.
+
+    The body is produced row batch by row batch from a server-side cursor, so
+    the response size is not bounded by memory. The stream uses its own
+    database session, on the read replica unless the client has just written,
+    held only while the body is being sent.
 
+    Parameters:
+        request (Request): Incoming request, used for read routing.
+        format (str): "ndjson" (default) or "csv".
+        sess (SessionInfo): Authenticated session injected via require_session.
 
-@router.post("/account/deposit", response_model=MoneyMutationResponse)
+    Returns:
+        StreamingResponse: Statement body with a download filename.
+    """
+    try:
+        account_id = AccountService().resolve_account_id(sess)
+    except ValueError as exc:
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail=str(exc))
+    return StreamingResponse(
+        stream_statement(
+            account_id, format, get_settings().statement_export_batch_size, read_session_factory(request)
+        ),
+        media_type=MEDIA_TYPES[format],
+        headers={"Content-Disposition": f'attachment; filename="statement-{account_id}.{format}"'},
+    )
+
+
+@router.post(
+    "/account/deposit", response_model=MoneyMutationResponse, dependencies=[Depends(pin_reads_to_primary)]
+)
 def deposit_route(
     payload: MoneyMutationRequest,
-    sess: orm.Session = Depends(require_session),
+    sess: SessionInfo = Depends(require_session),
     db: Session = Depends(get_session_db),
 ) -> MoneyMutationResponse:
     """
@@ -95,7 +165,7 @@ def deposit_route(
 
     Parameters:
         payload (MoneyMutationRequest): Amount and idempotency key for the deposit.
-        sess (orm.Session): Authenticated session injected via require_session.
+        sess (SessionInfo): Authenticated session injected via require_session.
         db (Session): Database session injected via get_session_db.
 
     Returns:
@@ -105,15 +175,19 @@ def deposit_route(
     service = AccountService()
     try:
         result = service.deposit(db, sess, payload)
+    except IdempotencyConflictError as exc:
+        raise HTTPException(status_code=status.HTTP_409_CONFLICT, detail=str(exc))
     except ValueError as exc:
         raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail=str(exc))
     return result
 
 
-@router.post("/account/withdraw", response_model=MoneyMutationResponse)
+@router.post(
+    "/account/withdraw", response_model=MoneyMutationResponse, dependencies=[Depends(pin_reads_to_primary)]
+)
 def withdraw_route(
     payload: MoneyMutationRequest,
-    sess: orm.Session = Depends(require_session),
+    sess: SessionInfo = Depends(require_session),
     db: Session = Depends(get_session_db),
 ) -> MoneyMutationResponse:
     """
@@ -121,7 +195,7 @@ def withdraw_route(
 
     Parameters:
         payload (MoneyMutationRequest): Amount and idempotency key for the withdrawal.
-        sess (orm.Session): Authenticated session injected via require_session.
+        sess (SessionInfo): Authenticated session injected via require_session.
         db (Session): Database session injected via get_session_db.
 
     Returns:
@@ -130,6 +204,40 @@ def withdraw_route(
     service = AccountService()
     try:
         result = service.withdraw(db, sess, payload)
+    except IdempotencyConflictError as exc:
+        raise HTTPException(status_code=status.HTTP_409_CONFLICT, detail=str(exc))
     except ValueError as exc:
         raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail=str(exc))
     return result
+
+
+@router.post(
+    "/account/batch", response_model=BatchMutationResponse, dependencies=[Depends(pin_reads_to_primary)]
+)
+def batch_route(
+    payload: BatchMutationRequest,
+    sess: SessionInfo = Depends(require_session),
+    db: Session = Depends(get_session_db),
+) -> BatchMutationResponse:
+    """
+    Apply several deposits and withdrawals in order, in one transaction and under one account lock.
+
+    Parameters:
+        payload (BatchMutationRequest): Ordered operations, each with its own idempotency key, and the mode.
+        sess (SessionInfo): Authenticated session injected via require_session.
+        db (Session): Database session injected via get_session_db.
+
+    Returns:
+        BatchMutationResponse: Per-operation results in request order and the final balance.
+        With mode all_or_nothing a failing operation fails the whole request (400, or 409 for a
+        key used by another account) and nothing is applied.
+    """
+    if len(payload.operations) > get_settings().batch_max_operations:
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="Too many operations")
+    service = AccountService()
+    try:
+        return service.apply_batch(db, sess, payload)
+    except IdempotencyConflictError as exc:
+        raise HTTPException(status_code=status.HTTP_409_CONFLICT, detail=str(exc))
+    except ValueError as exc:
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail=str(exc))
@@ -0,0 +1 @@
+# In-process caches shared by request handlers.
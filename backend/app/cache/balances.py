@@ -0,0 +1,86 @@
+# Per-account balance cache for GET /account/balance, versioned by tbl_accounts.updated_at.
+
+import threading
+from dataclasses import dataclass
+from datetime import datetime
+from decimal import Decimal
+from functools import lru_cache
+from typing import Any, Dict, Optional
+
+from ..config import get_settings
+from .ttl import TTLCache
+
+
+@dataclass(frozen=True)
+class CachedBalance:
+    balance: Decimal
+    version: datetime
+
+
+class BalanceCache:
+    """Account balances kept in memory for at most max_staleness_sec.
+
+    Every entry carries the account's updated_at, and a write never replaces
+    an entry with an older version, so a slow reader or a late commit callback
+    cannot roll a balance back. Committed deposits and withdrawals in this
+    worker write through; the invalidation bus evicts accounts changed by
+    other processes. A value read from the database is only stored if nothing
+    was evicted while it was being read, since the eviction may be for a
+    change the read did not see. The TTL bounds staleness when notifications
+    are late, lost or turned off.
+    """
+
+    def __init__(self, max_size: int, max_staleness_sec: float) -> None:
+        self._cache: TTLCache[CachedBalance] = TTLCache(max_size=max_size, ttl_sec=max_staleness_sec)
+        self._lock = threading.Lock()
+        self._evictions = 0
+
+    @property
+    def enabled(self) -> bool:
+        return self._cache.ttl_sec > 0 and self._cache.max_size > 0
+
+    def get(self, account_id: int) -> Optional[Decimal]:
+        # The cached balance, or None when missing or older than the staleness bound.
+        cached = self._cache.get(account_id)
+        return None if cached is None else cached.balance
+
+    def ticket(self) -> int:
+        # Taken before reading a balance from the database; pass it to fill.
+        return self._evictions
+
+    def fill(self, account_id: int, balance: Decimal, version: datetime, ticket: int) -> None:
+        # Store a balance read from the database unless an eviction happened since ticket.
+        with self._lock:
+            if self._evictions == ticket:
+                self._put(account_id, CachedBalance(balance, version))
+
+    def write(self, account_id: int, balance: Decimal, version: datetime) -> None:
+        # Store a balance this worker just committed.
+        with self._lock:
+            self._put(account_id, CachedBalance(balance, version))
+
+    def _put(self, account_id: int, entry: CachedBalance) -> None:
+        current = self._cache.peek(account_id)
+        if current is None or entry.version >= current.version:
+            self._cache.set(account_id, entry)
+
+    def evict(self, key: str) -> None:
+        # Invalidation bus handler: another process changed this account.
+        with self._lock:
+            self._evictions += 1
+            self._cache.invalidate(int(key))
+
+    def clear(self) -> None:
+        with self._lock:
+            self._evictions += 1
+            self._cache.clear()
+
+    def stats(self) -> Dict[str, Any]:
+        return self._cache.stats()
+
+
+@lru_cache
+def get_balance_cache() -> BalanceCache:
+    # Process-wide balance cache sized from settings.
+    settings = get_settings()
+    return BalanceCache(settings.balance_cache_size, settings.balance_cache_max_staleness_sec)
@@ -0,0 +1,62 @@
+# Rotating Bloom filter used as a negative filter in front of DB probes.
+
+import hashlib
+import threading
+import time
+from typing import Callable
+
+
+class RotatingBloomFilter:
+    """Two-generation Bloom filter: answers "definitely not seen" or "maybe seen".
+
+    Keys are added to the current generation and looked up in both. Every
+    rotate_sec the older generation is dropped, so keys older than two
+    rotations are forgotten and the false-positive rate stays bounded.
+    """
+
+    def __init__(
+        self,
+        bits: int,
+        hashes: int,
+        rotate_sec: float,
+        clock: Callable[[], float] = time.monotonic,
+    ) -> None:
+        self.bits = bits
+        self.hashes = hashes
+        self.rotate_sec = rotate_sec
+        self._clock = clock
+        self._current = bytearray((bits + 7) // 8)
+        self._previous = bytearray((bits + 7) // 8)
+        self._rotated_at = clock()
+        self._lock = threading.Lock()
+
+    def _positions(self, key: str) -> list[int]:
+        digest = hashlib.blake2b(key.encode(), digest_size=8 * self.hashes).digest()
+        return [
+            int.from_bytes(digest[i * 8:(i + 1) * 8], "little") % self.bits
+            for i in range(self.hashes)
+        ]
+
+    def _maybe_rotate(self) -> None:
+        if self._clock() - self._rotated_at >= self.rotate_sec:
+            self._previous = self._current
+            self._current = bytearray(len(self._previous))
+            self._rotated_at = self._clock()
+
+    def add(self, key: str) -> None:
+        # Mark a key as seen.
+        positions = self._positions(key)
+        with self._lock:
+            self._maybe_rotate()
+            for pos in positions:
+                self._current[pos >> 3] |= 1 << (pos & 7)
+
+    def might_contain(self, key: str) -> bool:
+        # False means the key was definitely not added within the last two rotations.
+        positions = self._positions(key)
+        with self._lock:
+            self._maybe_rotate()
+            for generation in (self._current, self._previous):
+                if all(generation[pos >> 3] & (1 << (pos & 7)) for pos in positions):
+                    return True
+            return False
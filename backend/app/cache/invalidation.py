@@ -0,0 +1,247 @@
+# Cross-worker cache invalidation over Postgres LISTEN/NOTIFY.
+
+import logging
+import select
+import socket
+import threading
+import time
+import uuid
+from functools import lru_cache
+from typing import Any, Callable, Dict, Iterable, Optional, Tuple
+
+from sqlalchemy import func, text
+from sqlalchemy.orm import Session
+
+from ..config import get_settings
+from ..metrics.registry import REGISTRY, Counter, Histogram
+
+logger = logging.getLogger(__name__)
+
+CHANNEL = "atm_invalidate"
+# Topics: a session cache entry keyed by token hash, and per-account entries keyed by account id.
+SESSION = "s"
+ACCOUNT = "a"
+# Key that drops every entry of a topic.
+FLUSH = "*"
+# Random per-process id; a worker skips its own notifications, it already updated its caches.
+ORIGIN = uuid.uuid4().hex[:8]
+# Above this many keys one flush notification is sent instead of one per key.
+MAX_KEYS = 1000
+
+LAG = REGISTRY.register(
+    Histogram(
+        "atm_invalidation_lag_seconds",
+        "Time from publishing an invalidation to another worker applying it.",
+        buckets=(0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 5.0, 30.0),
+    )
+)
+EVENTS = REGISTRY.register(
+    Counter(
+        "atm_invalidation_events_total",
+        "Invalidation listener events: received, own, malformed, flushes, reconnects, connect_errors.",
+        ["event"],
+    )
+)
+
+Evict = Callable[[str], None]
+Flush = Callable[[], None]
+
+
+def enabled() -> bool:
+    # Publishing is skipped entirely when CACHE_INVALIDATION is off.
+    return get_settings().cache_invalidation
+
+
+def _payload(topic: str, key: str) -> str:
+    # origin|published at (epoch ms)|topic|key; well under the 8000-byte NOTIFY limit.
+    return f"{ORIGIN}|{int(time.time() * 1000)}|{topic}|{key}"
+
+
+def notify_clause(topic: str, key: Any):
+    """
+    SQL expression that sends one invalidation, for the RETURNING list of the statement making the change.
+
+    Postgres delivers notifications only when the transaction commits and
+    drops repeats of the same payload within it, so a statement returning
+    several rows still sends one message, and a rolled-back change sends none.
+
+    Args:
+        topic (str): SESSION or ACCOUNT.
+        key (Any): Cache key to evict, or FLUSH.
+
+    Returns:
+        ColumnElement: pg_notify(...) call.
+    """
+    return func.pg_notify(CHANNEL, _payload(topic, str(key)))
+
+
+def publish(db: Session, topic: str, keys: Iterable[Any]) -> None:
+    """
+    Queue invalidations for keys in the caller's transaction, in one statement.
+
+    Args:
+        db (Session): Session whose commit releases the notifications.
+        topic (str): SESSION or ACCOUNT.
+        keys (Iterable[Any]): Cache keys to evict; past MAX_KEYS the whole topic is flushed.
+    """
+    if not enabled():
+        return
+    keys = [str(key) for key in keys]
+    if not keys:
+        return
+    if len(keys) > MAX_KEYS:
+        keys = [FLUSH]
+    db.execute(
+        text("SELECT pg_notify(:channel, :prefix || k) FROM unnest(CAST(:keys AS text[])) AS k"),
+        {"channel": CHANNEL, "prefix": _payload(topic, ""), "keys": keys},
+    )
+
+
+def _connect():
+    # A dedicated connection taken out of the engine's pool for good.
+    from ..db.base import engine
+
+    fairy = engine.raw_connection()
+    fairy.detach()
+    return fairy.dbapi_connection
+
+
+class InvalidationBus:
+    """Apply other workers' invalidations to this worker's caches.
+
+    A background thread holds one connection outside the pool, LISTENs on
+    CHANNEL and hands each notification to the handlers subscribed for its
+    topic. The connection is pinged every keepalive_sec so a dead peer is
+    noticed even when nothing is published. When it drops, the thread
+    reconnects with exponential backoff up to reconnect_max_sec. Whatever
+    was published while no LISTEN was active is lost, so every subscribed
+    cache is flushed right after each LISTEN, the first one included;
+    connected is set only after that flush.
+    """
+
+    def __init__(
+        self,
+        connect: Callable[[], Any],
+        keepalive_sec: float,
+        reconnect_max_sec: float,
+    ) -> None:
+        self._connect = connect
+        self.keepalive_sec = keepalive_sec
+        self.reconnect_max_sec = reconnect_max_sec
+        self._handlers: Dict[str, Tuple[Evict, Flush]] = {}
+        self._stopping = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+        self._wake: Optional[Tuple[socket.socket, socket.socket]] = None
+        self.connected = threading.Event()
+        self.received = 0
+
+    def subscribe(self, topic: str, evict: Evict, flush: Flush) -> None:
+        # Route a topic to a cache; subscribing again replaces the previous handlers.
+        self._handlers[topic] = (evict, flush)
+
+    def handle(self, payload: str, now: Optional[float] = None) -> None:
+        # Apply one notification payload.
+        try:
+            origin, published_ms, topic, key = payload.split("|", 3)
+            published = int(published_ms) / 1000
+        except ValueError:
+            EVENTS.inc("malformed")
+            logger.warning("Ignoring malformed invalidation %r", payload)
+            return
+        if origin == ORIGIN:
+            EVENTS.inc("own")
+            return
+        EVENTS.inc("received")
+        self.received += 1
+        LAG.observe(max(0.0, (now or time.time()) - published))
+        handlers = self._handlers.get(topic)
+        if handlers is None:
+            return
+        evict, flush = handlers
+        if key == FLUSH:
+            flush()
+        else:
+            evict(key)
+
+    def flush_all(self) -> None:
+        # Drop every subscribed cache; used when notifications may have been missed.
+        EVENTS.inc("flushes")
+        for _, flush in self._handlers.values():
+            flush()
+
+    def _listen(self, conn, cursor) -> None:
+        # Deliver notifications until the connection fails or stop() is called.
+        wake = self._wake[0]
+        last_ping = time.monotonic()
+        while not self._stopping.is_set():
+            ready, _, _ = select.select([conn, wake], [], [], self.keepalive_sec)
+            if conn in ready:
+                conn.poll()
+                while conn.notifies:
+                    self.handle(conn.notifies.pop(0).payload)
+            if time.monotonic() - last_ping >= self.keepalive_sec:
+                cursor.execute("SELECT 1")
+                last_ping = time.monotonic()
+
+    def _run(self) -> None:
+        delay, listened = 0.5, False
+        while not self._stopping.is_set():
+            try:
+                conn = self._connect()
+            except Exception:
+                EVENTS.inc("connect_errors")
+                logger.warning("Invalidation listener cannot connect; retrying in %.1fs", delay, exc_info=True)
+                self._stopping.wait(delay)
+                delay = min(delay * 2, self.reconnect_max_sec)
+                continue
+            try:
+                conn.autocommit = True
+                cursor = conn.cursor()
+                cursor.execute(f"LISTEN {CHANNEL}")
+                # Notifications are queued for us only from here on. Anything published before
+                # (while disconnected, or before this worker first listened) is unknown, so the
+                # caches start empty; flushing after LISTEN leaves no gap for a missed one.
+                if listened:
+                    EVENTS.inc("reconnects")
+                self.flush_all()
+                listened, delay = True, 0.5
+                self.connected.set()
+                self._listen(conn, cursor)
+            except Exception:
+                logger.warning("Invalidation listener lost its connection", exc_info=True)
+            finally:
+                self.connected.clear()
+                try:
+                    conn.close()
+                except Exception:
+                    pass
+
+    def start(self) -> None:
+        # Start the listener thread.
+        if self._thread is None:
+            self._stopping.clear()
+            self._wake = socket.socketpair()
+            self._thread = threading.Thread(target=self._run, name="cache-invalidation", daemon=True)
+            self._thread.start()
+
+    def stop(self) -> None:
+        # Stop listening and close the connection.
+        if self._thread is not None:
+            self._stopping.set()
+            self._wake[1].send(b"x")
+            self._thread.join()
+            self._thread = None
+            for sock in self._wake:
+                sock.close()
+            self._wake = None
+
+
+@lru_cache
+def get_invalidation_bus() -> InvalidationBus:
+    # Process-wide listener configured from settings.
+    settings = get_settings()
+    return InvalidationBus(
+        _connect,
+        keepalive_sec=settings.invalidation_keepalive_sec,
+        reconnect_max_sec=settings.invalidation_reconnect_max_sec,
+    )
@@ -0,0 +1,77 @@
+# Cache of session lookups keyed by token hash, used by require_session.
+
+import threading
+from dataclasses import replace
+from datetime import datetime
+from functools import lru_cache
+from typing import Any, Dict, Optional
+
+from ..config import get_settings
+from ..domain.session import SessionInfo
+from .ttl import TTLCache
+
+
+class SessionCache:
+    """Sessions kept in memory for at most ttl_sec, never past their own expiry.
+
+    A cached revocation is never replaced by a live entry. Like BalanceCache,
+    a session read from the database is only stored if nothing was evicted
+    while it was being read: the eviction may be a logout the read did not
+    see, and caching the older row would let the token in until the TTL.
+    """
+
+    def __init__(self, max_size: int, ttl_sec: float) -> None:
+        self._cache: TTLCache[SessionInfo] = TTLCache(max_size=max_size, ttl_sec=ttl_sec)
+        self._lock = threading.Lock()
+        self._evictions = 0
+
+    def get(self, token_hash: str) -> Optional[SessionInfo]:
+        return self._cache.get(token_hash)
+
+    def ticket(self) -> int:
+        # Taken before reading a session from the database; pass it to fill.
+        return self._evictions
+
+    def fill(self, info: SessionInfo, now: datetime, ticket: int) -> None:
+        # Store a session read from the database unless an eviction happened since ticket.
+        with self._lock:
+            if self._evictions == ticket:
+                self._put(info, now)
+
+    def write(self, info: SessionInfo, now: datetime) -> None:
+        # Store a session this worker just created.
+        with self._lock:
+            self._put(info, now)
+
+    def _put(self, info: SessionInfo, now: datetime) -> None:
+        current = self._cache.peek(info.token_hash)
+        if current is not None and current.revoked_at is not None:
+            return
+        remaining = (info.expires_at - now).total_seconds()
+        self._cache.set(info.token_hash, info, ttl_sec=remaining)
+
+    def revoke(self, info: SessionInfo, revoked_at: datetime) -> None:
+        # Replace a session's entry with its revoked state so this worker rejects it immediately.
+        with self._lock:
+            self._cache.set(info.token_hash, replace(info, revoked_at=revoked_at))
+
+    def invalidate(self, token_hash: str) -> None:
+        # Invalidation bus handler: another worker revoked this session.
+        with self._lock:
+            self._evictions += 1
+            self._cache.invalidate(token_hash)
+
+    def clear(self) -> None:
+        with self._lock:
+            self._evictions += 1
+            self._cache.clear()
+
+    def stats(self) -> Dict[str, Any]:
+        return self._cache.stats()
+
+
+@lru_cache
+def get_session_cache() -> SessionCache:
+    # Process-wide session cache sized from settings.
+    settings = get_settings()
+    return SessionCache(settings.session_cache_size, settings.session_cache_ttl_sec)
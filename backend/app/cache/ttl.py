@@ -0,0 +1,93 @@
+# Bounded LRU cache with per-entry expiry and hit/miss/eviction counters.
+
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Callable, Generic, Hashable, Optional, TypeVar
+
+V = TypeVar("V")
+
+
+class TTLCache(Generic[V]):
+    """Thread-safe LRU cache whose entries also expire after a time-to-live.
+
+    Reads refresh recency; inserting past max_size evicts the least recently
+    used entry. Expired entries are dropped lazily when they are read.
+    """
+
+    def __init__(
+        self,
+        max_size: int,
+        ttl_sec: float,
+        clock: Callable[[], float] = time.monotonic,
+    ) -> None:
+        self.max_size = max_size
+        self.ttl_sec = ttl_sec
+        self._clock = clock
+        self._data: "OrderedDict[Hashable, tuple[float, V]]" = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.expirations = 0
+
+    def get(self, key: Hashable) -> Optional[V]:
+        # Return a live entry and mark it recently used, or None.
+        with self._lock:
+            item = self._data.get(key)
+            if item is None:
+                self.misses += 1
+                return None
+            expires_at, value = item
+            if expires_at <= self._clock():
+                del self._data[key]
+                self.expirations += 1
+                self.misses += 1
+                return None
+            self._data.move_to_end(key)
+            self.hits += 1
+            return value
+
+    def peek(self, key: Hashable) -> Optional[V]:
+        # Return a live entry without touching recency or counters.
+        with self._lock:
+            item = self._data.get(key)
+            if item is None or item[0] <= self._clock():
+                return None
+            return item[1]
+
+    def set(self, key: Hashable, value: V, ttl_sec: Optional[float] = None) -> None:
+        # Store an entry; ttl_sec may shorten (never extend) the default TTL.
+        ttl = self.ttl_sec if ttl_sec is None else min(ttl_sec, self.ttl_sec)
+        if ttl <= 0 or self.max_size <= 0:
+            return
+        with self._lock:
+            self._data[key] = (self._clock() + ttl, value)
+            self._data.move_to_end(key)
+            while len(self._data) > self.max_size:
+                self._data.popitem(last=False)
+                self.evictions += 1
+
+    def invalidate(self, key: Hashable) -> None:
+        # Drop an entry if present.
+        with self._lock:
+            self._data.pop(key, None)
+
+    def clear(self) -> None:
+        # Drop every entry.
+        with self._lock:
+            self._data.clear()
+
+    def __len__(self) -> int:
+        return len(self._data)
+
+    def stats(self) -> dict[str, Any]:
+        # Snapshot of the counters for metrics and debugging.
+        with self._lock:
+            return {
+                "size": len(self._data),
+                "hits": self.hits,
+                "misses": self.misses,
+                "evictions": self.evictions,
+                "expirations": self.expirations,
+            }
@@ -12,6 +12,64 @@ class Settings(BaseSettings):
     session_ttl_min: int = Field(default=15, alias="SESSION_TTL_MIN")
     rate_limit_window_sec: int = Field(default=900, alias="RATE_LIMIT_WINDOW_SEC")
     rate_limit_max_attempts: int = Field(default=5, alias="RATE_LIMIT_MAX_ATTEMPTS")
+    rate_limit_max_keys: int = Field(default=100_000, alias="RATE_LIMIT_MAX_KEYS")
+    db_pool_size: int = Field(default=5, alias="DB_POOL_SIZE")
+    db_max_overflow: int = Field(default=10, alias="DB_MAX_OVERFLOW")
+    # Statements slower than this are logged with normalized SQL; /metrics can be turned off.
+    db_slow_statement_ms: float = Field(default=200.0, alias="DB_SLOW_STATEMENT_MS")
+    metrics_enabled: bool = Field(default=True, alias="METRICS_ENABLED")
+    # POST /debug/profile is only served when PROFILER_TOKEN is set.
+    profiler_token: str | None = Field(default=None, alias="PROFILER_TOKEN")
+    profile_dir: str = Field(default="profiles", alias="PROFILE_DIR")
+    profile_interval_ms: float = Field(default=5.0, alias="PROFILE_INTERVAL_MS")
+    # Serve the API from async handlers on an AsyncSession instead of the threadpool.
+    db_async: bool = Field(default=False, alias="DB_ASYNC")
+    async_database_url: str | None = Field(default=None, alias="ASYNC_DATABASE_URL")
+    # Read-only routes use REPLICA_DATABASE_URL when it is set; after its own deposit or withdrawal a
+    # client's reads stay on the primary for READ_YOUR_WRITES_SEC, longer than the expected replica lag.
+    replica_database_url: str | None = Field(default=None, alias="REPLICA_DATABASE_URL")
+    async_replica_database_url: str | None = Field(default=None, alias="ASYNC_REPLICA_DATABASE_URL")
+    read_your_writes_sec: float = Field(default=5.0, alias="READ_YOUR_WRITES_SEC")
+    # bcrypt runs on a dedicated process pool; PIN_POOL_WORKERS defaults to the CPU count.
+    pin_pool_workers: int | None = Field(default=None, alias="PIN_POOL_WORKERS")
+    pin_pool_max_pending: int = Field(default=64, alias="PIN_POOL_MAX_PENDING")
+    # Session lookups are cached per worker; a logout in another worker is seen after at most the TTL.
+    session_cache_size: int = Field(default=10_000, alias="SESSION_CACHE_SIZE")
+    session_cache_ttl_sec: float = Field(default=30.0, alias="SESSION_CACHE_TTL_SEC")
+    # last_activity_at is written behind in batches instead of on every request.
+    activity_flush_interval_sec: float = Field(default=5.0, alias="ACTIVITY_FLUSH_INTERVAL_SEC")
+    activity_flush_max_sessions: int = Field(default=500, alias="ACTIVITY_FLUSH_MAX_SESSIONS")
+    # Original mutation responses are kept for replay for this long.
+    idempotency_retention_hours: float = Field(default=24.0, alias="IDEMPOTENCY_RETENTION_HOURS")
+    idempotency_cache_size: int = Field(default=50_000, alias="IDEMPOTENCY_CACHE_SIZE")
+    idempotency_filter_bits: int = Field(default=1 << 22, alias="IDEMPOTENCY_FILTER_BITS")
+    idempotency_filter_hashes: int = Field(default=4, alias="IDEMPOTENCY_FILTER_HASHES")
+    transactions_max_page_size: int = Field(default=100, alias="TRANSACTIONS_MAX_PAGE_SIZE")
+    statement_export_batch_size: int = Field(default=1000, alias="STATEMENT_EXPORT_BATCH_SIZE")
+    batch_max_operations: int = Field(default=20, alias="BATCH_MAX_OPERATIONS")
+    # Concurrent deposits and withdrawals on one account in a worker are applied as one locked batch.
+    mutation_coalescing: bool = Field(default=False, alias="MUTATION_COALESCING")
+    coalesce_max_batch: int = Field(default=50, alias="COALESCE_MAX_BATCH")
+    # Workers LISTEN for each other's cache invalidations; mutations and logouts NOTIFY on commit.
+    cache_invalidation: bool = Field(default=True, alias="CACHE_INVALIDATION")
+    invalidation_keepalive_sec: float = Field(default=30.0, alias="INVALIDATION_KEEPALIVE_SEC")
+    invalidation_reconnect_max_sec: float = Field(default=30.0, alias="INVALIDATION_RECONNECT_MAX_SEC")
+    # GET /account/balance answers from a per-account cache at most this many seconds old; 0 disables it.
+    balance_cache_size: int = Field(default=50_000, alias="BALANCE_CACHE_SIZE")
+    balance_cache_max_staleness_sec: float = Field(default=2.0, alias="BALANCE_CACHE_MAX_STALENESS_SEC")
+    # Longest range GET /account/summary answers, in days.
+    summary_max_days: int = Field(default=366, alias="SUMMARY_MAX_DAYS")
+    # Audit rows are queued and written in batches; AUDIT_SYNC_ACTIONS (comma-separated) are written in-transaction.
+    audit_flush_interval_sec: float = Field(default=2.0, alias="AUDIT_FLUSH_INTERVAL_SEC")
+    audit_flush_max_events: int = Field(default=500, alias="AUDIT_FLUSH_MAX_EVENTS")
+    audit_queue_size: int = Field(default=10_000, alias="AUDIT_QUEUE_SIZE")
+    audit_sync_actions: str = Field(default="", alias="AUDIT_SYNC_ACTIONS")
+    # Maintenance sweeper: expired sessions and old audit rows. SWEEP_INTERVAL_SEC=0 disables the in-app worker.
+    sweep_interval_sec: float = Field(default=3600.0, alias="SWEEP_INTERVAL_SEC")
+    sweep_batch_size: int = Field(default=1000, alias="SWEEP_BATCH_SIZE")
+    sweep_pause_sec: float = Field(default=0.05, alias="SWEEP_PAUSE_SEC")
+    audit_retention_days: int = Field(default=90, alias="AUDIT_RETENTION_DAYS")
+    audit_archive: bool = Field(default=False, alias="AUDIT_ARCHIVE")
 
     # Pydantic config
     model_config = SettingsConfigDict(
@@ -20,6 +78,23 @@ class Settings(BaseSettings):
         case_sensitive=False,
     )
 
+    @property
+    def resolved_async_database_url(self) -> str:
+        # Fall back to the sync DSN with the psycopg2 driver swapped for asyncpg.
+        return self.async_database_url or _asyncpg_url(self.database_url)
+
+    @property
+    def resolved_async_replica_database_url(self) -> str | None:
+        # Same fallback for the replica; None when no replica is configured.
+        if self.async_replica_database_url:
+            return self.async_replica_database_url
+        return _asyncpg_url(self.replica_database_url) if self.replica_database_url else None
+
+
+def _asyncpg_url(url: str) -> str:
+    scheme, sep, rest = url.partition("://")
+    return f"{scheme.split('+', 1)[0]}+asyncpg{sep}{rest}"
+
 
 @lru_cache
 def get_settings() -> Settings:
@@ -1,4 +1,13 @@
 # Database package initialization exposes Base for migrations and models.
+# engine and SessionLocal are resolved on first use: building them needs DATABASE_URL, which
+# modules that only generate data (app.db.synthetic) must not require.
 
-from .base import engine, SessionLocal  # noqa: F401
-from .models import Base  # noqa: F401
\ No newline at end of file
+from .models import Base  # noqa: F401
+
+
+def __getattr__(name: str):
+    if name in ("engine", "SessionLocal"):
+        from . import base
+
+        return getattr(base, name)
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
@@ -1,16 +1,84 @@
-
 from sqlalchemy import create_engine
-from sqlalchemy.orm import sessionmaker, scoped_session
+from sqlalchemy.orm import sessionmaker
 
 from ..config import get_settings
+from ..metrics.db import (
+    TimedAsyncAdaptedQueuePool,
+    TimedAsyncReplicaQueuePool,
+    TimedQueuePool,
+    TimedReplicaQueuePool,
+    instrument_engine,
+    watch_pool,
+)
 
 settings = get_settings()
-engine = create_engine(settings.database_url, future=True, pool_pre_ping=True)
-SessionLocal = scoped_session(sessionmaker(bind=engine, autoflush=False, autocommit=False))
 
-#  Yields a DB session for FastAPI dependency, commits on success, rolls back on error, and always closes.
-def get_db():
-    db = SessionLocal()
+
+def _build_engine(url, poolclass):
+    # Pooled sync engine with statement metrics and pool occupancy reporting.
+    built = create_engine(
+        url,
+        future=True,
+        pool_pre_ping=True,
+        pool_size=settings.db_pool_size,
+        max_overflow=settings.db_max_overflow,
+        poolclass=poolclass,
+    )
+    instrument_engine(built, settings.db_slow_statement_ms)
+    watch_pool(poolclass.metrics_name, built.pool, settings.db_pool_size + settings.db_max_overflow)
+    return built
+
+
+engine = _build_engine(settings.database_url, TimedQueuePool)
+# Plain sessionmaker: FastAPI may run a request's dependencies and handler on different
+# threadpool threads, so a thread-local scoped_session would be shared across requests.
+SessionLocal = sessionmaker(bind=engine, autoflush=False, autocommit=False)
+
+# Read replica for read-only routes; without REPLICA_DATABASE_URL reads use the primary.
+replica_engine = None
+ReplicaSessionLocal = SessionLocal
+if settings.replica_database_url:
+    replica_engine = _build_engine(settings.replica_database_url, TimedReplicaQueuePool)
+    ReplicaSessionLocal = sessionmaker(bind=replica_engine, autoflush=False, autocommit=False)
+
+# The async engines are only built when DB_ASYNC is on so asyncpg stays optional.
+async_engine = None
+AsyncSessionLocal = None
+async_replica_engine = None
+AsyncReplicaSessionLocal = None
+if settings.db_async:
+    from sqlalchemy.ext.asyncio import AsyncSession, create_async_engine
+
+    def _build_async_engine(url, poolclass):
+        built = create_async_engine(
+            url,
+            future=True,
+            pool_pre_ping=True,
+            pool_size=settings.db_pool_size,
+            max_overflow=settings.db_max_overflow,
+            poolclass=poolclass,
+        )
+        instrument_engine(built.sync_engine, settings.db_slow_statement_ms)
+        watch_pool(poolclass.metrics_name, built.pool, settings.db_pool_size + settings.db_max_overflow)
+        return built
+
+    async_engine = _build_async_engine(settings.resolved_async_database_url, TimedAsyncAdaptedQueuePool)
+    AsyncSessionLocal = sessionmaker(
+        bind=async_engine, class_=AsyncSession, autoflush=False, autocommit=False, expire_on_commit=False
+    )
+    AsyncReplicaSessionLocal = AsyncSessionLocal
+    if settings.resolved_async_replica_database_url:
+        async_replica_engine = _build_async_engine(
+            settings.resolved_async_replica_database_url, TimedAsyncReplicaQueuePool
+        )
+        AsyncReplicaSessionLocal = sessionmaker(
+            bind=async_replica_engine, class_=AsyncSession, autoflush=False, autocommit=False, expire_on_commit=False
+        )
+
+
+def _session_scope(factory):
+    # Commit on success, roll back on error, always close.
+    db = factory()
     try:
         yield db
         db.commit()
@@ -18,4 +86,40 @@ def get_db():
         db.rollback()
         raise
     finally:
-        db.close()
\ No newline at end of file
+        db.close()
+
+
+#  Yields a DB session for FastAPI dependency, commits on success, rolls back on error, and always closes.
+def get_db():
+    yield from _session_scope(SessionLocal)
+
+
+#  Same contract as get_db on the read replica (the primary when no replica is configured).
+def get_replica_db():
+    yield from _session_scope(ReplicaSessionLocal)
+
+
+async def _async_session_scope(factory):
+    if factory is None:
+        raise RuntimeError("Async database access requires DB_ASYNC=true")
+    db = factory()
+    try:
+        yield db
+        await db.commit()
+    except Exception:
+        await db.rollback()
+        raise
+    finally:
+        await db.close()
+
+
+#  Async counterpart of get_db: yields an AsyncSession with the same commit/rollback/close contract.
+async def get_async_db():
+    async for db in _async_session_scope(AsyncSessionLocal):
+        yield db
+
+
+#  Async counterpart of get_replica_db.
+async def get_async_replica_db():
+    async for db in _async_session_scope(AsyncReplicaSessionLocal):
+        yield db
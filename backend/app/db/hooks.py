@@ -0,0 +1,24 @@
+# Run callbacks only once the surrounding transaction has committed.
+
+from typing import Callable
+
+from sqlalchemy import event
+from sqlalchemy.orm import Session
+
+_PENDING_KEY = "after_commit_callbacks"
+
+
+def on_commit(db: Session, callback: Callable[[], None]) -> None:
+    # Queue a callback for the next successful commit of this session; a rollback discards it.
+    db.info.setdefault(_PENDING_KEY, []).append(callback)
+
+
+@event.listens_for(Session, "after_commit")
+def _run_pending(session: Session) -> None:
+    for callback in session.info.pop(_PENDING_KEY, []):
+        callback()
+
+
+@event.listens_for(Session, "after_rollback")
+def _drop_pending(session: Session) -> None:
+    session.info.pop(_PENDING_KEY, None)
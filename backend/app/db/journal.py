@@ -0,0 +1,400 @@
+# Bulk posting of offline ATM journals: COPY into a staging table, then set-based SQL per chunk.
+
+import argparse
+import csv
+import io
+import json
+import logging
+import os
+import time
+from dataclasses import dataclass, field
+from datetime import datetime, timezone
+from decimal import ROUND_HALF_UP, Decimal, InvalidOperation
+from typing import Dict, Iterator, List, Optional, TextIO, Tuple
+
+from sqlalchemy import text
+from sqlalchemy.orm import Session
+
+from ..cache import invalidation
+from . import models as orm
+from .base import SessionLocal, engine
+
+logger = logging.getLogger(__name__)
+
+COLUMNS = ("idempotency_key", "account_id", "type", "amount", "created_at")
+TYPES = {"deposit": "deposit", "withdrawal": "withdrawal", "withdraw": "withdrawal"}
+RESULT_HEADER = ("line", "idempotency_key", "account_id", "status", "reason")
+REASONS = {
+    "unknown_account": "Account not found",
+    "duplicate": "Idempotency key already posted or repeated in the journal",
+    "overdraft": "Insufficient funds",
+}
+
+# A parsed journal line: (line, idempotency_key, account_id, type, amount, created_at).
+JournalRow = Tuple[int, str, int, str, Decimal, datetime]
+
+_STAGE = """
+CREATE TEMP TABLE journal_stage (
+    line bigint PRIMARY KEY,
+    idempotency_key text NOT NULL,
+    account_id bigint NOT NULL,
+    type text NOT NULL,
+    amount numeric(12, 2) NOT NULL,
+    created_at timestamptz NOT NULL,
+    status text NOT NULL DEFAULT 'ok',
+    txn_id bigint
+) ON COMMIT DROP
+"""
+_DELTA = "CASE WHEN type = 'deposit' THEN amount ELSE -amount END"
+_STEPS = [
+    # Rows for accounts that do not exist.
+    """
+    UPDATE journal_stage s SET status = 'unknown_account'
+    WHERE NOT EXISTS (SELECT 1 FROM tbl_accounts a WHERE a.id = s.account_id)
+    """,
+    # Keys repeated within the chunk: the first line wins.
+    """
+    UPDATE journal_stage s SET status = 'duplicate'
+    FROM (
+        SELECT line, row_number() OVER (PARTITION BY idempotency_key ORDER BY line) AS n
+        FROM journal_stage WHERE status = 'ok'
+    ) d
+    WHERE s.line = d.line AND d.n > 1
+    """,
+    # Claim keys before locking accounts, in key order, like the online mutation path.
+    """
+    WITH claimed AS (
+        INSERT INTO tbl_transactions (account_id, type, amount, idempotency_key, created_at, meta)
+        SELECT account_id, type, amount, idempotency_key, created_at, CAST(:meta AS jsonb)
+        FROM journal_stage WHERE status = 'ok' ORDER BY idempotency_key
+        ON CONFLICT (idempotency_key) DO NOTHING
+        RETURNING id, idempotency_key
+    )
+    UPDATE journal_stage s SET txn_id = c.id
+    FROM claimed c WHERE s.idempotency_key = c.idempotency_key AND s.status = 'ok'
+    """,
+    # Keys posted before (by an earlier chunk, run or online request).
+    "UPDATE journal_stage SET status = 'duplicate' WHERE status = 'ok' AND txn_id IS NULL",
+    """
+    SELECT id FROM tbl_accounts
+    WHERE id IN (SELECT account_id FROM journal_stage WHERE status = 'ok')
+    ORDER BY id FOR UPDATE
+    """,
+]
+_OVERDRAWN_ACCOUNTS = f"""
+SELECT account_id FROM (
+    SELECT s.account_id,
+           a.balance + sum({_DELTA}) OVER (PARTITION BY s.account_id ORDER BY s.created_at, s.line) AS running
+    FROM journal_stage s JOIN tbl_accounts a ON a.id = s.account_id
+    WHERE s.status = 'ok'
+) r
+GROUP BY account_id HAVING min(running) < 0
+"""
+_ACCOUNT_ROWS = """
+SELECT s.account_id, s.line, s.type, s.amount, a.balance
+FROM journal_stage s JOIN tbl_accounts a ON a.id = s.account_id
+WHERE s.status = 'ok' AND s.account_id = ANY(:ids)
+ORDER BY s.account_id, s.created_at, s.line
+"""
+_REJECT_OVERDRAFTS = """
+WITH rejected AS (
+    UPDATE journal_stage SET status = 'overdraft' WHERE line = ANY(:lines) RETURNING txn_id
+)
+DELETE FROM tbl_transactions WHERE id IN (SELECT txn_id FROM rejected)
+"""
+_APPLY = f"""
+UPDATE tbl_accounts a SET balance = a.balance + d.net, updated_at = clock_timestamp()
+FROM (SELECT account_id, sum({_DELTA}) AS net FROM journal_stage WHERE status = 'ok' GROUP BY account_id) d
+WHERE a.id = d.account_id
+RETURNING a.id
+"""
+# Fold the chunk into tbl_balance_daily, per account and UTC day; runs before _APPLY, while
+# tbl_accounts still holds the balances before the chunk. Like the online fold, a day's row gets
+# the counters added and its balances moved. Journal rows can be backdated, so every later day
+# of the account is shifted by the chunk's net up to that day, and a day without a row starts
+# from the balance at the end of the previous day (or at the start of the next one).
+_FOLD_SNAPSHOTS = """
+WITH days AS (
+    SELECT account_id, date(timezone('UTC', created_at)) AS day,
+           count(*) FILTER (WHERE type = 'deposit') AS deposit_count,
+           coalesce(sum(amount) FILTER (WHERE type = 'deposit'), 0) AS deposit_total,
+           count(*) FILTER (WHERE type = 'withdrawal') AS withdrawal_count,
+           coalesce(sum(amount) FILTER (WHERE type = 'withdrawal'), 0) AS withdrawal_total
+    FROM journal_stage WHERE status = 'ok'
+    GROUP BY 1, 2
+), moves AS (
+    SELECT *, deposit_total - withdrawal_total AS net,
+           sum(deposit_total - withdrawal_total) OVER (PARTITION BY account_id ORDER BY day) AS upto
+    FROM days
+), later AS (
+    -- Existing rows on or after each account's first chunk day, with the chunk's net up to and
+    -- including their day: a running sum over the chunk days and the rows, chunk days first.
+    SELECT t.account_id, t.day, t.upto
+    FROM (
+        SELECT account_id, day, is_row, sum(net) OVER (PARTITION BY account_id ORDER BY day, is_row) AS upto
+        FROM (
+            SELECT account_id, day, net, false AS is_row FROM moves
+            UNION ALL
+            SELECT d.account_id, d.day, NULL, true
+            FROM tbl_balance_daily d
+            JOIN (SELECT account_id, min(day) AS first_day FROM moves GROUP BY account_id) f
+                ON f.account_id = d.account_id AND d.day >= f.first_day
+        ) u
+    ) t
+    WHERE t.is_row
+), shifted AS (
+    UPDATE tbl_balance_daily b
+    SET opening_balance = b.opening_balance + l.upto - coalesce(m.net, 0),
+        closing_balance = b.closing_balance + l.upto,
+        deposit_count = b.deposit_count + coalesce(m.deposit_count, 0),
+        deposit_total = b.deposit_total + coalesce(m.deposit_total, 0),
+        withdrawal_count = b.withdrawal_count + coalesce(m.withdrawal_count, 0),
+        withdrawal_total = b.withdrawal_total + coalesce(m.withdrawal_total, 0)
+    FROM later l LEFT JOIN moves m ON m.account_id = l.account_id AND m.day = l.day
+    WHERE b.account_id = l.account_id AND b.day = l.day
+)
+INSERT INTO tbl_balance_daily (account_id, day, opening_balance, closing_balance,
+                               deposit_count, deposit_total, withdrawal_count, withdrawal_total)
+SELECT m.account_id, m.day, p.balance + m.upto - m.net, p.balance + m.upto,
+       m.deposit_count, m.deposit_total, m.withdrawal_count, m.withdrawal_total
+FROM moves m
+CROSS JOIN LATERAL (
+    SELECT coalesce(
+        (SELECT closing_balance FROM tbl_balance_daily d
+         WHERE d.account_id = m.account_id AND d.day < m.day ORDER BY d.day DESC LIMIT 1),
+        (SELECT opening_balance FROM tbl_balance_daily d
+         WHERE d.account_id = m.account_id AND d.day > m.day ORDER BY d.day LIMIT 1),
+        (SELECT balance FROM tbl_accounts a WHERE a.id = m.account_id)
+    ) AS balance
+) p
+WHERE NOT EXISTS (SELECT 1 FROM tbl_balance_daily d WHERE d.account_id = m.account_id AND d.day = m.day)
+"""
+_OUTCOME = "SELECT line, idempotency_key, account_id, status FROM journal_stage WHERE status <> 'ok' ORDER BY line"
+
+
+@dataclass
+class JournalReport:
+    read: int = 0
+    posted: int = 0
+    seconds: float = 0.0
+    rejected: Dict[str, int] = field(default_factory=dict)
+
+    @property
+    def rows_per_min(self) -> float:
+        return self.read / self.seconds * 60 if self.seconds > 0 else 0.0
+
+
+def read_records(stream: TextIO, fmt: str) -> Iterator[Tuple[int, dict]]:
+    # Yield (line number, raw record) from a CSV file with a header or from NDJSON.
+    if fmt == "csv":
+        reader = csv.DictReader(stream)
+        for record in reader:
+            yield reader.line_num, record
+        return
+    for line_no, line in enumerate(stream, start=1):
+        if not line.strip():
+            continue
+        try:
+            record = json.loads(line)
+        except ValueError:
+            record = None
+        yield line_no, record if isinstance(record, dict) else {"_error": "Not a JSON object"}
+
+
+def parse_record(line: int, record: dict) -> JournalRow:
+    """
+    Validate one journal record.
+
+    Args:
+        line (int): Line number in the journal, used as the row's identity.
+        record (dict): Raw fields: idempotency_key, account_id, type, amount, created_at.
+
+    Returns:
+        JournalRow: Normalized row; withdrawals are stored as "withdrawal".
+
+    Raises:
+        ValueError: With the reason the record is rejected.
+    """
+    if "_error" in record:
+        raise ValueError(record["_error"])
+    missing = [name for name in COLUMNS if record.get(name) in (None, "")]
+    if missing:
+        raise ValueError(f"Missing {', '.join(missing)}")
+    tx_type = TYPES.get(str(record["type"]).lower())
+    if tx_type is None:
+        raise ValueError(f"Unknown type {record['type']!r}")
+    try:
+        account_id = int(record["account_id"])
+        amount = Decimal(str(record["amount"])).quantize(Decimal("0.01"), rounding=ROUND_HALF_UP)
+        created_at = datetime.fromisoformat(str(record["created_at"]).replace("Z", "+00:00"))
+    except (ValueError, InvalidOperation) as exc:
+        raise ValueError(f"Malformed field: {exc}")
+    if amount <= 0 or amount >= Decimal("1e10"):
+        raise ValueError("Amount out of range")
+    if created_at.tzinfo is None:
+        created_at = created_at.replace(tzinfo=timezone.utc)
+    return line, str(record["idempotency_key"]), account_id, tx_type, amount, created_at
+
+
+def _copy_rows(db: Session, rows: List[JournalRow]) -> None:
+    # Stream the chunk into journal_stage with COPY on the session's own connection.
+    buffer = io.StringIO()
+    writer = csv.writer(buffer)
+    writer.writerows((line, key, account, tx_type, amount, ts.isoformat()) for line, key, account, tx_type, amount, ts in rows)
+    buffer.seek(0)
+    cursor = db.connection().connection.cursor()
+    try:
+        cursor.copy_expert(
+            "COPY journal_stage (line, idempotency_key, account_id, type, amount, created_at) FROM STDIN WITH (FORMAT csv)",
+            buffer,
+        )
+    finally:
+        cursor.close()
+
+
+def _overdraft_lines(db: Session, account_ids: List[int]) -> List[int]:
+    # Walk the few accounts that would go negative in order, rejecting each withdrawal that overdraws.
+    rejected = []
+    balance: Optional[Decimal] = None
+    current = None
+    for account_id, line, tx_type, amount, opening in db.execute(text(_ACCOUNT_ROWS), {"ids": account_ids}):
+        if account_id != current:
+            current, balance = account_id, Decimal(opening)
+        delta = amount if tx_type == "deposit" else -amount
+        if balance + delta < 0:
+            rejected.append(line)
+        else:
+            balance += delta
+    return rejected
+
+
+def post_chunk(db: Session, rows: List[JournalRow], source: str, snapshots: bool = True) -> Tuple[int, list]:
+    """
+    Post one chunk of parsed journal rows in the caller's transaction.
+
+    The rows are copied into a temporary staging table. Unknown accounts and
+    repeated keys are marked, then the remaining rows are inserted into
+    tbl_transactions with ON CONFLICT (idempotency_key) DO NOTHING, so keys
+    posted earlier are skipped. The affected accounts are locked, and
+    accounts whose running balance would go negative get an exact ordered
+    pass that rejects the overdrawing withdrawals. Unless snapshots is False,
+    the chunk's per-account, per-day totals are folded into tbl_balance_daily,
+    touching only the days on or after the chunk's first day for each account.
+    Balances then move with one UPDATE ... FROM over the per-account net, and
+    API workers are notified to drop cached state for the touched accounts on
+    commit.
+
+    Args:
+        db (Session): SQLAlchemy session; the caller commits.
+        rows (List[JournalRow]): Parsed rows of the chunk.
+        source (str): Journal name stored in tbl_transactions.meta.
+        snapshots (bool): Fold the chunk into tbl_balance_daily.
+
+    Returns:
+        Tuple[int, list]: Rows posted, and (line, key, account_id, status) for every other row.
+    """
+    db.execute(text(_STAGE))
+    _copy_rows(db, rows)
+    db.execute(text("ANALYZE journal_stage"))
+    meta = json.dumps({"journal": source})
+    for step in _STEPS:
+        db.execute(text(step), {"meta": meta})
+    overdrawn = db.execute(text(_OVERDRAWN_ACCOUNTS)).scalars().all()
+    if overdrawn:
+        lines = _overdraft_lines(db, overdrawn)
+        if lines:
+            db.execute(text(_REJECT_OVERDRAFTS), {"lines": lines})
+    if snapshots:
+        db.execute(text(_FOLD_SNAPSHOTS))
+    touched = db.execute(text(_APPLY)).scalars().all()
+    invalidation.publish(db, invalidation.ACCOUNT, touched)
+    posted = db.execute(text("SELECT count(*) FROM journal_stage WHERE status = 'ok'")).scalar_one()
+    return posted, db.execute(text(_OUTCOME)).all()
+
+
+def post_journal(
+    stream: TextIO,
+    fmt: str,
+    result: TextIO,
+    source: str,
+    chunk_size: int = 50_000,
+    snapshots: bool = True,
+) -> JournalReport:
+    """
+    Post a whole journal, one transaction per chunk of chunk_size records.
+
+    Every record that is not posted is written to result as a CSV line with
+    its status (invalid, unknown_account, duplicate, overdraft) and reason.
+    Re-running a journal is safe: already posted keys come back as duplicates.
+
+    Args:
+        stream (TextIO): Journal file opened for reading.
+        fmt (str): "csv" (with a header) or "ndjson".
+        result (TextIO): File receiving the rejected records.
+        source (str): Journal name stored in tbl_transactions.meta.
+        chunk_size (int): Records per transaction.
+        snapshots (bool): Keep daily snapshots up to date.
+
+    Returns:
+        JournalReport: Counts per outcome and throughput.
+    """
+    report = JournalReport()
+    out = csv.writer(result)
+    out.writerow(RESULT_HEADER)
+    started = time.perf_counter()
+
+    def flush(rows: List[JournalRow]) -> None:
+        with SessionLocal() as db:
+            posted, others = post_chunk(db, rows, source, snapshots)
+            db.commit()
+        report.posted += posted
+        for line, key, account_id, status in others:
+            report.rejected[status] = report.rejected.get(status, 0) + 1
+            out.writerow((line, key, account_id, status, REASONS[status]))
+        logger.info("Journal %s: %d rows read, %d posted", source, report.read, report.posted)
+
+    chunk: List[JournalRow] = []
+    for line, record in read_records(stream, fmt):
+        report.read += 1
+        try:
+            chunk.append(parse_record(line, record))
+        except ValueError as exc:
+            report.rejected["invalid"] = report.rejected.get("invalid", 0) + 1
+            out.writerow((line, record.get("idempotency_key", ""), record.get("account_id", ""), "invalid", str(exc)))
+            continue
+        if len(chunk) >= chunk_size:
+            flush(chunk)
+            chunk = []
+    if chunk:
+        flush(chunk)
+    report.seconds = time.perf_counter() - started
+    return report
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Post an offline ATM journal (CSV or NDJSON) to the accounts.")
+    parser.add_argument("journal", help="journal file; CSV needs a header with " + ",".join(COLUMNS))
+    parser.add_argument("--format", choices=("csv", "ndjson"), help="defaults to the file extension")
+    parser.add_argument("--result", help="rejected records CSV (default: <journal>.result.csv)")
+    parser.add_argument("--chunk-size", type=int, default=50_000, help="records per transaction")
+    parser.add_argument(
+        "--skip-snapshots", action="store_true", help="do not update daily snapshots; run app.db.snapshots later"
+    )
+    args = parser.parse_args()
+
+    fmt = args.format or ("ndjson" if args.journal.endswith((".ndjson", ".jsonl")) else "csv")
+    result_path = args.result or f"{args.journal}.result.csv"
+    orm.Base.metadata.create_all(bind=engine)
+    with open(args.journal, newline="", encoding="utf-8") as stream, open(
+        result_path, "w", newline="", encoding="utf-8"
+    ) as result:
+        report = post_journal(
+            stream, fmt, result, os.path.basename(args.journal), args.chunk_size, not args.skip_snapshots
+        )
+    rejected = ", ".join(f"{status} {count}" for status, count in sorted(report.rejected.items())) or "none"
+    print(f"read {report.read}  posted {report.posted}  not posted: {rejected}")
+    print(f"{report.seconds:.2f}s  {report.rows_per_min:,.0f} rows/min  results in {result_path}")
+
+
+if __name__ == "__main__":
+    main()
@@ -1,12 +1,13 @@
 from __future__ import annotations
 
-from datetime import datetime
+from datetime import date, datetime
 from decimal import Decimal
 from typing import Optional, Any
 
 from sqlalchemy import (
     BigInteger,
     String,
+    Date,
     DateTime,
     Boolean,
     Integer,
@@ -151,6 +152,40 @@ class Transaction(Base):
     )
 
 
+class DailyBalance(Base):
+    __tablename__ = "tbl_balance_daily"
+
+    # One row per account and UTC day with activity. AccountService keeps today's row
+    # current; python -m app.db.snapshots rebuilds rows from tbl_transactions.
+    account_id: Mapped[int] = mapped_column(
+        ForeignKey("tbl_accounts.id", ondelete="CASCADE"), primary_key=True
+    )
+    day: Mapped[date] = mapped_column(Date, primary_key=True)
+    opening_balance: Mapped[Decimal] = mapped_column(Numeric(12, 2), nullable=False)
+    closing_balance: Mapped[Decimal] = mapped_column(Numeric(12, 2), nullable=False)
+    deposit_count: Mapped[int] = mapped_column(Integer, server_default="0", nullable=False)
+    deposit_total: Mapped[Decimal] = mapped_column(Numeric(14, 2), server_default="0.00", nullable=False)
+    withdrawal_count: Mapped[int] = mapped_column(Integer, server_default="0", nullable=False)
+    withdrawal_total: Mapped[Decimal] = mapped_column(Numeric(14, 2), server_default="0.00", nullable=False)
+
+
+class IdempotencyRecord(Base):
+    __tablename__ = "tbl_idempotency"
+
+    key: Mapped[str] = mapped_column(String, primary_key=True)
+    account_id: Mapped[int] = mapped_column(
+        ForeignKey("tbl_accounts.id", ondelete="CASCADE"), nullable=False
+    )
+    balance: Mapped[Decimal] = mapped_column(Numeric(12, 2), nullable=False)
+    created_at: Mapped[datetime] = mapped_column(
+        DateTime(timezone=True), server_default=func.now(), nullable=False
+    )
+
+    __table_args__ = (
+        Index("ix_tbl_idempotency_created_at", "created_at"),
+    )
+
+
 class Session(Base):
     __tablename__ = "tbl_sessions"
 
@@ -189,3 +224,16 @@ class AuditLog(Base):
         DateTime(timezone=True), server_default=func.now(), nullable=False
     )
     meta: Mapped[Optional[dict]] = mapped_column(JSONB)
+
+
+class AuditLogArchive(Base):
+    __tablename__ = "tbl_audit_log_archive"
+
+    # Same columns as tbl_audit_log; no foreign key so archived rows outlive their cards.
+    id: Mapped[int] = mapped_column(BigInteger, primary_key=True)
+    card_id: Mapped[Optional[int]] = mapped_column(BigInteger)
+    action: Mapped[str] = mapped_column(String(32), nullable=False)
+    result: Mapped[str] = mapped_column(String(8), nullable=False)
+    ip: Mapped[Optional[str]] = mapped_column(INET)
+    ts: Mapped[datetime] = mapped_column(DateTime(timezone=True), nullable=False)
+    meta: Mapped[Optional[dict]] = mapped_column(JSONB)
@@ -0,0 +1,72 @@
+# Read routing: read-only requests go to the replica unless the client has just written.
+
+import math
+import time
+from typing import Optional
+
+from fastapi import Request, Response
+from sqlalchemy.orm import sessionmaker
+
+from ..config import get_settings
+from . import base
+
+# Unix time until which this client's reads must stay on the primary.
+PRIMARY_COOKIE = "atm_primary_until"
+
+
+def replica_configured() -> bool:
+    return base.replica_engine is not None or base.async_replica_engine is not None
+
+
+def pin_to_primary(response: Response, now: Optional[float] = None) -> None:
+    """
+    Keep the client's reads on the primary for READ_YOUR_WRITES_SEC.
+
+    The window travels in a cookie rather than in process memory, so it holds
+    whichever worker serves the next read.
+
+    Args:
+        response (Response): Response of the mutating request.
+        now (Optional[float]): Current Unix time; defaults to time.time().
+    """
+    window = get_settings().read_your_writes_sec
+    until = (time.time() if now is None else now) + window
+    response.set_cookie(
+        key=PRIMARY_COOKIE,
+        value=f"{until:.3f}",
+        httponly=True,
+        secure=False,
+        samesite="lax",
+        max_age=math.ceil(window),
+        path="/",
+    )
+
+
+def reads_pinned(request: Request, now: Optional[float] = None) -> bool:
+    """
+    Return True while the client's read-your-writes window is open.
+
+    A malformed cookie, or one claiming more than a full window, is ignored so
+    a client cannot keep itself on the primary indefinitely.
+
+    Args:
+        request (Request): Incoming read request.
+        now (Optional[float]): Current Unix time; defaults to time.time().
+
+    Returns:
+        bool: Whether reads must be served by the primary.
+    """
+    raw = request.cookies.get(PRIMARY_COOKIE)
+    if not raw:
+        return False
+    try:
+        until = float(raw)
+    except ValueError:
+        return False
+    now = time.time() if now is None else now
+    return now < until <= now + get_settings().read_your_writes_sec
+
+
+def read_session_factory(request: Request) -> sessionmaker:
+    # Sync sessionmaker that should serve a read-only request.
+    return base.SessionLocal if reads_pinned(request) else base.ReplicaSessionLocal
@@ -0,0 +1,136 @@
+# Backfill of tbl_balance_daily from existing transaction history, a few accounts at a time.
+
+import argparse
+import logging
+import time
+from dataclasses import dataclass
+from typing import List, Optional, Sequence
+
+from sqlalchemy import delete, func, insert, select
+from sqlalchemy.orm import Session
+
+from ..config import get_settings
+from ..services.snapshots import SNAPSHOT_COLUMNS
+from . import models as orm
+from .base import SessionLocal, engine
+
+logger = logging.getLogger(__name__)
+
+
+@dataclass(frozen=True)
+class BackfillReport:
+    rows: int
+    seconds: float
+
+    @property
+    def rows_per_sec(self) -> float:
+        return self.rows / self.seconds if self.seconds > 0 else 0.0
+
+
+def rebuild_accounts(db: Session, account_ids: Sequence[int]) -> int:
+    """
+    Recompute every daily snapshot of the given accounts from tbl_transactions.
+
+    The accounts are locked first, so no deposit or withdrawal on them can run
+    until commit. The history is then aggregated per UTC day in a second
+    statement, whose snapshot sees every committed move. Closing balances are
+    derived backwards from the current balance: a day closes at the balance
+    minus the net of all later days.
+
+    Args:
+        db (Session): SQLAlchemy session; the caller commits.
+        account_ids (Sequence[int]): Accounts to rebuild.
+
+    Returns:
+        int: Snapshot rows written.
+    """
+    db.execute(
+        select(orm.Account.id).where(orm.Account.id.in_(account_ids)).order_by(orm.Account.id).with_for_update()
+    ).all()
+    tx = orm.Transaction
+    day = func.date(func.timezone("UTC", tx.created_at))
+    is_deposit = tx.type == "deposit"
+    is_withdrawal = tx.type == "withdrawal"
+    daily = (
+        select(
+            tx.account_id,
+            day.label("day"),
+            func.count().filter(is_deposit).label("deposit_count"),
+            func.coalesce(func.sum(tx.amount).filter(is_deposit), 0).label("deposit_total"),
+            func.count().filter(is_withdrawal).label("withdrawal_count"),
+            func.coalesce(func.sum(tx.amount).filter(is_withdrawal), 0).label("withdrawal_total"),
+        )
+        .where(tx.account_id.in_(account_ids))
+        .group_by(tx.account_id, day)
+        .subquery("daily")
+    )
+    net = daily.c.deposit_total - daily.c.withdrawal_total
+    later = func.coalesce(
+        func.sum(net).over(partition_by=daily.c.account_id, order_by=daily.c.day.desc(), rows=(None, -1)), 0
+    )
+    closing = orm.Account.balance - later
+    rows = select(
+        daily.c.account_id,
+        daily.c.day,
+        closing - net,
+        closing,
+        daily.c.deposit_count,
+        daily.c.deposit_total,
+        daily.c.withdrawal_count,
+        daily.c.withdrawal_total,
+    ).join(orm.Account, orm.Account.id == daily.c.account_id)
+    db.execute(delete(orm.DailyBalance).where(orm.DailyBalance.account_id.in_(account_ids)))
+    return db.execute(insert(orm.DailyBalance).from_select(SNAPSHOT_COLUMNS, rows)).rowcount
+
+
+def backfill(batch_size: int, pause_sec: float, account_ids: Optional[List[int]] = None) -> BackfillReport:
+    """
+    Rebuild snapshots for all accounts (or account_ids), one transaction per batch of accounts.
+
+    Accounts are walked by id, and each batch commits on its own, so a batch
+    blocks mutations only on its own accounts and only briefly. Safe to re-run;
+    it rewrites what it touches.
+
+    Args:
+        batch_size (int): Accounts per batch.
+        pause_sec (float): Sleep between batches.
+        account_ids (Optional[List[int]]): Restrict the backfill to these accounts.
+
+    Returns:
+        BackfillReport: Snapshot rows written and time taken.
+    """
+    total = 0
+    last_id = 0
+    started = time.perf_counter()
+    while True:
+        with SessionLocal() as db:
+            query = select(orm.Account.id).where(orm.Account.id > last_id)
+            if account_ids is not None:
+                query = query.where(orm.Account.id.in_(account_ids))
+            batch = db.execute(query.order_by(orm.Account.id).limit(batch_size)).scalars().all()
+            if not batch:
+                break
+            total += rebuild_accounts(db, batch)
+            db.commit()
+        last_id = batch[-1]
+        time.sleep(pause_sec)
+    report = BackfillReport(rows=total, seconds=time.perf_counter() - started)
+    logger.info("Backfilled %d snapshot rows in %.2fs", report.rows, report.seconds)
+    return report
+
+
+def main() -> None:
+    settings = get_settings()
+    parser = argparse.ArgumentParser(description="Rebuild daily balance snapshots from transaction history.")
+    parser.add_argument("--batch-size", type=int, default=100, help="accounts per transaction")
+    parser.add_argument("--pause", type=float, default=settings.sweep_pause_sec, help="seconds between batches")
+    parser.add_argument("--account", type=int, action="append", help="only this account id (repeatable)")
+    args = parser.parse_args()
+
+    orm.Base.metadata.create_all(bind=engine)
+    report = backfill(args.batch_size, args.pause, args.account)
+    print(f"balance_snapshots  {report.rows:>10} rows  {report.seconds:8.2f}s  {report.rows_per_sec:10.0f} rows/s")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,243 @@
+# Maintenance sweeper: deletes dead sessions and ages out audit rows in small batches.
+
+import argparse
+import logging
+import threading
+import time
+from dataclasses import dataclass
+from datetime import datetime, timedelta, timezone
+from typing import Callable, List, Optional, Tuple
+
+from sqlalchemy import delete, func, insert, select
+from sqlalchemy.orm import Session
+
+from ..config import get_settings
+from ..services.idempotency import get_idempotency_store
+from . import models as orm
+from .base import SessionLocal, engine
+
+logger = logging.getLogger(__name__)
+
+# Advisory lock key held for the duration of a sweep ("atmswp").
+SWEEP_LOCK_KEY = 0x61746D737770
+
+# One batch of work: delete up to batch_size rows and return how many went.
+BatchStep = Callable[[Session, int], int]
+
+
+@dataclass(frozen=True)
+class SweepReport:
+    task: str
+    rows: int
+    seconds: float
+
+    @property
+    def rows_per_sec(self) -> float:
+        return self.rows / self.seconds if self.seconds > 0 else 0.0
+
+
+def _delete_sessions(db: Session, batch_size: int, *criteria) -> int:
+    # Delete one batch of sessions matching criteria, skipping rows another worker holds.
+    doomed = (
+        select(orm.Session.id)
+        .where(*criteria)
+        .order_by(orm.Session.expires_at)
+        .limit(batch_size)
+        .with_for_update(skip_locked=True)
+    )
+    result = db.execute(
+        delete(orm.Session)
+        .where(orm.Session.id.in_(doomed.scalar_subquery()))
+        .execution_options(synchronize_session=False)
+    )
+    return result.rowcount
+
+
+def expired_sessions(db: Session, batch_size: int) -> int:
+    # Sessions past expires_at; a range scan on ix_tbl_sessions_expires_at.
+    now = datetime.now(timezone.utc)
+    return _delete_sessions(db, batch_size, orm.Session.expires_at < now)
+
+
+def revoked_sessions(db: Session, batch_size: int) -> int:
+    # Logged-out sessions that have not expired yet. Once expired sessions are gone the
+    # expires_at range still to scan only covers live sessions (at most SESSION_TTL_MIN wide).
+    now = datetime.now(timezone.utc)
+    return _delete_sessions(
+        db, batch_size, orm.Session.expires_at >= now, orm.Session.revoked_at.is_not(None)
+    )
+
+
+def old_audit_rows(db: Session, batch_size: int) -> int:
+    # Audit rows older than AUDIT_RETENTION_DAYS, moved to tbl_audit_log_archive or deleted.
+    settings = get_settings()
+    cutoff = datetime.now(timezone.utc) - timedelta(days=settings.audit_retention_days)
+    # Ids grow with time, so walking the primary key finds the oldest rows first.
+    doomed = (
+        select(orm.AuditLog.id)
+        .where(orm.AuditLog.ts < cutoff)
+        .order_by(orm.AuditLog.id)
+        .limit(batch_size)
+        .with_for_update(skip_locked=True)
+    )
+    purge = delete(orm.AuditLog).where(orm.AuditLog.id.in_(doomed.scalar_subquery()))
+    if not settings.audit_archive:
+        return db.execute(purge.execution_options(synchronize_session=False)).rowcount
+    columns = [c.name for c in orm.AuditLog.__table__.columns]
+    moved = purge.returning(*orm.AuditLog.__table__.columns).cte("moved")
+    return db.execute(
+        insert(orm.AuditLogArchive).from_select(columns, select(*[moved.c[name] for name in columns]))
+    ).rowcount
+
+
+def expired_idempotency_records(db: Session, batch_size: int) -> int:
+    # Stored mutation responses past IDEMPOTENCY_RETENTION_HOURS.
+    return get_idempotency_store().purge_expired(db, batch_size)
+
+
+TASKS: List[Tuple[str, BatchStep]] = [
+    ("expired_sessions", expired_sessions),
+    ("revoked_sessions", revoked_sessions),
+    ("audit_log", old_audit_rows),
+    ("idempotency", expired_idempotency_records),
+]
+
+
+def run_task(
+    name: str,
+    step: BatchStep,
+    batch_size: int,
+    pause_sec: float,
+    stop: Optional[threading.Event] = None,
+) -> SweepReport:
+    """
+    Run one cleanup task to completion, one short transaction per batch.
+
+    Each batch commits on its own so locks are held only for batch_size rows,
+    and the worker sleeps pause_sec between batches to leave room for traffic.
+
+    Args:
+        name (str): Task name used in the report.
+        step (BatchStep): Function deleting one batch.
+        batch_size (int): Rows per batch.
+        pause_sec (float): Sleep between batches.
+        stop (Optional[threading.Event]): Set to abandon the task between batches.
+
+    Returns:
+        SweepReport: Rows removed and time taken.
+    """
+    total = 0
+    started = time.perf_counter()
+    while True:
+        with SessionLocal() as db:
+            removed = step(db, batch_size)
+            db.commit()
+        total += removed
+        if removed < batch_size or (stop is not None and stop.is_set()):
+            break
+        if stop is not None:
+            stop.wait(pause_sec)
+        else:
+            time.sleep(pause_sec)
+    report = SweepReport(task=name, rows=total, seconds=time.perf_counter() - started)
+    logger.info(
+        "Sweep %s: %d rows in %.2fs (%.0f rows/s)", name, report.rows, report.seconds, report.rows_per_sec
+    )
+    return report
+
+
+def sweep(batch_size: int, pause_sec: float, stop: Optional[threading.Event] = None) -> List[SweepReport]:
+    # Run every task once and return their reports.
+    reports = []
+    for name, step in TASKS:
+        if stop is not None and stop.is_set():
+            break
+        reports.append(run_task(name, step, batch_size, pause_sec, stop))
+    return reports
+
+
+def sweep_exclusive(
+    batch_size: int, pause_sec: float, stop: Optional[threading.Event] = None
+) -> Optional[List[SweepReport]]:
+    """
+    Run sweep() unless another process is already sweeping.
+
+    The session-level advisory lock SWEEP_LOCK_KEY is held on a dedicated
+    autocommit connection for the whole sweep, so API workers and a cron run
+    sharing a database do not repeat each other's batches.
+
+    Args:
+        batch_size (int): Rows per batch.
+        pause_sec (float): Sleep between batches.
+        stop (Optional[threading.Event]): Set to abandon the sweep between batches.
+
+    Returns:
+        Optional[List[SweepReport]]: The reports, or None when the sweep was skipped.
+    """
+    with engine.connect().execution_options(isolation_level="AUTOCOMMIT") as conn:
+        if not conn.execute(select(func.pg_try_advisory_lock(SWEEP_LOCK_KEY))).scalar_one():
+            logger.info("Sweep skipped: another process is sweeping")
+            return None
+        try:
+            return sweep(batch_size, pause_sec, stop)
+        finally:
+            conn.execute(select(func.pg_advisory_unlock(SWEEP_LOCK_KEY)))
+
+
+class Sweeper:
+    """Run sweep_exclusive() on a background thread every interval_sec.
+
+    Every API worker runs one; the advisory lock lets only one of them sweep
+    at a time, and the others skip that interval.
+    """
+
+    def __init__(self, interval_sec: float, batch_size: int, pause_sec: float) -> None:
+        self.interval_sec = interval_sec
+        self.batch_size = batch_size
+        self.pause_sec = pause_sec
+        self._stopping = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+
+    def _run(self) -> None:
+        while not self._stopping.wait(self.interval_sec):
+            try:
+                sweep_exclusive(self.batch_size, self.pause_sec, self._stopping)
+            except Exception:
+                logger.exception("Sweep failed")
+
+    def start(self) -> None:
+        # Start the background sweeper; the first run happens one interval after start.
+        if self._thread is None and self.interval_sec > 0:
+            self._stopping.clear()
+            self._thread = threading.Thread(target=self._run, name="sweeper", daemon=True)
+            self._thread.start()
+
+    def stop(self) -> None:
+        # Stop the sweeper, abandoning a run in progress after its current batch.
+        if self._thread is not None:
+            self._stopping.set()
+            self._thread.join()
+            self._thread = None
+
+
+def main() -> None:
+    settings = get_settings()
+    parser = argparse.ArgumentParser(description="Delete dead sessions and age out audit rows.")
+    parser.add_argument("--batch-size", type=int, default=settings.sweep_batch_size)
+    parser.add_argument("--pause", type=float, default=settings.sweep_pause_sec, help="seconds between batches")
+    parser.add_argument("--loop", action="store_true", help="repeat every SWEEP_INTERVAL_SEC instead of once")
+    args = parser.parse_args()
+    if args.loop and settings.sweep_interval_sec <= 0:
+        # Like Sweeper.start: no interval means no repeated sweeps, not back-to-back ones.
+        parser.error("--loop needs SWEEP_INTERVAL_SEC > 0")
+
+    while True:
+        for report in sweep_exclusive(args.batch_size, args.pause) or []:
+            print(f"{report.task:<18} {report.rows:>10} rows  {report.seconds:8.2f}s  {report.rows_per_sec:10.0f} rows/s")
+        if not args.loop:
+            break
+        time.sleep(settings.sweep_interval_sec)
+
+
+if __name__ == "__main__":
+    main()
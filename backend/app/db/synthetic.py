@@ -0,0 +1,341 @@
+# Synthetic data at production scale: customers, accounts, cards and transaction history loaded with COPY.
+# Generation is pure; the engine is imported only by the functions that load.
+
+import argparse
+import functools
+import io
+import logging
+import multiprocessing
+import random
+import time
+from dataclasses import dataclass
+from datetime import datetime, timezone
+from itertools import accumulate
+from typing import TYPE_CHECKING, Dict, Iterator, List, Tuple
+
+from sqlalchemy import text
+
+from . import models as orm
+
+if TYPE_CHECKING:
+    from .sweeper import SweepReport
+
+logger = logging.getLogger(__name__)
+
+DAY = 86400
+# Relative ATM traffic per UTC hour: quiet overnight, peaks at lunch and after work.
+HOUR_WEIGHTS = [1, 1, 1, 1, 1, 2, 4, 7, 9, 9, 9, 10, 12, 11, 9, 9, 10, 12, 12, 10, 8, 6, 4, 2]
+# Monday..Sunday; Fridays and Saturdays are busiest.
+WEEKDAY_WEIGHTS = [1.0, 1.0, 1.0, 1.05, 1.3, 1.2, 0.8]
+PAYDAY_WEIGHT = 1.5
+# ATM withdrawals come in note multiples, in cents.
+WITHDRAWAL_CENTS = [2000, 4000, 6000, 8000, 10000, 12000, 20000, 30000, 40000, 50000]
+WITHDRAWAL_CUM_WEIGHTS = list(accumulate([20, 18, 12, 10, 14, 4, 8, 4, 2, 3]))
+NETWORKS = [("visa", "411111"), ("mastercard", "555555"), ("maestro", "353535"), ("star", "444444")]
+TABLES = ("tbl_customers", "tbl_accounts", "tbl_cards", "tbl_transactions")
+
+
+@dataclass(frozen=True)
+class Plan:
+    # Everything a worker needs to generate its slice; ids are base + index.
+    customer_base: int
+    account_base: int
+    card_base: int
+    tx_base: int
+    tx_per_account: int
+    end: int
+    days: int
+    seed: int
+    pin_hashes: Tuple[str, ...]
+    snapshots: bool
+
+
+def pin_for(card_id: int, pool: int) -> str:
+    # PIN of a synthetic card; card SYN_<id> uses the (id % pool)-th PIN of the pool.
+    return str(1000 + card_id % pool)
+
+
+def _cents(value: int) -> str:
+    return f"{value // 100}.{value % 100:02d}"
+
+
+def _hour_slots(end: int, days: int) -> Tuple[List[int], List[str], List[float]]:
+    # Start of every hour in the window, its timestamp prefix and the cumulative traffic weight up to it.
+    starts, prefixes, cumulative, total = [], [], [], 0.0
+    for day_start in range(end - days * DAY, end, DAY):
+        day = datetime.fromtimestamp(day_start, timezone.utc).date()
+        weight = WEEKDAY_WEIGHTS[day.weekday()] * (PAYDAY_WEIGHT if day.day in (1, 15) else 1.0)
+        for hour, hour_weight in enumerate(HOUR_WEIGHTS):
+            total += weight * hour_weight
+            starts.append(day_start + hour * 3600)
+            prefixes.append(f"{day.isoformat()} {hour:02d}:")
+            cumulative.append(total)
+    return starts, prefixes, cumulative
+
+
+def _account_history(rng: random.Random, plan: Plan, slots: Tuple[List[int], List[str], List[float]]):
+    """
+    Generate one account's history in time order.
+
+    About 45% of operations are deposits with a log-normal amount; the rest
+    are note-multiple withdrawals, turned into deposits when the balance does
+    not cover them, so the balance never goes negative.
+
+    Returns:
+        Tuple: (opening cents, closing cents, [(timestamp, UTC text, is_deposit, cents), ...]).
+    """
+    starts, prefixes, cumulative = slots
+    stamps = sorted(
+        (slot, rng.randrange(3600))
+        for slot in rng.choices(range(len(starts)), cum_weights=cumulative, k=plan.tx_per_account)
+    )
+    opening = balance = rng.randrange(300000)
+    moves = []
+    for slot, second in stamps:
+        stamp = (starts[slot] + second, f"{prefixes[slot]}{second // 60:02d}:{second % 60:02d}+00")
+        if rng.random() < 0.55:
+            cents = rng.choices(WITHDRAWAL_CENTS, cum_weights=WITHDRAWAL_CUM_WEIGHTS)[0]
+            if cents <= balance:
+                balance -= cents
+                moves.append((*stamp, False, cents))
+                continue
+        cents = min(max(int(rng.lognormvariate(5.0, 0.9) * 100), 100), 1000000)
+        balance += cents
+        moves.append((*stamp, True, cents))
+    return opening, balance, moves
+
+
+def _daily_rows(account_id: int, opening: int, moves) -> Iterator[str]:
+    # tbl_balance_daily lines for one account, folded per UTC day like the online path.
+    current, balance = None, opening
+    for ts, _, is_deposit, cents in moves:
+        day = ts // DAY
+        if day != current:
+            if current is not None:
+                yield _daily_line(account_id, current, day_open, balance, counts)
+            current, day_open, counts = day, balance, [0, 0, 0, 0]
+        balance += cents if is_deposit else -cents
+        slot = 0 if is_deposit else 2
+        counts[slot] += 1
+        counts[slot + 1] += cents
+    if current is not None:
+        yield _daily_line(account_id, current, day_open, balance, counts)
+
+
+@functools.lru_cache(maxsize=4096)
+def _day_text(day: int) -> str:
+    return datetime.fromtimestamp(day * DAY, timezone.utc).date().isoformat()
+
+
+def _daily_line(account_id: int, day: int, opening: int, closing: int, counts: List[int]) -> str:
+    return (
+        f"{account_id}\t{_day_text(day)}\t{_cents(opening)}\t{_cents(closing)}\t"
+        f"{counts[0]}\t{_cents(counts[1])}\t{counts[2]}\t{_cents(counts[3])}\n"
+    )
+
+
+def generate_chunk(plan: Plan, first: int, count: int) -> Dict[str, io.StringIO]:
+    """
+    Build COPY text for accounts first .. first + count - 1 of the plan.
+
+    The output only depends on the plan and the indices, so a chunk can be
+    regenerated identically by any worker.
+
+    Args:
+        plan (Plan): Id bases and generation parameters.
+        first (int): Index of the first account in the chunk.
+        count (int): Number of accounts.
+
+    Returns:
+        Dict[str, io.StringIO]: Tab-separated rows per table, in load order.
+    """
+    rng = random.Random(plan.seed * 1_000_003 + first)
+    slots = _hour_slots(plan.end, plan.days)
+    pool = len(plan.pin_hashes)
+    out = {name: io.StringIO() for name in (*TABLES, "tbl_balance_daily")}
+    for index in range(first, first + count):
+        customer_id = plan.customer_base + index
+        account_id = plan.account_base + index
+        card_id = plan.card_base + index
+        network, bin_ = NETWORKS[card_id % len(NETWORKS)]
+        opening, closing, moves = _account_history(rng, plan, slots)
+        out["tbl_customers"].write(f"{customer_id}\tSynthetic Customer {customer_id}\n")
+        out["tbl_accounts"].write(f"{account_id}\t{customer_id}\t{_cents(closing)}\n")
+        out["tbl_cards"].write(
+            f"{card_id}\t{customer_id}\tSYN_{card_id}\t{bin_}\t{card_id % 10000:04d}\t{network}\t"
+            f"{plan.pin_hashes[card_id % pool]}\n"
+        )
+        tx_id = plan.tx_base + index * plan.tx_per_account
+        lines = out["tbl_transactions"]
+        for offset, (_, stamp, is_deposit, cents) in enumerate(moves):
+            lines.write(
+                f"{tx_id + offset}\t{account_id}\t{'deposit' if is_deposit else 'withdrawal'}\t{_cents(cents)}\t"
+                f"syn-{tx_id + offset}\t{stamp}\n"
+            )
+        if plan.snapshots:
+            out["tbl_balance_daily"].writelines(_daily_rows(account_id, opening, moves))
+    return out
+
+
+_COPY_COLUMNS = {
+    "tbl_customers": "id, full_name",
+    "tbl_accounts": "id, customer_id, balance",
+    "tbl_cards": "id, customer_id, token, bin, last4, network, pin_hash",
+    "tbl_transactions": "id, account_id, type, amount, idempotency_key, created_at",
+    "tbl_balance_daily": (
+        "account_id, day, opening_balance, closing_balance, deposit_count, deposit_total, "
+        "withdrawal_count, withdrawal_total"
+    ),
+}
+
+
+def _load_chunk(task: Tuple[Plan, int, int]) -> Tuple[int, int]:
+    # Generate and COPY one chunk in its own transaction; returns (accounts, transactions).
+    from .base import SessionLocal
+
+    plan, first, count = task
+    data = generate_chunk(plan, first, count)
+    with SessionLocal() as db:
+        db.execute(text("SET LOCAL synchronous_commit = off"))
+        cursor = db.connection().connection.cursor()
+        try:
+            for table, buffer in data.items():
+                buffer.seek(0)
+                cursor.copy_expert(f"COPY {table} ({_COPY_COLUMNS[table]}) FROM STDIN", buffer)
+        finally:
+            cursor.close()
+        db.commit()
+    return count, count * plan.tx_per_account
+
+
+def reserve_ids(counts: Dict[str, int]) -> Dict[str, int]:
+    """
+    Reserve a block of ids in each table's sequence and return the first id of each.
+
+    The tables are locked against inserts for the duration, so no concurrent
+    writer can draw an id inside a block; the workers then use explicit ids.
+
+    Args:
+        counts (Dict[str, int]): Rows to reserve per table name.
+
+    Returns:
+        Dict[str, int]: First reserved id per table name.
+    """
+    from .base import engine
+
+    firsts = {}
+    with engine.begin() as conn:
+        conn.execute(text(f"LOCK TABLE {', '.join(counts)} IN EXCLUSIVE MODE"))
+        for table, count in counts.items():
+            sequence = conn.execute(text("SELECT pg_get_serial_sequence(:t, 'id')"), {"t": table}).scalar_one()
+            first = conn.execute(
+                text(f"SELECT greatest(nextval(:s), (SELECT coalesce(max(id), 0) + 1 FROM {table}))"), {"s": sequence}
+            ).scalar_one()
+            conn.execute(text("SELECT setval(:s, :last)"), {"s": sequence, "last": first + max(count, 1) - 1})
+            firsts[table] = first
+    return firsts
+
+
+def generate(
+    cards: int,
+    tx_per_account: int,
+    days: int = 365,
+    workers: int = 1,
+    chunk_size: int = 1000,
+    pin_pool: int = 8,
+    seed: int = 1,
+    snapshots: bool = True,
+) -> "SweepReport":
+    """
+    Load cards customers, each with one account and one card, plus tx_per_account transactions per account.
+
+    Transactions fall in the last days days with a diurnal, weekly and payday
+    pattern. Cards share pin_pool PIN hashes (bcrypt runs pin_pool times, not
+    once per card); see pin_for. Chunks of chunk_size accounts are generated
+    and copied by workers processes, one transaction per chunk.
+
+    Args:
+        cards (int): Customers, accounts and cards to create.
+        tx_per_account (int): Transactions per account.
+        days (int): Length of the history window ending now.
+        workers (int): Loader processes.
+        chunk_size (int): Accounts per transaction.
+        pin_pool (int): Distinct PINs (and bcrypt hashes) shared by the cards.
+        seed (int): Random seed; the same seed and ids give the same data.
+        snapshots (bool): Also load tbl_balance_daily rows.
+
+    Returns:
+        SweepReport: Transactions loaded and time taken.
+    """
+    from ..security.hashing import hash_pin
+    from .base import engine
+    from .sweeper import SweepReport
+
+    started = time.perf_counter()
+    orm.Base.metadata.create_all(bind=engine)
+    firsts = reserve_ids({**{t: cards for t in TABLES[:3]}, "tbl_transactions": cards * tx_per_account})
+    plan = Plan(
+        customer_base=firsts["tbl_customers"],
+        account_base=firsts["tbl_accounts"],
+        card_base=firsts["tbl_cards"],
+        tx_base=firsts["tbl_transactions"],
+        tx_per_account=tx_per_account,
+        end=int(time.time()) // DAY * DAY,
+        days=days,
+        seed=seed,
+        pin_hashes=tuple(hash_pin(pin_for(n, pin_pool)) for n in range(pin_pool)),
+        snapshots=snapshots,
+    )
+    tasks = [(plan, first, min(chunk_size, cards - first)) for first in range(0, cards, chunk_size)]
+    loaded = 0
+    if workers > 1:
+        with multiprocessing.Pool(workers, initializer=_reset_pool) as pool:
+            for accounts, transactions in pool.imap_unordered(_load_chunk, tasks):
+                loaded += transactions
+                logger.info("Loaded %d transactions", loaded)
+    else:
+        for task in tasks:
+            loaded += _load_chunk(task)[1]
+            logger.info("Loaded %d transactions", loaded)
+    with engine.connect() as conn:
+        conn.execute(text(f"ANALYZE {', '.join((*TABLES, 'tbl_balance_daily'))}"))
+    report = SweepReport(task="synthetic", rows=loaded, seconds=time.perf_counter() - started)
+    logger.info("Loaded cards SYN_%d to SYN_%d", plan.card_base, plan.card_base + cards - 1)
+    return report
+
+
+def _reset_pool() -> None:
+    # A forked worker must not reuse the parent's pooled connections.
+    from .base import engine
+
+    engine.dispose(close=False)
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Load synthetic customers, cards and transaction history.")
+    parser.add_argument("--cards", type=int, default=10000, help="customers, each with one account and card")
+    parser.add_argument("--transactions", type=int, default=100, help="transactions per account")
+    parser.add_argument("--days", type=int, default=365, help="history window ending today")
+    parser.add_argument("--workers", type=int, default=multiprocessing.cpu_count(), help="loader processes")
+    parser.add_argument("--chunk-size", type=int, default=1000, help="accounts per transaction")
+    parser.add_argument("--pin-pool", type=int, default=8, help="distinct PINs shared by the cards")
+    parser.add_argument("--seed", type=int, default=1)
+    parser.add_argument("--skip-snapshots", action="store_true", help="do not load tbl_balance_daily")
+    args = parser.parse_args()
+
+    report = generate(
+        args.cards,
+        args.transactions,
+        args.days,
+        args.workers,
+        args.chunk_size,
+        args.pin_pool,
+        args.seed,
+        not args.skip_snapshots,
+    )
+    print(f"{report.task:<18} {report.rows:>10} rows  {report.seconds:8.2f}s  {report.rows_per_sec:10.0f} rows/s")
+    print(f"card SYN_<id> has PIN 1000 + id % {args.pin_pool}")
+
+
+if __name__ == "__main__":
+    main()
@@ -1,15 +1,21 @@
 # Dependency definitions for FastAPI routes.
 
 from datetime import datetime, timezone
-from typing import Generator
+from typing import AsyncGenerator, Generator
 
-from fastapi import Depends, HTTPException, Request, status
+from fastapi import Depends, HTTPException, Request, Response, status
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.orm import Session
 
+from .cache.sessions import get_session_cache
 from .config import get_settings
-from .db.base import get_db
+from .db.base import get_async_db, get_async_replica_db, get_db, get_replica_db
+from .db.routing import pin_to_primary, reads_pinned, replica_configured
 from .db import models as orm
+from .domain.session import SessionInfo
 from .security.tokens import hash_token
+from .services.activity import get_activity_tracker
 
 
 def get_session_db() -> Generator[Session, None, None]:
@@ -17,25 +23,104 @@ def get_session_db() -> Generator[Session, None, None]:
     yield from get_db()
 
 
-def require_session(
-    request: Request,
-    db: Session = Depends(get_session_db),
-) -> orm.Session:
-    # Ensure the request has a valid session cookie.
+async def get_async_session_db() -> AsyncGenerator[AsyncSession, None]:
+    # Yield an async database session for dependency injection.
+    async for db in get_async_db():
+        yield db
+
+
+def get_read_session_db(request: Request) -> Generator[Session, None, None]:
+    # Yield a replica session for read-only routes, or a primary one inside the client's read-your-writes window.
+    yield from (get_db() if reads_pinned(request) else get_replica_db())
+
+
+async def get_async_read_session_db(request: Request) -> AsyncGenerator[AsyncSession, None]:
+    # Async variant of get_read_session_db.
+    async for db in (get_async_db() if reads_pinned(request) else get_async_replica_db()):
+        yield db
+
+
+def pin_reads_to_primary(response: Response) -> None:
+    # For mutating routes: the client's next reads go to the primary so they see this write.
+    if replica_configured():
+        pin_to_primary(response)
+
+
+def _session_cookie(request: Request) -> str:
+    # Return the raw session token from the request cookie.
     raw_token = request.cookies.get("atm_sess")
     if not raw_token:
         raise HTTPException(status_code=status.HTTP_401_UNAUTHORIZED, detail="Not authenticated")
-    token_hash = hash_token(raw_token)
-    session_obj: orm.Session | None = (
-        db.query(orm.Session)
-        .filter(
-            orm.Session.token_hash == token_hash,
-            orm.Session.revoked_at.is_(None),
+    return raw_token
+
+
+def _load_session(db: Session, token_hash: str) -> SessionInfo | None:
+    # Resolve session -> card -> account in a single round trip.
+    row = db.execute(
+        select(
+            orm.Session.id,
+            orm.Session.card_id,
+            orm.Session.token_hash,
+            orm.Session.expires_at,
+            orm.Session.revoked_at,
+            orm.Account.id,
         )
-        .first()
+        .join(orm.Card, orm.Card.id == orm.Session.card_id)
+        .outerjoin(orm.Account, orm.Account.customer_id == orm.Card.customer_id)
+        .where(orm.Session.token_hash == token_hash)
+        .order_by(orm.Account.id)
+        .limit(1)
+    ).first()
+    if not row:
+        return None
+    session_id, card_id, row_token_hash, expires_at, revoked_at, account_id = row
+    return SessionInfo(
+        id=session_id,
+        card_id=card_id,
+        token_hash=row_token_hash,
+        expires_at=expires_at,
+        revoked_at=revoked_at,
+        account_id=account_id,
     )
-    now = datetime.now(timezone.utc)
-    if not session_obj or session_obj.expires_at <= now:
+
+
+def _check_session(info: SessionInfo | None, now: datetime) -> SessionInfo:
+    # Reject missing, revoked or expired sessions and record activity for live ones.
+    if not info or not info.is_active(now):
         raise HTTPException(status_code=status.HTTP_401_UNAUTHORIZED, detail="Session expired")
-    session_obj.last_activity_at = now
-    return session_obj
\ No newline at end of file
+    get_activity_tracker().record(info.id, now)
+    return info
+
+
+def require_session(
+    request: Request,
+    db: Session = Depends(get_session_db),
+) -> SessionInfo:
+    # Ensure the request has a valid session cookie; cached sessions skip the DB entirely.
+    token_hash = hash_token(_session_cookie(request))
+    now = datetime.now(timezone.utc)
+    cache = get_session_cache()
+    info = cache.get(token_hash)
+    if info is None:
+        ticket = cache.ticket()
+        info = _load_session(db, token_hash)
+        if info is not None:
+            cache.fill(info, now, ticket)
+    return _check_session(info, now)
+
+
+async def require_session_async(
+    request: Request,
+    db: AsyncSession = Depends(get_async_session_db),
+) -> SessionInfo:
+    # Async variant of require_session; a cache miss runs the lookup on the AsyncSession's connection.
+    token_hash = hash_token(_session_cookie(request))
+    now = datetime.now(timezone.utc)
+    cache = get_session_cache()
+    info = cache.get(token_hash)
+    if info is None:
+        ticket = cache.ticket()
+        info = await db.run_sync(_load_session, token_hash)
+        if info is not None:
+            cache.fill(info, now, ticket)
+    return _check_session(info, now)
@@ -8,4 +8,16 @@ class InsufficientFundsError(Exception):
 
 class IdempotencyConflictError(Exception):
     # Raised when a conflicting idempotency key is detected.
-    pass
\ No newline at end of file
+    pass
+
+
+class PinHasherBusyError(Exception):
+    # Raised when the PIN hashing pool has no free worker or queue slot.
+    pass
+
+
+class LoginRateLimitedError(Exception):
+    # Raised when too many failed logins came from one client IP or for one card.
+    def __init__(self, retry_after: float) -> None:
+        super().__init__("Too many login attempts")
+        self.retry_after = retry_after
@@ -1,6 +1,6 @@
-from datetime import datetime
+from datetime import date, datetime
 from decimal import Decimal, ROUND_HALF_UP
-from typing import List, Optional
+from typing import List, Literal, Optional
 
 from pydantic import BaseModel, Field, field_validator, model_validator, ConfigDict
 
@@ -41,6 +41,7 @@ class TransactionItem(BaseModel):
 
 class TransactionsResponse(BaseModel):
     items: List[TransactionItem]
+    nextCursor: Optional[str] = None
 
 
 class MoneyMutationRequest(BaseModel):
@@ -57,3 +58,61 @@ class MoneyMutationRequest(BaseModel):
 
 class MoneyMutationResponse(BaseModel):
     balance: Decimal
+
+
+class BatchOperation(MoneyMutationRequest):
+    type: Literal["deposit", "withdraw"]
+
+
+class BatchMutationRequest(BaseModel):
+    # all_or_nothing: any failing operation rolls back the whole batch.
+    # best_effort: failing operations are reported as rejected and the rest still apply.
+    operations: List[BatchOperation] = Field(..., min_length=1)
+    mode: Literal["all_or_nothing", "best_effort"] = "all_or_nothing"
+
+    @model_validator(mode="after")
+    def _keys_are_unique(self) -> "BatchMutationRequest":
+        keys = [op.idempotencyKey for op in self.operations]
+        if len(set(keys)) != len(keys):
+            raise ValueError("Idempotency keys must be unique within a batch")
+        return self
+
+
+class BatchItemResult(BaseModel):
+    idempotencyKey: str
+    # applied: moved the balance now; replayed: answered from an earlier request; rejected: best_effort failure.
+    status: Literal["applied", "replayed", "rejected"]
+    balance: Optional[Decimal] = None
+    error: Optional[str] = None
+
+
+class BatchMutationResponse(BaseModel):
+    balance: Decimal
+    results: List[BatchItemResult]
+
+
+class BalanceAsOfResponse(BaseModel):
+    asOf: date
+    balance: Decimal
+
+
+class DailyBalanceItem(BaseModel):
+    day: date
+    openingBalance: Decimal
+    closingBalance: Decimal
+    depositCount: int
+    depositTotal: Decimal
+    withdrawalCount: int
+    withdrawalTotal: Decimal
+
+
+class AccountSummaryResponse(BaseModel):
+    start: date
+    end: date
+    openingBalance: Decimal
+    closingBalance: Decimal
+    depositCount: int
+    depositTotal: Decimal
+    withdrawalCount: int
+    withdrawalTotal: Decimal
+    days: List[DailyBalanceItem]
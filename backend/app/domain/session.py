@@ -0,0 +1,20 @@
+from dataclasses import dataclass
+from datetime import datetime
+from typing import Optional
+
+# Lightweight view of an authenticated session, safe to cache between requests.
+
+
+@dataclass(frozen=True)
+class SessionInfo:
+    id: int
+    card_id: int
+    token_hash: str
+    expires_at: datetime
+    revoked_at: Optional[datetime] = None
+    # Resolved alongside the session so handlers need no Card -> Account lookups.
+    account_id: Optional[int] = None
+
+    def is_active(self, now: datetime) -> bool:
+        # A session is usable until it is revoked or reaches its expiry.
+        return self.revoked_at is None and self.expires_at > now
@@ -1,3 +1,5 @@
+from contextlib import asynccontextmanager
+
 from fastapi import FastAPI
 from fastapi.middleware.cors import CORSMiddleware
 
@@ -5,10 +7,53 @@ from .config import get_settings
 from .api import routes_auth, routes_accounts, routes_transactions
 
 
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    # Start background workers and release process-wide resources on shutdown.
+    from .cache.balances import get_balance_cache
+    from .cache.invalidation import ACCOUNT, SESSION, get_invalidation_bus
+    from .cache.sessions import get_session_cache
+    from .db.base import async_engine, async_replica_engine
+    from .db.sweeper import Sweeper
+    from .security.pin_pool import shutdown_pin_pool
+    from .services.activity import get_activity_tracker
+    from .services.audit import get_audit_logger
+
+    settings = get_settings()
+    sweeper = Sweeper(settings.sweep_interval_sec, settings.sweep_batch_size, settings.sweep_pause_sec)
+    get_activity_tracker().start()
+    get_audit_logger().start()
+    sweeper.start()
+    bus = get_invalidation_bus()
+    if settings.cache_invalidation:
+        sessions = get_session_cache()
+        bus.subscribe(SESSION, sessions.invalidate, sessions.clear)
+        balances = get_balance_cache()
+        bus.subscribe(ACCOUNT, balances.evict, balances.clear)
+        bus.start()
+    yield
+    bus.stop()
+    sweeper.stop()
+    get_activity_tracker().stop()
+    get_audit_logger().stop()
+    shutdown_pin_pool()
+    for db_engine in (async_engine, async_replica_engine):
+        if db_engine is not None:
+            await db_engine.dispose()
+
+
 def create_app() -> FastAPI:
     # Create and configure the FastAPI application.
     settings = get_settings()
-    app = FastAPI(title="ATM API")
+    app = FastAPI(title="ATM API", lifespan=lifespan)
+    if settings.metrics_enabled:
+        from .api import routes_metrics
+        from .metrics.middleware import MetricsMiddleware
+        from .metrics.runtime import register_runtime_metrics
+
+        register_runtime_metrics()
+        app.add_middleware(MetricsMiddleware)
+        app.include_router(routes_metrics.router)
     app.add_middleware(
         CORSMiddleware,
         allow_origins=[settings.cors_origin],
@@ -16,10 +61,15 @@ def create_app() -> FastAPI:
         allow_methods=["*"],
         allow_headers=["*"],
     )
+    if settings.db_async:
+        # Registered first so the async handlers shadow their sync counterparts.
+        from .api import routes_async
+
+        app.include_router(routes_async.router)
     app.include_router(routes_auth.router)
     app.include_router(routes_accounts.router)
     app.include_router(routes_transactions.router)
     return app
 
 
-app = create_app()
\ No newline at end of file
+app = create_app()
@@ -0,0 +1 @@
+# Prometheus-style metrics collected in process and served on /metrics.
@@ -0,0 +1,195 @@
+# SQLAlchemy instrumentation: statements and latency per route, pool checkout wait and saturation.
+
+import logging
+import re
+import time
+from contextvars import ContextVar, Token
+from typing import Any, Dict, MutableMapping, Optional, Tuple
+
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
+from sqlalchemy.pool import AsyncAdaptedQueuePool, Pool, QueuePool
+
+from .registry import REGISTRY, Counter, Gauge, Histogram
+
+logger = logging.getLogger(__name__)
+
+BACKGROUND = "background"
+
+STATEMENTS = REGISTRY.register(
+    Counter("atm_db_statements_total", "SQL statements executed, by route.", ["route"])
+)
+STATEMENT_SECONDS = REGISTRY.register(
+    Histogram(
+        "atm_db_statement_duration_seconds",
+        "SQL statement execution time, by route.",
+        buckets=(0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5),
+        labelnames=["route"],
+    )
+)
+STATEMENTS_PER_REQUEST = REGISTRY.register(
+    Histogram(
+        "atm_db_statements_per_request",
+        "SQL statements issued while serving one request, by route.",
+        buckets=(0, 1, 2, 3, 4, 6, 8, 12, 16, 24, 32),
+        labelnames=["route"],
+    )
+)
+SLOW_STATEMENTS = REGISTRY.register(
+    Counter("atm_db_slow_statements_total", "Statements slower than DB_SLOW_STATEMENT_MS, by route.", ["route"])
+)
+CHECKOUT_WAIT = REGISTRY.register(
+    Histogram(
+        "atm_db_pool_checkout_wait_seconds",
+        "Time spent waiting for a pooled connection, including opening new ones.",
+        buckets=(0.0001, 0.0005, 0.001, 0.005, 0.01, 0.05, 0.1, 0.5, 1.0, 5.0, 30.0),
+        labelnames=["pool"],
+    )
+)
+
+
+class RequestQueries:
+    """Statements issued on behalf of one HTTP request.
+
+    The route is read from the ASGI scope lazily: routing runs before any
+    dependency or handler touches the database, so it is known by the time a
+    statement is attributed.
+    """
+
+    __slots__ = ("scope", "statements")
+
+    def __init__(self, scope: MutableMapping[str, Any]) -> None:
+        self.scope = scope
+        self.statements = 0
+
+    @property
+    def route(self) -> str:
+        route = self.scope.get("route")
+        return getattr(route, "path", "unmatched")
+
+
+_current: ContextVar[Optional[RequestQueries]] = ContextVar("atm_request_queries", default=None)
+
+
+def start_request(scope: MutableMapping[str, Any]) -> Tuple[RequestQueries, Token]:
+    # Begin attributing statements to the request described by scope.
+    queries = RequestQueries(scope)
+    return queries, _current.set(queries)
+
+
+def end_request(queries: RequestQueries, token: Token) -> None:
+    # Stop attributing statements and record the request's statement count.
+    _current.reset(token)
+    STATEMENTS_PER_REQUEST.observe(queries.statements, queries.route)
+
+
+_STRING = re.compile(r"'(?:[^']|'')*'")
+_PARAM = re.compile(r"%\(\w+\)s|%s|\$\d+|(?<!:):\w+")
+_NUMBER = re.compile(r"\b\d+(?:\.\d+)?\b")
+_SPACE = re.compile(r"\s+")
+_REPEATED = re.compile(r"(\((?:\?, )*\?\))(?:, \1)+")
+
+
+def normalize_sql(statement: str) -> str:
+    """Collapse a statement to its shape: literals and parameters become ?, whitespace and repeated tuples fold."""
+    text = _STRING.sub("?", statement)
+    text = _PARAM.sub("?", text)
+    text = _NUMBER.sub("?", text)
+    text = _SPACE.sub(" ", text).strip()
+    return _REPEATED.sub(r"\1, ...", text)
+
+
+def instrument_engine(engine: Engine, slow_statement_ms: float) -> None:
+    """
+    Time every statement on engine and attribute it to the current route.
+
+    Statements run outside a request (background flushers, the sweeper) are
+    labelled "background". Statements slower than slow_statement_ms are logged
+    with their normalized SQL.
+
+    Args:
+        engine (Engine): Sync engine to instrument (for async engines pass .sync_engine).
+        slow_statement_ms (float): Slow-statement threshold in milliseconds.
+    """
+    slow_sec = slow_statement_ms / 1000
+
+    @event.listens_for(engine, "before_cursor_execute")
+    def _before(conn, cursor, statement, parameters, context, executemany):
+        conn.info.setdefault("atm_statement_started", []).append(time.perf_counter())
+
+    @event.listens_for(engine, "after_cursor_execute")
+    def _after(conn, cursor, statement, parameters, context, executemany):
+        elapsed = time.perf_counter() - conn.info["atm_statement_started"].pop()
+        queries = _current.get()
+        route = queries.route if queries is not None else BACKGROUND
+        if queries is not None:
+            queries.statements += 1
+        STATEMENTS.inc(route)
+        STATEMENT_SECONDS.observe(elapsed, route)
+        if elapsed >= slow_sec:
+            SLOW_STATEMENTS.inc(route)
+            logger.warning("Slow statement (%.1f ms) on %s: %s", elapsed * 1000, route, normalize_sql(statement))
+
+    @event.listens_for(engine, "handle_error")
+    def _failed(context):
+        # A failed statement never reaches after_cursor_execute; drop its start time.
+        conn = context.connection
+        if conn is not None and conn.info.get("atm_statement_started"):
+            conn.info["atm_statement_started"].pop()
+
+
+class _TimedCheckout:
+    # Mixin timing how long checkouts wait for a connection.
+    metrics_name = "primary"
+
+    def _do_get(self):
+        started = time.perf_counter()
+        try:
+            return super()._do_get()
+        finally:
+            CHECKOUT_WAIT.observe(time.perf_counter() - started, self.metrics_name)
+
+
+class TimedQueuePool(_TimedCheckout, QueuePool):
+    pass
+
+
+class TimedAsyncAdaptedQueuePool(_TimedCheckout, AsyncAdaptedQueuePool):
+    metrics_name = "async"
+
+
+class TimedReplicaQueuePool(TimedQueuePool):
+    metrics_name = "replica"
+
+
+class TimedAsyncReplicaQueuePool(TimedAsyncAdaptedQueuePool):
+    metrics_name = "async_replica"
+
+
+_pools: Dict[str, Tuple[Pool, int]] = {}
+
+
+def watch_pool(name: str, pool: Pool, capacity: int) -> None:
+    # Report pool occupancy for a pool that can hold at most capacity connections.
+    _pools[name] = (pool, capacity)
+
+
+def _pool_checked_out() -> Dict[Tuple[str, ...], float]:
+    return {(name,): pool.checkedout() for name, (pool, _) in _pools.items()}
+
+
+def _pool_saturation() -> Dict[Tuple[str, ...], float]:
+    return {(name,): pool.checkedout() / capacity for name, (pool, capacity) in _pools.items() if capacity}
+
+
+REGISTRY.register(
+    Gauge("atm_db_pool_checked_out", "Connections currently checked out of the pool.", _pool_checked_out, ["pool"])
+)
+REGISTRY.register(
+    Gauge(
+        "atm_db_pool_saturation",
+        "Checked-out connections as a fraction of pool_size + max_overflow.",
+        _pool_saturation,
+        ["pool"],
+    )
+)
@@ -0,0 +1,55 @@
+# ASGI middleware recording per-request metrics: latency by route and status, SQL per route, profiling.
+
+import time
+
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+
+from .db import end_request, start_request
+from .profiler import get_profiler
+from .registry import REGISTRY, Histogram
+
+HTTP_LATENCY = REGISTRY.register(
+    Histogram(
+        "atm_http_request_duration_seconds",
+        "Time from request start to the end of the response body, by method, route and status.",
+        buckets=(0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0),
+        labelnames=["method", "route", "status"],
+    )
+)
+
+
+class MetricsMiddleware:
+    """Time each HTTP request and attribute its SQL statements to the route that served it.
+
+    Routes are labelled by their path template, so label cardinality is bounded
+    by the route table. Streamed bodies are included in both the latency and the
+    statement count. When the sampling profiler is running, requests it selects
+    are marked in flight so their stacks are sampled.
+    """
+
+    def __init__(self, app: ASGIApp) -> None:
+        self.app = app
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+        status = "500"
+
+        async def send_with_status(message: Message) -> None:
+            nonlocal status
+            if message["type"] == "http.response.start":
+                status = str(message["status"])
+            await send(message)
+
+        profiler = get_profiler()
+        profiled = profiler.running and profiler.request_started()
+        queries, token = start_request(scope)
+        started = time.perf_counter()
+        try:
+            await self.app(scope, receive, send_with_status)
+        finally:
+            HTTP_LATENCY.observe(time.perf_counter() - started, scope["method"], queries.route, status)
+            end_request(queries, token)
+            if profiled:
+                profiler.request_finished()
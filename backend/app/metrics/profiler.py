@@ -0,0 +1,122 @@
+# On-demand sampling profiler writing collapsed stacks (flamegraph.pl / speedscope input).
+
+import os
+import random
+import sys
+import threading
+import time
+from collections import Counter
+from datetime import datetime, timezone
+from functools import lru_cache
+from typing import Optional
+
+from ..config import get_settings
+
+# Leaf frames in these modules mean the thread is parked, not working.
+_IDLE_MODULES = ("threading.py", "selectors.py", "queue.py")
+
+
+class SamplingProfiler:
+    """Periodically sample every thread's Python stack for a bounded time.
+
+    With sample_rate 1.0 every sample is kept. With a lower rate, only that
+    fraction of requests is selected, and samples are only taken while at least
+    one selected request is in flight. Idle threads are skipped. When the run
+    ends the counts are written as "frame;frame;frame count" lines, root first.
+    """
+
+    def __init__(self, interval_sec: float, output_dir: str) -> None:
+        self.interval_sec = interval_sec
+        self.output_dir = output_dir
+        self.sample_rate = 1.0
+        self.running = False
+        self._in_flight = 0
+        self._lock = threading.Lock()
+        self._thread: Optional[threading.Thread] = None
+        self.last_output: Optional[str] = None
+
+    def start(self, duration_sec: float, sample_rate: float = 1.0) -> str:
+        """
+        Start sampling for duration_sec and return the path the profile will be written to.
+
+        Args:
+            duration_sec (float): How long to sample.
+            sample_rate (float): Fraction of requests to profile, in (0, 1].
+
+        Returns:
+            str: Output file path, written when the run ends.
+
+        Raises:
+            RuntimeError: If a run is already in progress.
+        """
+        with self._lock:
+            if self.running:
+                raise RuntimeError("Profiler already running")
+            stamp = datetime.now(timezone.utc).strftime("%Y%m%dT%H%M%SZ")
+            path = os.path.join(self.output_dir, f"profile-{os.getpid()}-{stamp}.collapsed")
+            self.sample_rate = sample_rate
+            self._in_flight = 0
+            self.running = True
+            self._thread = threading.Thread(
+                target=self._run, args=(duration_sec, path), name="sampling-profiler", daemon=True
+            )
+            self._thread.start()
+            return path
+
+    def request_started(self) -> bool:
+        # Decide whether this request is profiled; if so it counts as in flight until request_finished.
+        if self.sample_rate < 1.0 and random.random() >= self.sample_rate:
+            return False
+        with self._lock:
+            self._in_flight += 1
+        return True
+
+    def request_finished(self) -> None:
+        with self._lock:
+            self._in_flight = max(0, self._in_flight - 1)
+
+    def _run(self, duration_sec: float, path: str) -> None:
+        stacks: Counter = Counter()
+        own_id = threading.get_ident()
+        deadline = time.monotonic() + duration_sec
+        try:
+            while time.monotonic() < deadline:
+                time.sleep(self.interval_sec)
+                if self.sample_rate >= 1.0 or self._in_flight:
+                    self._sample(stacks, own_id)
+        finally:
+            with self._lock:
+                self.running = False
+            self._write(stacks, path)
+
+    @staticmethod
+    def _sample(stacks: Counter, own_id: int) -> None:
+        for thread_id, frame in sys._current_frames().items():
+            if thread_id == own_id or frame.f_code.co_filename.endswith(_IDLE_MODULES):
+                continue
+            names = []
+            while frame is not None:
+                code = frame.f_code
+                names.append(f"{code.co_name} ({os.path.basename(code.co_filename)}:{code.co_firstlineno})")
+                frame = frame.f_back
+            stacks[";".join(reversed(names))] += 1
+
+    def _write(self, stacks: Counter, path: str) -> None:
+        os.makedirs(self.output_dir, exist_ok=True)
+        with open(path, "w", encoding="utf-8") as out:
+            for stack, count in stacks.most_common():
+                out.write(f"{stack} {count}\n")
+        self.last_output = path
+
+    def join(self, timeout: Optional[float] = None) -> None:
+        # Wait for the current run to finish and its file to be written.
+        thread = self._thread
+        if thread is not None:
+            thread.join(timeout)
+
+
+@lru_cache
+def get_profiler() -> SamplingProfiler:
+    # Process-wide profiler configured from settings.
+    settings = get_settings()
+    return SamplingProfiler(interval_sec=settings.profile_interval_ms / 1000, output_dir=settings.profile_dir)
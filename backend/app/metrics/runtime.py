@@ -0,0 +1,60 @@
+# Gauges exporting the in-process caches' and background writers' own counters.
+
+from typing import Callable, Dict, Tuple
+
+from .registry import REGISTRY, Gauge
+
+
+def _stats_gauge(name: str, help: str, read: Callable[[], Dict[str, float]]) -> None:
+    def collect() -> Dict[Tuple[str, ...], float]:
+        return {(stat,): float(value) for stat, value in read().items()}
+
+    REGISTRY.register(Gauge(name, help, collect, ["stat"]))
+
+
+def _session_cache() -> Dict[str, float]:
+    from ..cache.sessions import get_session_cache
+
+    return get_session_cache().stats()
+
+
+def _balance_cache() -> Dict[str, float]:
+    from ..cache.balances import get_balance_cache
+
+    return get_balance_cache().stats()
+
+
+def _idempotency() -> Dict[str, float]:
+    from ..services.idempotency import get_idempotency_store
+
+    return get_idempotency_store().stats()
+
+
+def _activity() -> Dict[str, float]:
+    from ..services.activity import get_activity_tracker
+
+    tracker = get_activity_tracker()
+    return {"pending": tracker.pending(), "flushed": tracker.flushed}
+
+
+def _audit() -> Dict[str, float]:
+    from ..services.audit import get_audit_logger
+
+    return get_audit_logger().stats()
+
+
+def _coalescer() -> Dict[str, float]:
+    from ..services.coalescer import get_async_mutation_coalescer, get_mutation_coalescer
+
+    sync, async_ = get_mutation_coalescer().stats(), get_async_mutation_coalescer().stats()
+    return {stat: sync[stat] + async_[stat] for stat in sync}
+
+
+def register_runtime_metrics() -> None:
+    # Idempotent; called from create_app.
+    _stats_gauge("atm_session_cache", "Session cache size and hit/miss/eviction counters.", _session_cache)
+    _stats_gauge("atm_balance_cache", "Balance cache size and hit/miss/expiration counters.", _balance_cache)
+    _stats_gauge("atm_idempotency_store", "Idempotency response cache counters.", _idempotency)
+    _stats_gauge("atm_activity_writer", "Session activity write-behind counters.", _activity)
+    _stats_gauge("atm_audit_writer", "Audit log queue counters.", _audit)
+    _stats_gauge("atm_mutation_coalescer", "Coalesced mutation batches and operations.", _coalescer)
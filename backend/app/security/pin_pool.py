@@ -0,0 +1,89 @@
+# Bounded process pool for bcrypt PIN verification.
+
+import asyncio
+import multiprocessing
+import os
+import threading
+from concurrent.futures import Future, ProcessPoolExecutor
+from typing import Callable, Optional
+
+from ..config import get_settings
+from ..domain.errors import PinHasherBusyError
+from .hashing import verify_pin
+
+
+class PinHasherPool:
+    """Run bcrypt on worker processes so login throughput scales with cores.
+
+    At most max_workers + max_pending jobs are admitted at once; anything beyond
+    that is rejected immediately with PinHasherBusyError instead of queueing.
+    """
+
+    def __init__(self, max_workers: int, max_pending: int) -> None:
+        self.max_workers = max_workers
+        self._slots = threading.BoundedSemaphore(max_workers + max_pending)
+        self._lock = threading.Lock()
+        self._executor: Optional[ProcessPoolExecutor] = None
+
+    def _get_executor(self) -> ProcessPoolExecutor:
+        # Start workers lazily; spawn avoids forking a process that holds DB sockets and threads.
+        with self._lock:
+            if self._executor is None:
+                self._executor = ProcessPoolExecutor(
+                    max_workers=self.max_workers,
+                    mp_context=multiprocessing.get_context("spawn"),
+                )
+            return self._executor
+
+    def _submit(self, fn: Callable, *args) -> Future:
+        # Admit a job if a slot is free, otherwise fail fast.
+        if not self._slots.acquire(blocking=False):
+            raise PinHasherBusyError("PIN verification is busy, retry shortly")
+        try:
+            future = self._get_executor().submit(fn, *args)
+        except Exception:
+            self._slots.release()
+            raise
+        future.add_done_callback(lambda _: self._slots.release())
+        return future
+
+    def verify(self, pin: str, hashed: str) -> bool:
+        # Verify a PIN on the pool, blocking the calling thread until done.
+        return self._submit(verify_pin, pin, hashed).result()
+
+    async def verify_async(self, pin: str, hashed: str) -> bool:
+        # Verify a PIN on the pool without blocking the event loop.
+        return await asyncio.wrap_future(self._submit(verify_pin, pin, hashed))
+
+    def shutdown(self) -> None:
+        # Stop the worker processes, waiting for running jobs.
+        with self._lock:
+            if self._executor is not None:
+                self._executor.shutdown(wait=True, cancel_futures=True)
+                self._executor = None
+
+
+_pool: Optional[PinHasherPool] = None
+_pool_lock = threading.Lock()
+
+
+def get_pin_pool() -> PinHasherPool:
+    # Return the process-wide pool, sized from settings on first use.
+    global _pool
+    with _pool_lock:
+        if _pool is None:
+            settings = get_settings()
+            _pool = PinHasherPool(
+                max_workers=settings.pin_pool_workers or os.cpu_count() or 1,
+                max_pending=settings.pin_pool_max_pending,
+            )
+        return _pool
+
+
+def shutdown_pin_pool() -> None:
+    # Stop the process-wide pool if it was started.
+    global _pool
+    with _pool_lock:
+        if _pool is not None:
+            _pool.shutdown()
+            _pool = None
@@ -0,0 +1,150 @@
+# Login rate limiting keyed by client IP and card token.
+
+import threading
+import time
+from collections import OrderedDict
+from functools import lru_cache
+from typing import Callable, List, Optional, Protocol
+
+from ..config import get_settings
+from ..domain.errors import LoginRateLimitedError
+
+
+class RateLimitBackend(Protocol):
+    """Storage for failure counters. Multi-worker deployments can plug in a shared store."""
+
+    def retry_after(self, key: str) -> Optional[float]:
+        # Seconds until key may try again, or None if it is under the limit.
+        ...
+
+    def hit(self, key: str) -> None:
+        # Count one failed attempt for key.
+        ...
+
+    def reset(self, key: str) -> None:
+        # Forget key's failures.
+        ...
+
+
+class SlidingWindowRateLimiter:
+    """In-memory sliding-window counter with O(1) checks and a bounded key set.
+
+    Each key keeps two counters: failures in the current fixed window and in the
+    previous one. The previous window is weighted by how much of it still overlaps
+    the sliding window, which approximates a true sliding log without storing a
+    timestamp per attempt. At most max_keys keys are tracked; the least recently
+    failed key is forgotten first.
+    """
+
+    def __init__(
+        self,
+        max_attempts: int,
+        window_sec: float,
+        max_keys: int,
+        clock: Callable[[], float] = time.monotonic,
+    ) -> None:
+        self.max_attempts = max_attempts
+        self.window_sec = window_sec
+        self.max_keys = max_keys
+        self._clock = clock
+        # key -> [window start, failures in previous window, failures in current window]
+        self._data: "OrderedDict[str, List[float]]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    def _roll(self, entry: List[float], window_start: float) -> None:
+        # Shift an entry's counters so that entry[0] is the current window.
+        if entry[0] == window_start:
+            return
+        entry[1] = entry[2] if entry[0] == window_start - self.window_sec else 0
+        entry[2] = 0
+        entry[0] = window_start
+
+    def retry_after(self, key: str) -> Optional[float]:
+        now = self._clock()
+        window_start = now - now % self.window_sec
+        with self._lock:
+            entry = self._data.get(key)
+            if entry is None:
+                return None
+            self._roll(entry, window_start)
+            previous, current = entry[1], entry[2]
+        elapsed = now - window_start
+        if previous * (1 - elapsed / self.window_sec) + current < self.max_attempts:
+            return None
+        # Time until the weighted previous window has decayed enough to admit an attempt.
+        if current < self.max_attempts:
+            return self.window_sec * (1 - (self.max_attempts - current) / previous) - elapsed
+        return self.window_sec - elapsed + self.window_sec * (1 - self.max_attempts / current)
+
+    def hit(self, key: str) -> None:
+        now = self._clock()
+        window_start = now - now % self.window_sec
+        with self._lock:
+            entry = self._data.get(key)
+            if entry is None:
+                entry = self._data[key] = [window_start, 0, 0]
+                if len(self._data) > self.max_keys:
+                    self._data.popitem(last=False)
+            else:
+                self._data.move_to_end(key)
+                self._roll(entry, window_start)
+            entry[2] += 1
+
+    def reset(self, key: str) -> None:
+        with self._lock:
+            self._data.pop(key, None)
+
+    def __len__(self) -> int:
+        with self._lock:
+            return len(self._data)
+
+
+class LoginRateLimiter:
+    """Apply RATE_LIMIT_MAX_ATTEMPTS failures per RATE_LIMIT_WINDOW_SEC per client IP and per card.
+
+    check() runs before the card lookup and bcrypt, so a blocked caller is
+    turned away without touching the database or the PIN hashing pool.
+    """
+
+    def __init__(self, backend: RateLimitBackend) -> None:
+        self.backend = backend
+
+    def use_backend(self, backend: RateLimitBackend) -> None:
+        # Swap the counter store, e.g. for one shared by all workers.
+        self.backend = backend
+
+    @staticmethod
+    def _keys(card_token: str, client_ip: Optional[str]) -> List[str]:
+        keys = [f"card:{card_token}"]
+        if client_ip:
+            keys.append(f"ip:{client_ip}")
+        return keys
+
+    def check(self, card_token: str, client_ip: Optional[str]) -> None:
+        # Raise LoginRateLimitedError if the card or the IP is over the limit.
+        waits = [self.backend.retry_after(key) for key in self._keys(card_token, client_ip)]
+        blocked = [wait for wait in waits if wait is not None]
+        if blocked:
+            raise LoginRateLimitedError(max(blocked))
+
+    def record_failure(self, card_token: str, client_ip: Optional[str]) -> None:
+        # Count a failed login against both the card and the IP.
+        for key in self._keys(card_token, client_ip):
+            self.backend.hit(key)
+
+    def record_success(self, card_token: str) -> None:
+        # A correct PIN clears the card's failures; the IP's failures still count.
+        self.backend.reset(f"card:{card_token}")
+
+
+@lru_cache
+def get_login_limiter() -> LoginRateLimiter:
+    # Process-wide limiter with the in-memory backend configured from settings.
+    settings = get_settings()
+    return LoginRateLimiter(
+        SlidingWindowRateLimiter(
+            max_attempts=settings.rate_limit_max_attempts,
+            window_sec=settings.rate_limit_window_sec,
+            max_keys=settings.rate_limit_max_keys,
+        )
+    )
@@ -1,133 +1,493 @@
 from datetime import datetime, timezone
 from decimal import Decimal
+from typing import Callable, List, Optional
 
+from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.orm import Session
 
+from ..cache import invalidation
+from ..cache.balances import get_balance_cache
+from ..config import get_settings
 from ..db import models as orm
-from sqlalchemy import select
-from ..domain.models import BalanceResponse, MoneyMutationRequest, MoneyMutationResponse
+from ..db.hooks import on_commit
+from ..db.routing import replica_configured
+from ..domain.errors import IdempotencyConflictError
+from ..domain.session import SessionInfo
+from sqlalchemy import delete, func, insert, literal, select, update
+from sqlalchemy.dialects.postgresql import insert as pg_insert
+from ..domain.models import (
+    BalanceResponse,
+    BatchItemResult,
+    BatchMutationRequest,
+    BatchMutationResponse,
+    BatchOperation,
+    MoneyMutationRequest,
+    MoneyMutationResponse,
+)
+from .coalescer import get_async_mutation_coalescer, get_mutation_coalescer
+from .idempotency import IdempotentResult, get_idempotency_store
+from .snapshots import daily_snapshot_fold, daily_snapshot_upsert
 
 
 class AccountService:
     """Handle balance retrieval and money mutations."""
 
-    def _get_account(self, db: Session, session_obj: orm.Session) -> orm.Account:
+    def resolve_account_id(self, session_obj: SessionInfo) -> int:
         """
-        Retrieve the Account for the given session.
+        Return the account id resolved for the session at lookup time.
 
         Args:
-            db (Session): SQLAlchemy session for DB operations.
-            session_obj (orm.Session): Authenticated session ORM object.
+            session_obj (SessionInfo): Authenticated session.
 
         Returns:
-            orm.Account: The associated account.
-        """
-        card = db.query(orm.Card).filter(orm.Card.id == session_obj.card_id).first()
-        if not card:
-            raise ValueError("Invalid session")
-        account = (
-            db.query(orm.Account)
-            .filter(orm.Account.customer_id == card.customer_id)
-            .first()
-        )
-        if not account:
+            int: Id of the account behind the session's card.
+        """
+        if session_obj.account_id is None:
             raise ValueError("Account not found")
-        return account
+        return session_obj.account_id
 
-    def get_balance(self, db: Session, session_obj: orm.Session) -> BalanceResponse:
+    def get_balance(self, db: Session, session_obj: SessionInfo, pinned: bool = False) -> BalanceResponse:
         """
         Return the current account balance for the session's card.
 
+        Served from the balance cache while the entry is younger than
+        BALANCE_CACHE_MAX_STALENESS_SEC, unless the client's reads are pinned
+        to the primary. A balance read from the database is cached only when
+        it came from the primary: a lagging replica could otherwise put back
+        a balance that an invalidation just evicted.
+
         Args:
-            db (Session): SQLAlchemy session for DB operations.
-            session_obj (orm.Session): Authenticated session ORM object.
+            db (Session): SQLAlchemy session for DB operations; the primary when pinned.
+            session_obj (SessionInfo): Authenticated session.
+            pinned (bool): The client is inside its read-your-writes window.
 
         Returns:
             BalanceResponse: DTO containing the account balance.
         """
-        account = self._get_account(db, session_obj)
-        return BalanceResponse(balance=Decimal(account.balance))
+        account_id = self.resolve_account_id(session_obj)
+        cache = get_balance_cache()
+        if cache.enabled and not pinned:
+            cached = cache.get(account_id)
+            if cached is not None:
+                return BalanceResponse(balance=cached)
+        ticket = cache.ticket()
+        row = db.execute(
+            select(orm.Account.balance, orm.Account.updated_at).where(orm.Account.id == account_id)
+        ).first()
+        if row is None:
+            raise ValueError("Account not found")
+        balance = Decimal(row.balance)
+        if cache.enabled and (pinned or not replica_configured()):
+            cache.fill(account_id, balance, row.updated_at, ticket)
+        return BalanceResponse(balance=balance)
 
-    def deposit(self, db: Session, session_obj: orm.Session, payload: MoneyMutationRequest) -> MoneyMutationResponse:
+    def deposit(self, db: Session, session_obj: SessionInfo, payload: MoneyMutationRequest) -> MoneyMutationResponse:
         """
         Deposit an amount into the account, honoring idempotency.
 
         Args:
             db (Session): SQLAlchemy session for DB operations.
-            session_obj (orm.Session): Authenticated session ORM object.
+            session_obj (SessionInfo): Authenticated session.
             payload (MoneyMutationRequest): Amount and idempotency key.
 
         Returns:
             MoneyMutationResponse: DTO with the updated balance.
         """
-        account = self._get_account(db, session_obj)
-        # check if a transaction with the same idempotency key exists for this account
-        existing_tx = db.execute(
-            select(orm.Transaction).where(
-                orm.Transaction.account_id == account.id,
-                orm.Transaction.idempotency_key == payload.idempotencyKey,
-            )
-        ).scalar_one_or_none()
-        if existing_tx:
-            acc = db.execute(
-                select(orm.Account).where(orm.Account.id == existing_tx.account_id)
-            ).scalar_one()
-            return MoneyMutationResponse(balance=Decimal(acc.balance))
-        acc = db.execute(
-            select(orm.Account).where(orm.Account.id == account.id).with_for_update()
-        ).scalar_one()
-        acc.balance = (Decimal(acc.balance) + payload.amount).quantize(Decimal("0.01"))
-        tx = orm.Transaction(
-            account_id=account.id,
-            type="deposit",
-            amount=payload.amount,
-            idempotency_key=payload.idempotencyKey,
-            created_at=datetime.now(timezone.utc),
-        )
-        db.add(tx)
-        db.flush()
-        return MoneyMutationResponse(balance=Decimal(acc.balance))
+        if get_settings().mutation_coalescing:
+            # The request session at most looked up the login; give its connection back before queueing.
+            db.close()
+            return get_mutation_coalescer().submit(*self._coalesced(session_obj, payload, "deposit"))
+        return self._apply(db, session_obj, payload, "deposit", payload.amount)
 
-    def withdraw(self, db: Session, session_obj: orm.Session, payload: MoneyMutationRequest) -> MoneyMutationResponse:
+    def withdraw(self, db: Session, session_obj: SessionInfo, payload: MoneyMutationRequest) -> MoneyMutationResponse:
         """
         Withdraw an amount from the account, honoring idempotency and preventing overdraft.
 
         Args:
             db (Session): SQLAlchemy session for DB operations.
-            session_obj (orm.Session): Authenticated session ORM object.
+            session_obj (SessionInfo): Authenticated session.
             payload (MoneyMutationRequest): Amount and idempotency key.
 
         Returns:
             MoneyMutationResponse: DTO with the updated balance.
 
         """
-        account = self._get_account(db, session_obj)
-        # check if a transaction with the same idempotency key exists for this account
-        existing_tx = db.execute(
-            select(orm.Transaction).where(
-                orm.Transaction.account_id == account.id,
-                orm.Transaction.idempotency_key == payload.idempotencyKey,
+        if get_settings().mutation_coalescing:
+            # The request session at most looked up the login; give its connection back before queueing.
+            db.close()
+            return get_mutation_coalescer().submit(*self._coalesced(session_obj, payload, "withdraw"))
+        return self._apply(db, session_obj, payload, "withdrawal", -payload.amount)
+
+    def _coalesced(self, session_obj: SessionInfo, payload: MoneyMutationRequest, op_type: str):
+        """
+        Build the coalescer arguments for one deposit or withdrawal.
+
+        The batch runs in best_effort mode, so one caller's overdraft does not
+        fail the others; each caller's outcome is the one _apply would give.
+
+        Args:
+            session_obj (SessionInfo): Authenticated session.
+            payload (MoneyMutationRequest): Amount and idempotency key.
+            op_type (str): "deposit" or "withdraw".
+
+        Returns:
+            Tuple: (account id, operation, batch runner) for submit().
+        """
+        operation = BatchOperation(type=op_type, amount=payload.amount, idempotencyKey=payload.idempotencyKey)
+
+        def run(db: Session, operations: List[BatchOperation]) -> BatchMutationResponse:
+            return self.apply_batch(db, session_obj, BatchMutationRequest(operations=operations, mode="best_effort"))
+
+        return self.resolve_account_id(session_obj), operation, run
+
+    def _apply(
+        self,
+        db: Session,
+        session_obj: SessionInfo,
+        payload: MoneyMutationRequest,
+        tx_type: str,
+        delta: Decimal,
+    ) -> MoneyMutationResponse:
+        """
+        Record a transaction and move the balance in two statements.
+
+        Retries known to the idempotency store are answered without touching the
+        account. Otherwise the INSERT claims the idempotency key (ON CONFLICT DO
+        NOTHING), then a conditional UPDATE ... RETURNING applies the delta only
+        if the balance stays non-negative, updates the day's row in
+        tbl_balance_daily and stores the response in tbl_idempotency. The account
+        row is locked only from that UPDATE to commit, after which the new
+        balance is written through to the balance cache. On overdraft the caller's
+        transaction must be rolled back so the claimed key is released; get_db
+        does this.
+
+        Args:
+            db (Session): SQLAlchemy session for DB operations.
+            session_obj (SessionInfo): Authenticated session.
+            payload (MoneyMutationRequest): Amount and idempotency key.
+            tx_type (str): Transaction type stored on the row.
+            delta (Decimal): Signed change applied to the balance.
+
+        Returns:
+            MoneyMutationResponse: DTO with the updated balance.
+
+        Raises:
+            ValueError: When the account is missing or the withdrawal would overdraw it.
+            IdempotencyConflictError: When the key was already used by another account.
+        """
+        account_id = self.resolve_account_id(session_obj)
+        now = datetime.now(timezone.utc)
+        store = get_idempotency_store()
+        recorded = store.lookup(db, payload.idempotencyKey)
+        if recorded is not None:
+            return self._replay(recorded, account_id)
+        claimed = db.execute(
+            pg_insert(orm.Transaction)
+            .values(
+                account_id=account_id,
+                type=tx_type,
+                amount=payload.amount,
+                idempotency_key=payload.idempotencyKey,
+                created_at=now,
             )
+            .on_conflict_do_nothing(index_elements=[orm.Transaction.idempotency_key])
+            .returning(orm.Transaction.id)
         ).scalar_one_or_none()
-        if existing_tx:
-            acc = db.execute(
-                select(orm.Account).where(orm.Account.id == existing_tx.account_id)
-            ).scalar_one()
-            return MoneyMutationResponse(balance=Decimal(acc.balance))
-        acc = db.execute(
-            select(orm.Account).where(orm.Account.id == account.id).with_for_update()
-        ).scalar_one()
-        new_balance = (Decimal(acc.balance) - payload.amount).quantize(Decimal("0.01"))
-        if new_balance < Decimal("0.00"):
-            raise ValueError("Insufficient funds")
-        acc.balance = new_balance
-        tx = orm.Transaction(
-            account_id=account.id,
-            type="withdrawal",
-            amount=payload.amount,
-            idempotency_key=payload.idempotencyKey,
-            created_at=datetime.now(timezone.utc),
+        if claimed is None:
+            return self._replay_from_db(db, account_id, payload.idempotencyKey)
+        # Move the balance, fold it into today's snapshot and record the response for
+        # replays, all in one statement. updated_at versions the cached balance: clock_timestamp()
+        # taken under the row lock follows the order of updates, now() (transaction start) does not.
+        moved = (
+            update(orm.Account)
+            .where(orm.Account.id == account_id, orm.Account.balance + delta >= 0)
+            .values(balance=orm.Account.balance + delta, updated_at=func.clock_timestamp())
+            .returning(orm.Account.id, orm.Account.balance, orm.Account.updated_at)
+            .cte("moved")
         )
-        db.add(tx)
-        db.flush()
-        return MoneyMutationResponse(balance=Decimal(acc.balance))
+        returning = [orm.IdempotencyRecord.balance, select(moved.c.updated_at).scalar_subquery()]
+        if invalidation.enabled():
+            returning.append(invalidation.notify_clause(invalidation.ACCOUNT, account_id))
+        row = db.execute(
+            insert(orm.IdempotencyRecord)
+            .from_select(
+                ["key", "account_id", "balance"],
+                select(literal(payload.idempotencyKey), moved.c.id, moved.c.balance),
+            )
+            .returning(*returning)
+            .add_cte(daily_snapshot_upsert(moved, now.date(), delta))
+        ).first()
+        if row is None:
+            raise ValueError("Insufficient funds" if delta < 0 else "Account not found")
+        new_balance = Decimal(row[0])
+        store.record(db, payload.idempotencyKey, IdempotentResult(account_id, new_balance))
+        self._write_through(db, account_id, new_balance, row[1])
+        return MoneyMutationResponse(balance=new_balance)
+
+    @staticmethod
+    def _write_through(db: Session, account_id: int, balance: Decimal, version: datetime) -> None:
+        # Put a balance this transaction wrote into the balance cache once it commits.
+        cache = get_balance_cache()
+        if cache.enabled:
+            on_commit(db, lambda: cache.write(account_id, balance, version))
+
+    def apply_batch(
+        self, db: Session, session_obj: SessionInfo, payload: BatchMutationRequest
+    ) -> BatchMutationResponse:
+        """
+        Apply an ordered list of deposits and withdrawals under one account lock.
+
+        Keys already answered are replayed. All other keys are claimed by one
+        multi-row INSERT into tbl_transactions, before the account lock as in
+        _apply, so a batch and a concurrent retry of one of its keys cannot
+        deadlock. The account row is then locked once (FOR UPDATE) and the
+        operations run in order against a running balance. A single statement
+        writes the final balance, today's snapshot and the idempotency records.
+
+        In all_or_nothing mode the first failing operation raises and the
+        caller's rollback undoes the whole batch. In best_effort mode failing
+        operations are reported as rejected, their claimed rows are deleted so
+        the keys stay usable, and the remaining operations still apply.
+
+        Args:
+            db (Session): SQLAlchemy session for DB operations.
+            session_obj (SessionInfo): Authenticated session.
+            payload (BatchMutationRequest): Operations and mode.
+
+        Returns:
+            BatchMutationResponse: Per-operation results, in request order, and the final balance.
+
+        Raises:
+            ValueError: When the account is missing, in either mode; all_or_nothing only, when an operation overdraws.
+            IdempotencyConflictError: all_or_nothing only, when a key was already used by another account.
+        """
+        account_id = self.resolve_account_id(session_obj)
+        atomic = payload.mode == "all_or_nothing"
+        operations = payload.operations
+        store = get_idempotency_store()
+        now = datetime.now(timezone.utc)
+        results: List[Optional[BatchItemResult]] = [None] * len(operations)
+
+        def replay(index: int, answer: Callable[[], MoneyMutationResponse]) -> None:
+            key = operations[index].idempotencyKey
+            try:
+                results[index] = BatchItemResult(idempotencyKey=key, status="replayed", balance=answer().balance)
+            except IdempotencyConflictError as exc:
+                if atomic:
+                    raise IdempotencyConflictError(f"Operation {index + 1}: {exc}")
+                results[index] = BatchItemResult(idempotencyKey=key, status="rejected", error=str(exc))
+
+        fresh = []
+        for index, op in enumerate(operations):
+            recorded = store.lookup(db, op.idempotencyKey)
+            if recorded is None:
+                fresh.append(index)
+            else:
+                replay(index, lambda recorded=recorded: self._replay(recorded, account_id))
+
+        claimed = {}
+        if fresh:
+            # Claim in key order so overlapping batches take the key locks in the same order.
+            rows = [
+                {
+                    "account_id": account_id,
+                    "type": "deposit" if operations[index].type == "deposit" else "withdrawal",
+                    "amount": operations[index].amount,
+                    "idempotency_key": operations[index].idempotencyKey,
+                    "created_at": now,
+                }
+                for index in sorted(fresh, key=lambda index: operations[index].idempotencyKey)
+            ]
+            claimed = dict(
+                db.execute(
+                    pg_insert(orm.Transaction)
+                    .values(rows)
+                    .on_conflict_do_nothing(index_elements=[orm.Transaction.idempotency_key])
+                    .returning(orm.Transaction.idempotency_key, orm.Transaction.id)
+                ).all()
+            )
+        for index in fresh:
+            key = operations[index].idempotencyKey
+            if key not in claimed:
+                replay(index, lambda key=key: self._replay_from_db(db, account_id, key))
+
+        balance = db.execute(
+            select(orm.Account.balance).where(orm.Account.id == account_id).with_for_update()
+        ).scalar_one_or_none()
+        if balance is None:
+            raise ValueError("Account not found")
+        opening = balance = Decimal(balance)
+        totals = {
+            "deposit_count": 0,
+            "deposit_total": Decimal("0"),
+            "withdrawal_count": 0,
+            "withdrawal_total": Decimal("0"),
+        }
+        records = []
+        rejected_ids = []
+        for index in fresh:
+            op = operations[index]
+            if op.idempotencyKey not in claimed:
+                continue
+            delta = op.amount if op.type == "deposit" else -op.amount
+            if balance + delta < 0:
+                if atomic:
+                    raise ValueError(f"Operation {index + 1}: Insufficient funds")
+                rejected_ids.append(claimed[op.idempotencyKey])
+                results[index] = BatchItemResult(
+                    idempotencyKey=op.idempotencyKey, status="rejected", error="Insufficient funds"
+                )
+                continue
+            balance += delta
+            kind = "deposit" if delta > 0 else "withdrawal"
+            totals[f"{kind}_count"] += 1
+            totals[f"{kind}_total"] += op.amount
+            records.append({"key": op.idempotencyKey, "account_id": account_id, "balance": balance})
+            results[index] = BatchItemResult(idempotencyKey=op.idempotencyKey, status="applied", balance=balance)
+
+        if rejected_ids:
+            db.execute(
+                delete(orm.Transaction)
+                .where(orm.Transaction.id.in_(rejected_ids))
+                .execution_options(synchronize_session=False)
+            )
+        if records:
+            moved = (
+                update(orm.Account)
+                .where(orm.Account.id == account_id)
+                .values(balance=balance, updated_at=func.clock_timestamp())
+                .returning(orm.Account.id, orm.Account.updated_at)
+                .cte("moved")
+            )
+            returning = [select(moved.c.updated_at).scalar_subquery()]
+            if invalidation.enabled():
+                returning.append(invalidation.notify_clause(invalidation.ACCOUNT, account_id))
+            version = db.execute(
+                insert(orm.IdempotencyRecord)
+                .values(records)
+                .returning(*returning)
+                .add_cte(moved)
+                .add_cte(daily_snapshot_fold(account_id, now.date(), opening, balance, totals))
+            ).first()[0]
+            for record in records:
+                store.record(db, record["key"], IdempotentResult(account_id, record["balance"]))
+            self._write_through(db, account_id, balance, version)
+        return BatchMutationResponse(balance=balance, results=results)
+
+    def _replay(self, recorded: IdempotentResult, account_id: int) -> MoneyMutationResponse:
+        """
+        Answer a retried mutation with the balance its original call returned.
+
+        Args:
+            recorded (IdempotentResult): Result stored for the idempotency key.
+            account_id (int): Account the retry is for.
+
+        Returns:
+            MoneyMutationResponse: DTO with the original resulting balance.
+        """
+        if recorded.account_id != account_id:
+            raise IdempotencyConflictError("Idempotency key already used")
+        return MoneyMutationResponse(balance=recorded.balance)
+
+    def _replay_from_db(self, db: Session, account_id: int, idempotency_key: str) -> MoneyMutationResponse:
+        """
+        Answer a retry whose key was already claimed in tbl_transactions.
+
+        Uses the stored response when it is still retained; keys older than the
+        retention window fall back to the account's current balance.
+
+        Args:
+            db (Session): SQLAlchemy session for DB operations.
+            account_id (int): Account the retry is for.
+            idempotency_key (str): Key of the original request.
+
+        Returns:
+            MoneyMutationResponse: DTO with the replayed balance.
+        """
+        recorded = get_idempotency_store().lookup(db, idempotency_key, probe=True)
+        if recorded is not None:
+            return self._replay(recorded, account_id)
+        owner = db.execute(
+            select(orm.Transaction.account_id).where(orm.Transaction.idempotency_key == idempotency_key)
+        ).scalar_one()
+        if owner != account_id:
+            raise IdempotencyConflictError("Idempotency key already used")
+        balance = db.execute(
+            select(orm.Account.balance).where(orm.Account.id == account_id)
+        ).scalar_one()
+        return MoneyMutationResponse(balance=Decimal(balance))
+
+
+class AsyncAccountService:
+    """Async counterpart of AccountService; delegates ORM work through AsyncSession.run_sync."""
+
+    def __init__(self) -> None:
+        self._sync = AccountService()
+
+    async def get_balance(self, db: AsyncSession, session_obj: SessionInfo, pinned: bool = False) -> BalanceResponse:
+        """
+        Return the current account balance for the session's card.
+
+        Args:
+            db (AsyncSession): Async SQLAlchemy session for DB operations; the primary when pinned.
+            session_obj (SessionInfo): Authenticated session.
+            pinned (bool): The client is inside its read-your-writes window.
+
+        Returns:
+            BalanceResponse: DTO containing the account balance.
+        """
+        return await db.run_sync(self._sync.get_balance, session_obj, pinned)
+
+    async def deposit(
+        self, db: AsyncSession, session_obj: SessionInfo, payload: MoneyMutationRequest
+    ) -> MoneyMutationResponse:
+        """
+        Deposit an amount into the account, honoring idempotency.
+
+        Args:
+            db (AsyncSession): Async SQLAlchemy session for DB operations.
+            session_obj (SessionInfo): Authenticated session.
+            payload (MoneyMutationRequest): Amount and idempotency key.
+
+        Returns:
+            MoneyMutationResponse: DTO with the updated balance.
+        """
+        if get_settings().mutation_coalescing:
+            await db.close()
+            return await get_async_mutation_coalescer().submit(*self._sync._coalesced(session_obj, payload, "deposit"))
+        return await db.run_sync(self._sync.deposit, session_obj, payload)
+
+    async def withdraw(
+        self, db: AsyncSession, session_obj: SessionInfo, payload: MoneyMutationRequest
+    ) -> MoneyMutationResponse:
+        """
+        Withdraw an amount from the account, honoring idempotency and preventing overdraft.
+
+        Args:
+            db (AsyncSession): Async SQLAlchemy session for DB operations.
+            session_obj (SessionInfo): Authenticated session.
+            payload (MoneyMutationRequest): Amount and idempotency key.
+
+        Returns:
+            MoneyMutationResponse: DTO with the updated balance.
+        """
+        if get_settings().mutation_coalescing:
+            await db.close()
+            return await get_async_mutation_coalescer().submit(*self._sync._coalesced(session_obj, payload, "withdraw"))
+        return await db.run_sync(self._sync.withdraw, session_obj, payload)
+
+    async def apply_batch(
+        self, db: AsyncSession, session_obj: SessionInfo, payload: BatchMutationRequest
+    ) -> BatchMutationResponse:
+        """
+        Apply an ordered list of deposits and withdrawals under one account lock.
+
+        Args:
+            db (AsyncSession): Async SQLAlchemy session for DB operations.
+            session_obj (SessionInfo): Authenticated session.
+            payload (BatchMutationRequest): Operations and mode.
+
+        Returns:
+            BatchMutationResponse: Per-operation results and the final balance.
+        """
+        return await db.run_sync(self._sync.apply_batch, session_obj, payload)
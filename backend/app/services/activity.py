@@ -0,0 +1,139 @@
+# Write-behind buffer for session last_activity_at updates.
+
+import logging
+import threading
+from datetime import datetime
+from typing import Callable, Dict, Optional
+
+from sqlalchemy import BigInteger, DateTime, column, update, values
+
+from ..config import get_settings
+
+logger = logging.getLogger(__name__)
+
+ActivityWriter = Callable[[Dict[int, datetime]], None]
+
+
+def write_activity(batch: Dict[int, datetime]) -> None:
+    # Apply a batch of activity timestamps with a single UPDATE ... FROM (VALUES ...).
+    # Imported lazily: the db package builds the engine from settings at import time.
+    from ..db import models as orm
+    from ..db.base import engine
+
+    rows = values(
+        column("id", BigInteger),
+        column("ts", DateTime(timezone=True)),
+        name="activity",
+    ).data(list(batch.items()))
+    stmt = (
+        update(orm.Session)
+        .where(orm.Session.id == rows.c.id)
+        .where(orm.Session.last_activity_at < rows.c.ts)
+        .values(last_activity_at=rows.c.ts)
+    )
+    with engine.begin() as conn:
+        conn.execute(stmt)
+
+
+class ActivityTracker:
+    """Coalesce per-request activity stamps and flush them in batches.
+
+    Requests only record (session id, timestamp) in memory. A background thread
+    flushes every flush_interval_sec, or sooner once max_pending sessions are
+    waiting. Session validity is decided by expires_at, which this never
+    touches, so a delayed last_activity_at cannot extend or shorten a session.
+    """
+
+    def __init__(
+        self,
+        writer: ActivityWriter,
+        flush_interval_sec: float,
+        max_pending: int,
+    ) -> None:
+        self._writer = writer
+        self.flush_interval_sec = flush_interval_sec
+        self.max_pending = max_pending
+        self._pending: Dict[int, datetime] = {}
+        self._lock = threading.Lock()
+        self._wake = threading.Event()
+        self._stopping = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+        self.flushed = 0
+
+    def record(self, session_id: int, ts: datetime) -> None:
+        # Remember the latest activity time for a session.
+        with self._lock:
+            current = self._pending.get(session_id)
+            if current is None or ts > current:
+                self._pending[session_id] = ts
+            full = len(self._pending) >= self.max_pending
+        if full:
+            if self._thread is not None:
+                self._wake.set()
+            else:
+                self.flush()
+
+    def flush(self) -> int:
+        # Write everything pending in one statement; returns the number of sessions written.
+        with self._lock:
+            batch, self._pending = self._pending, {}
+        if not batch:
+            return 0
+        try:
+            self._writer(batch)
+        except Exception:
+            logger.exception("Failed to flush activity for %d sessions", len(batch))
+            # Put the batch back unless newer stamps arrived in the meantime.
+            with self._lock:
+                for session_id, ts in batch.items():
+                    current = self._pending.get(session_id)
+                    if current is None or ts > current:
+                        self._pending[session_id] = ts
+            return 0
+        self.flushed += len(batch)
+        return len(batch)
+
+    def pending(self) -> int:
+        # Number of sessions waiting to be flushed.
+        with self._lock:
+            return len(self._pending)
+
+    def _run(self) -> None:
+        while not self._stopping.is_set():
+            self._wake.wait(self.flush_interval_sec)
+            self._wake.clear()
+            self.flush()
+
+    def start(self) -> None:
+        # Start the background flusher.
+        if self._thread is None:
+            self._stopping.clear()
+            self._thread = threading.Thread(target=self._run, name="activity-flusher", daemon=True)
+            self._thread.start()
+
+    def stop(self) -> None:
+        # Stop the flusher and write whatever is still pending.
+        if self._thread is not None:
+            self._stopping.set()
+            self._wake.set()
+            self._thread.join()
+            self._thread = None
+        self.flush()
+
+
+_tracker: Optional[ActivityTracker] = None
+_tracker_lock = threading.Lock()
+
+
+def get_activity_tracker() -> ActivityTracker:
+    # Process-wide tracker configured from settings.
+    global _tracker
+    with _tracker_lock:
+        if _tracker is None:
+            settings = get_settings()
+            _tracker = ActivityTracker(
+                write_activity,
+                flush_interval_sec=settings.activity_flush_interval_sec,
+                max_pending=settings.activity_flush_max_sessions,
+            )
+        return _tracker
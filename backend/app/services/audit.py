@@ -0,0 +1,236 @@
+# Batched writer for tbl_audit_log rows.
+
+import logging
+import threading
+from collections import deque
+from dataclasses import asdict, dataclass
+from datetime import datetime, timezone
+from typing import Callable, Deque, Dict, FrozenSet, List, Optional
+
+from sqlalchemy import insert
+from sqlalchemy.orm import Session
+
+from ..config import get_settings
+
+logger = logging.getLogger(__name__)
+
+
+@dataclass(frozen=True)
+class AuditEvent:
+    card_id: Optional[int]
+    action: str
+    result: str
+    ip: Optional[str]
+    ts: datetime
+    meta: Optional[dict] = None
+
+
+AuditWriter = Callable[[List[AuditEvent]], None]
+
+
+def write_audit(batch: List[AuditEvent]) -> None:
+    # Insert a batch of audit rows with one multi-row INSERT.
+    # Imported lazily: the db package builds the engine from settings at import time.
+    from ..db import models as orm
+    from ..db.base import engine
+
+    with engine.begin() as conn:
+        conn.execute(insert(orm.AuditLog).values([asdict(event) for event in batch]))
+
+
+class AuditLogger:
+    """Queue audit events in memory and write them in batches.
+
+    Events are timestamped when recorded, not when written, so batching does not
+    change the audit trail's ordering. A background thread flushes every
+    flush_interval_sec, or sooner once max_batch events are waiting. The queue
+    holds at most max_queue events; beyond that new events are dropped and
+    counted rather than blocking the request. Actions listed in sync_actions
+    bypass the queue and are written before the call returns.
+    """
+
+    def __init__(
+        self,
+        writer: AuditWriter,
+        flush_interval_sec: float,
+        max_batch: int,
+        max_queue: int,
+        sync_actions: FrozenSet[str] = frozenset(),
+    ) -> None:
+        self._writer = writer
+        self.flush_interval_sec = flush_interval_sec
+        self.max_batch = max_batch
+        self.max_queue = max_queue
+        self.sync_actions = sync_actions
+        self._queue: Deque[AuditEvent] = deque()
+        self._lock = threading.Lock()
+        self._flush_lock = threading.Lock()
+        self._wake = threading.Event()
+        self._stopping = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+        self.flushed = 0
+        self.dropped = 0
+        self.failed_flushes = 0
+
+    def record(
+        self,
+        db: Session,
+        action: str,
+        result: str,
+        card_id: Optional[int] = None,
+        ip: Optional[str] = None,
+        meta: Optional[dict] = None,
+        sync: bool = False,
+    ) -> None:
+        """
+        Audit an action that is part of the caller's transaction.
+
+        Queued events are only enqueued once db commits, so a rolled-back action
+        leaves no audit row behind. Synchronous events are added to db directly
+        and commit or roll back with it.
+
+        Args:
+            db (Session): Session whose transaction the audited action belongs to.
+            action (str): Audit action name, e.g. "pin_ok".
+            result (str): Outcome, e.g. "ok" or "deny".
+            card_id (Optional[int]): Card the action was performed with.
+            ip (Optional[str]): Client IP, if known.
+            meta (Optional[dict]): Extra JSON details.
+            sync (bool): Write inside the transaction even if the action is not in sync_actions.
+        """
+        # Imported lazily for the same reason as in write_audit.
+        from ..db import models as orm
+        from ..db.hooks import on_commit
+
+        event = AuditEvent(card_id, action, result, ip, datetime.now(timezone.utc), meta)
+        if sync or action in self.sync_actions:
+            db.add(orm.AuditLog(**asdict(event)))
+        else:
+            on_commit(db, lambda: self.emit(event))
+
+    def log(
+        self,
+        action: str,
+        result: str,
+        card_id: Optional[int] = None,
+        ip: Optional[str] = None,
+        meta: Optional[dict] = None,
+        sync: bool = False,
+    ) -> None:
+        """
+        Audit an event that must be kept even if the caller's transaction rolls back.
+
+        Args:
+            action (str): Audit action name, e.g. "pin_fail".
+            result (str): Outcome, e.g. "ok" or "deny".
+            card_id (Optional[int]): Card the action was performed with.
+            ip (Optional[str]): Client IP, if known.
+            meta (Optional[dict]): Extra JSON details.
+            sync (bool): Write it now in its own transaction instead of queueing it.
+        """
+        event = AuditEvent(card_id, action, result, ip, datetime.now(timezone.utc), meta)
+        if sync or action in self.sync_actions:
+            self._writer([event])
+            self.flushed += 1
+        else:
+            self.emit(event)
+
+    def emit(self, event: AuditEvent) -> bool:
+        # Queue an event regardless of any transaction; returns False if it was dropped.
+        with self._lock:
+            if len(self._queue) >= self.max_queue:
+                self.dropped += 1
+                dropped = True
+            else:
+                self._queue.append(event)
+                dropped = False
+            full = len(self._queue) >= self.max_batch
+        if dropped:
+            logger.warning("Audit queue full (%d events); dropped %s", self.max_queue, event.action)
+            return False
+        if full:
+            if self._thread is not None:
+                self._wake.set()
+            else:
+                self.flush()
+        return True
+
+    def flush(self) -> int:
+        # Write queued events in batches of max_batch; returns the number written.
+        written = 0
+        with self._flush_lock:
+            while True:
+                with self._lock:
+                    batch = [self._queue.popleft() for _ in range(min(self.max_batch, len(self._queue)))]
+                if not batch:
+                    return written
+                try:
+                    self._writer(batch)
+                except Exception:
+                    logger.exception("Failed to flush %d audit events", len(batch))
+                    self.failed_flushes += 1
+                    self._requeue(batch)
+                    return written
+                written += len(batch)
+                self.flushed += len(batch)
+
+    def _requeue(self, batch: List[AuditEvent]) -> None:
+        # Put a failed batch back at the head of the queue, dropping what no longer fits.
+        with self._lock:
+            room = max(0, self.max_queue - len(self._queue))
+            keep = batch[:room]
+            self.dropped += len(batch) - len(keep)
+            self._queue.extendleft(reversed(keep))
+
+    def stats(self) -> Dict[str, int]:
+        # Counters for monitoring the pipeline.
+        with self._lock:
+            queued = len(self._queue)
+        return {
+            "queued": queued,
+            "flushed": self.flushed,
+            "dropped": self.dropped,
+            "failed_flushes": self.failed_flushes,
+        }
+
+    def _run(self) -> None:
+        while not self._stopping.is_set():
+            self._wake.wait(self.flush_interval_sec)
+            self._wake.clear()
+            self.flush()
+
+    def start(self) -> None:
+        # Start the background flusher.
+        if self._thread is None:
+            self._stopping.clear()
+            self._thread = threading.Thread(target=self._run, name="audit-flusher", daemon=True)
+            self._thread.start()
+
+    def stop(self) -> None:
+        # Stop the flusher and write whatever is still queued.
+        if self._thread is not None:
+            self._stopping.set()
+            self._wake.set()
+            self._thread.join()
+            self._thread = None
+        self.flush()
+
+
+_audit_logger: Optional[AuditLogger] = None
+_audit_logger_lock = threading.Lock()
+
+
+def get_audit_logger() -> AuditLogger:
+    # Process-wide audit logger configured from settings.
+    global _audit_logger
+    with _audit_logger_lock:
+        if _audit_logger is None:
+            settings = get_settings()
+            _audit_logger = AuditLogger(
+                write_audit,
+                flush_interval_sec=settings.audit_flush_interval_sec,
+                max_batch=settings.audit_flush_max_events,
+                max_queue=settings.audit_queue_size,
+                sync_actions=frozenset(a.strip() for a in settings.audit_sync_actions.split(",") if a.strip()),
+            )
+        return _audit_logger
@@ -1,12 +1,19 @@
 from datetime import datetime, timezone, timedelta
 from typing import Optional, Tuple
 
+from sqlalchemy import select, update
+from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.orm import Session
 
+from ..cache import invalidation
+from ..cache.sessions import get_session_cache
 from ..domain.models import PinLoginRequest, PinLoginResponse
+from ..domain.session import SessionInfo
 from ..db import models as orm
-from ..security.hashing import verify_pin
+from ..security.pin_pool import get_pin_pool
+from ..security.rate_limit import get_login_limiter
 from ..security.tokens import new_token, hash_token, expiry_time
+from .audit import get_audit_logger
 
 # Authentication business operations.
 class AuthService:
@@ -28,30 +35,93 @@ class AuthService:
 
         Returns:
           A tuple of the response DTO, the raw session token, and the created session ORM object.
+
+        Raises:
+            LoginRateLimitedError: When the card or client IP has too many recent failures.
+            PinHasherBusyError: When the PIN hashing pool is saturated.
         """
+        limiter = get_login_limiter()
+        limiter.check(payload.cardToken, client_ip)
         now = datetime.now(timezone.utc)
+        try:
+            card = self._find_card(db, payload.cardToken, now)
+        except ValueError:
+            limiter.record_failure(payload.cardToken, client_ip)
+            raise
+        pin_hash = card.pin_hash
+        # End the read transaction so the connection goes back to the pool while bcrypt runs.
+        db.commit()
+        if not get_pin_pool().verify(payload.pin, pin_hash):
+            limiter.record_failure(payload.cardToken, client_ip)
+            self._record_pin_failure(db, card, client_ip, now)
+            raise ValueError("Invalid PIN or card")
+        limiter.record_success(payload.cardToken)
+        return self._open_session(db, card, client_ip, now)
+
+    def _find_card(self, db: Session, card_token: str, now: datetime) -> orm.Card:
+        """
+        Load the card for a login attempt and reject blocked or locked cards.
+
+        Args:
+            db (Session): SQLAlchemy session used for DB operations.
+            card_token (str): Opaque card token from the login payload.
+            now (datetime): Timestamp of the login attempt.
+
+        Returns:
+            orm.Card: The card whose PIN should be verified.
+        """
         card_query = db.query(orm.Card)
         card: orm.Card | None
-        card = card_query.filter(orm.Card.token == payload.cardToken).first()
+        card = card_query.filter(orm.Card.token == card_token).first()
         if not card or card.is_blocked:
             raise ValueError("Invalid PIN or card")
         if card.locked_until and card.locked_until > now:
             raise ValueError("Invalid PIN or card")
-        if not verify_pin(payload.pin, card.pin_hash):
-            card.try_count += 1
-            if card.try_count >= 5:
-                card.locked_until = now + timedelta(minutes=15)
-                card.try_count = 0
-            db.flush()
-            db.add(
-                orm.AuditLog(
-                    card_id=card.id,
-                    action="pin_fail",
-                    result="deny",
-                    ip=client_ip,
-                )
-            )
-            raise ValueError("Invalid PIN or card")
+        return card
+
+    def _record_pin_failure(
+        self,
+        db: Session,
+        card: orm.Card,
+        client_ip: Optional[str],
+        now: datetime,
+    ) -> None:
+        """
+        Count a failed PIN attempt, lock the card after five, and audit it.
+
+        Args:
+            db (Session): SQLAlchemy session used for DB operations.
+            card (orm.Card): Card that failed verification.
+            client_ip (Optional[str]): Optional client IP for audit logging.
+            now (datetime): Timestamp of the login attempt.
+        """
+        card.try_count += 1
+        if card.try_count >= 5:
+            card.locked_until = now + timedelta(minutes=15)
+            card.try_count = 0
+        db.flush()
+        # Logged outside the request transaction so failed attempts are audited even when it rolls back.
+        get_audit_logger().log("pin_fail", "deny", card_id=card.id, ip=client_ip)
+
+    def _open_session(
+        self,
+        db: Session,
+        card: orm.Card,
+        client_ip: Optional[str],
+        now: datetime,
+    ) -> Tuple[PinLoginResponse, str, orm.Session]:
+        """
+        Reset the card's failure counters and create a new session for it.
+
+        Args:
+            db (Session): SQLAlchemy session used for DB operations.
+            card (orm.Card): Card that passed verification.
+            client_ip (Optional[str]): Optional client IP for audit logging.
+            now (datetime): Timestamp of the login attempt.
+
+        Returns:
+            A tuple of the response DTO, the raw session token, and the created session ORM object.
+        """
         card.try_count = 0
         card.locked_until = None
         raw_token = new_token()
@@ -64,39 +134,115 @@ class AuthService:
             expires_at=expiry_time(),
         )
         db.add(session_obj)
-        db.add(
-            orm.AuditLog(
+        get_audit_logger().record(db, "pin_ok", "ok", card_id=card.id, ip=client_ip)
+        db.flush()
+        # Customer name and account id in one query; the account id rides on the cached session.
+        customer_name, account_id = db.execute(
+            select(orm.Customer.full_name, orm.Account.id)
+            .outerjoin(orm.Account, orm.Account.customer_id == orm.Customer.id)
+            .where(orm.Customer.id == card.customer_id)
+            .order_by(orm.Account.id)
+            .limit(1)
+        ).one()
+        get_session_cache().write(
+            SessionInfo(
+                id=session_obj.id,
                 card_id=card.id,
-                action="pin_ok",
-                result="ok",
-                ip=client_ip,
-            )
+                token_hash=token_hash,
+                expires_at=session_obj.expires_at,
+                account_id=account_id,
+            ),
+            now,
         )
-        db.flush()
-        resp = PinLoginResponse(customerName=card.customer.full_name, cardNetwork=card.network)
+        resp = PinLoginResponse(customerName=customer_name, cardNetwork=card.network)
         return resp, raw_token, session_obj
 
     def logout(
         self,
         db: Session,
-        session_obj: orm.Session,
+        session_obj: SessionInfo,
         client_ip: Optional[str] = None,
     ) -> None:
         """
-        Revoke a session and record an audit log entry.
+        Revoke a session, drop it from every worker's session cache, and queue an audit log entry.
 
         Args:
             db (Session): SQLAlchemy session used for DB operations.
-            session_obj (orm.Session): The session ORM object to revoke.
+            session_obj (SessionInfo): The authenticated session to revoke.
             client_ip (Optional[str]): Optional client IP for audit logging.
         """
-        session_obj.revoked_at = datetime.now(timezone.utc)
-        db.flush()
-        db.add(
-            orm.AuditLog(
-                card_id=session_obj.card_id,
-                action="logout",
-                result="ok",
-                ip=client_ip,
-            )
-        )
+        now = datetime.now(timezone.utc)
+        stmt = update(orm.Session).where(orm.Session.id == session_obj.id).values(revoked_at=now)
+        if invalidation.enabled():
+            # Other workers drop their cached copy once the revocation commits.
+            stmt = stmt.returning(invalidation.notify_clause(invalidation.SESSION, session_obj.token_hash))
+        db.execute(stmt)
+        get_session_cache().revoke(session_obj, now)
+        get_audit_logger().record(db, "logout", "ok", card_id=session_obj.card_id, ip=client_ip)
+
+
+class AsyncAuthService:
+    """Async counterpart of AuthService for handlers running on an AsyncSession.
+
+    The ORM work is delegated to AuthService through AsyncSession.run_sync so both
+    modes share one implementation; bcrypt runs on the PIN hashing pool.
+    """
+
+    def __init__(self) -> None:
+        self._sync = AuthService()
+
+    async def login_pin(
+        self,
+        db: AsyncSession,
+        payload: PinLoginRequest,
+        client_ip: Optional[str] = None,
+    ) -> Tuple[PinLoginResponse, str, orm.Session]:
+        """
+        Authenticate a card using a PIN and create a new session.
+
+        Args:
+            db (AsyncSession): Async SQLAlchemy session used for DB operations.
+            payload: Payload containing cardToken and pin.
+            client_ip: Optional client IP for audit logging.
+
+        Returns:
+          A tuple of the response DTO, the raw session token, and the created session ORM object.
+
+        Raises:
+            LoginRateLimitedError: When the card or client IP has too many recent failures.
+            PinHasherBusyError: When the PIN hashing pool is saturated.
+        """
+        limiter = get_login_limiter()
+        limiter.check(payload.cardToken, client_ip)
+        now = datetime.now(timezone.utc)
+        try:
+            card = await db.run_sync(self._sync._find_card, payload.cardToken, now)
+        except ValueError:
+            limiter.record_failure(payload.cardToken, client_ip)
+            raise
+        pin_hash = card.pin_hash
+        await db.commit()
+        # Async sessions keep objects across commits; reload the card's counters afterwards.
+        db.expire(card)
+        if not await get_pin_pool().verify_async(payload.pin, pin_hash):
+            limiter.record_failure(payload.cardToken, client_ip)
+            await db.run_sync(self._sync._record_pin_failure, card, client_ip, now)
+            raise ValueError("Invalid PIN or card")
+        limiter.record_success(payload.cardToken)
+        return await db.run_sync(self._sync._open_session, card, client_ip, now)
+
+    async def logout(
+        self,
+        db: AsyncSession,
+        session_obj: SessionInfo,
+        client_ip: Optional[str] = None,
+    ) -> None:
+        """
+        Revoke a session, drop it from every worker's session cache, and queue an audit log entry.
+
+        Args:
+            db (AsyncSession): Async SQLAlchemy session used for DB operations.
+            session_obj (SessionInfo): The authenticated session to revoke.
+            client_ip (Optional[str]): Optional client IP for audit logging.
+        """
+        await db.run_sync(self._sync.logout, session_obj, client_ip)
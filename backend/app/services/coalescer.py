@@ -0,0 +1,214 @@
+# Per-account group commit: concurrent deposits and withdrawals on one account are applied as one locked batch.
+
+import asyncio
+import copy
+import threading
+from functools import lru_cache
+from typing import Callable, Dict, List, Optional
+
+from sqlalchemy.orm import Session
+
+from ..config import get_settings
+from ..db import base
+from ..domain.errors import IdempotencyConflictError
+from ..domain.models import BatchMutationResponse, BatchOperation, MoneyMutationResponse
+
+# Applies the operations in the given session, in order, in best_effort mode.
+RunBatch = Callable[[Session, List[BatchOperation]], BatchMutationResponse]
+
+
+class _Pending:
+    # One caller's operation and, once its batch is done, its outcome.
+    __slots__ = ("op", "ready", "leads", "response", "error")
+
+    def __init__(self, op: BatchOperation, ready) -> None:
+        self.op = op
+        self.ready = ready
+        self.leads = False
+        self.response: Optional[MoneyMutationResponse] = None
+        self.error: Optional[Exception] = None
+
+    def outcome(self) -> MoneyMutationResponse:
+        if self.error is not None:
+            raise self.error
+        return self.response
+
+
+def _own_copy(error: Exception) -> Exception:
+    # A per-caller instance of a batch-wide error, so threads never raise (and re-trace) the same object.
+    try:
+        mine = copy.copy(error)
+    except Exception:
+        mine = RuntimeError(str(error))
+    mine.__cause__ = error
+    return mine
+
+
+class _Coalescer:
+    # Queue bookkeeping shared by the thread and asyncio variants.
+
+    def __init__(self, max_batch: int) -> None:
+        self._max_batch = max_batch
+        self._queues: Dict[int, List[_Pending]] = {}
+        self.batches = 0
+        self.operations = 0
+
+    def _enqueue(self, account_id: int, pending: _Pending) -> List[_Pending]:
+        # The first caller for an idle account leads; everyone else waits in its queue.
+        queue = self._queues.get(account_id)
+        if queue is None:
+            self._queues[account_id] = queue = []
+            pending.leads = True
+        queue.append(pending)
+        return queue
+
+    def _take_group(self, queue: List[_Pending]) -> List[_Pending]:
+        # Up to max_batch entries from the head of the queue. A key already in the group
+        # (a retry racing its original) waits for the next batch and is replayed there.
+        group, keys, rest = [], set(), []
+        for pending in queue:
+            key = pending.op.idempotencyKey
+            if len(group) < self._max_batch and key not in keys:
+                keys.add(key)
+                group.append(pending)
+            else:
+                rest.append(pending)
+        queue[:] = rest
+        return group
+
+    def _hand_off(self, account_id: int, queue: List[_Pending], group: List[_Pending]) -> Optional[_Pending]:
+        # Record the batch and pick the next leader, or retire the queue when it is empty.
+        self.batches += 1
+        self.operations += len(group)
+        if not queue:
+            del self._queues[account_id]
+            return None
+        queue[0].leads = True
+        return queue[0]
+
+    @staticmethod
+    def _settle(group: List[_Pending], response: Optional[BatchMutationResponse], error: Optional[Exception]) -> None:
+        # Give every caller its own balance, or the error its single call would have raised.
+        for index, pending in enumerate(group):
+            if error is not None:
+                pending.error = _own_copy(error)
+                continue
+            item = response.results[index]
+            if item.status != "rejected":
+                pending.response = MoneyMutationResponse(balance=item.balance)
+            elif item.error == "Insufficient funds":
+                pending.error = ValueError(item.error)
+            else:
+                pending.error = IdempotencyConflictError(item.error)
+
+    def stats(self) -> Dict[str, float]:
+        return {"batches": self.batches, "operations": self.operations, "accounts": len(self._queues)}
+
+
+class MutationCoalescer(_Coalescer):
+    """
+    Group commit for deposits and withdrawals within one worker process.
+
+    Callers for the same account queue up behind a leader. The leader takes up
+    to max_batch queued operations and applies them in arrival order under one
+    account lock, in its own transaction. Each caller gets the balance right
+    after its own operation, or the overdraft or idempotency error its single
+    call would have raised. The leader then hands leadership to the oldest
+    waiter, and while one batch commits the next one fills up. Callers close
+    their request session before queueing, so waiters hold no database
+    connection; each still occupies a threadpool thread while it waits, which
+    AsyncMutationCoalescer avoids.
+    """
+
+    def __init__(self, max_batch: int) -> None:
+        super().__init__(max_batch)
+        self._lock = threading.Lock()
+
+    def submit(self, account_id: int, op: BatchOperation, run: RunBatch) -> MoneyMutationResponse:
+        """
+        Apply op to the account as part of the next batch and return its own result.
+
+        Args:
+            account_id (int): Account the operation moves.
+            op (BatchOperation): Deposit or withdrawal with its idempotency key.
+            run (RunBatch): Applies a batch in a session; used if this caller leads.
+
+        Returns:
+            MoneyMutationResponse: DTO with the balance right after op.
+
+        Raises:
+            ValueError: When op would overdraw the account, or the account is missing.
+            IdempotencyConflictError: When op's key was already used by another account.
+        """
+        pending = _Pending(op, threading.Event())
+        with self._lock:
+            queue = self._enqueue(account_id, pending)
+        if not pending.leads:
+            pending.ready.wait()
+        if pending.leads:
+            with self._lock:
+                group = self._take_group(queue)
+            response, error = None, None
+            try:
+                with base.SessionLocal() as db:
+                    response = run(db, [p.op for p in group])
+                    db.commit()
+            except Exception as exc:
+                error = exc
+            self._settle(group, response, error)
+            with self._lock:
+                successor = self._hand_off(account_id, queue, group)
+            for waiter in group:
+                waiter.ready.set()
+            if successor is not None:
+                successor.ready.set()
+        return pending.outcome()
+
+
+class AsyncMutationCoalescer(_Coalescer):
+    """Event-loop counterpart of MutationCoalescer for DB_ASYNC; the leader runs the batch on an AsyncSession."""
+
+    async def submit(self, account_id: int, op: BatchOperation, run: RunBatch) -> MoneyMutationResponse:
+        """
+        Apply op to the account as part of the next batch and return its own result.
+
+        Args:
+            account_id (int): Account the operation moves.
+            op (BatchOperation): Deposit or withdrawal with its idempotency key.
+            run (RunBatch): Applies a batch in a sync session; run through AsyncSession.run_sync.
+
+        Returns:
+            MoneyMutationResponse: DTO with the balance right after op.
+        """
+        pending = _Pending(op, asyncio.Event())
+        queue = self._enqueue(account_id, pending)
+        if not pending.leads:
+            await pending.ready.wait()
+        if pending.leads:
+            group = self._take_group(queue)
+            response, error = None, None
+            try:
+                async with base.AsyncSessionLocal() as db:
+                    response = await db.run_sync(run, [p.op for p in group])
+                    await db.commit()
+            except Exception as exc:
+                error = exc
+            self._settle(group, response, error)
+            successor = self._hand_off(account_id, queue, group)
+            for waiter in group:
+                waiter.ready.set()
+            if successor is not None:
+                successor.ready.set()
+        return pending.outcome()
+
+
+@lru_cache
+def get_mutation_coalescer() -> MutationCoalescer:
+    # Process-wide coalescer for the sync routes.
+    return MutationCoalescer(get_settings().coalesce_max_batch)
+
+
+@lru_cache
+def get_async_mutation_coalescer() -> AsyncMutationCoalescer:
+    # Process-wide coalescer for the async routes.
+    return AsyncMutationCoalescer(get_settings().coalesce_max_batch)
@@ -0,0 +1,129 @@
+# Idempotency response store: remembers what each money mutation originally returned.
+
+from dataclasses import dataclass
+from datetime import datetime, timedelta, timezone
+from decimal import Decimal
+from functools import lru_cache
+from typing import Optional
+
+from sqlalchemy import delete, select
+from sqlalchemy.orm import Session
+
+from ..cache.bloom import RotatingBloomFilter
+from ..cache.ttl import TTLCache
+from ..config import get_settings
+from ..db import models as orm
+from ..db.hooks import on_commit
+
+
+@dataclass(frozen=True)
+class IdempotentResult:
+    account_id: int
+    balance: Decimal
+
+
+class IdempotencyStore:
+    """Replay original mutation responses from memory, falling back to tbl_idempotency.
+
+    Lookups go LRU -> negative filter -> table. A key the filter has never seen
+    skips the table probe; the INSERT ... ON CONFLICT on tbl_transactions still
+    catches keys recorded by other workers. Entries older than the retention
+    window are ignored and can be purged with purge_expired.
+    """
+
+    def __init__(self, retention: timedelta, cache_size: int, filter_bits: int, filter_hashes: int) -> None:
+        self.retention = retention
+        self._cache: TTLCache[IdempotentResult] = TTLCache(
+            max_size=cache_size, ttl_sec=retention.total_seconds()
+        )
+        self._filter = RotatingBloomFilter(
+            bits=filter_bits, hashes=filter_hashes, rotate_sec=retention.total_seconds()
+        )
+        self.filter_skips = 0
+
+    def lookup(self, db: Session, key: str, probe: bool = False) -> Optional[IdempotentResult]:
+        """
+        Return the recorded result for a key, if any.
+
+        Args:
+            db (Session): SQLAlchemy session for DB operations.
+            key (str): Idempotency key from the request.
+            probe (bool): Query the table even if the negative filter says the key is new.
+
+        Returns:
+            Optional[IdempotentResult]: The original result, or None for an unseen key.
+        """
+        cached = self._cache.get(key)
+        if cached is not None:
+            return cached
+        if not probe and not self._filter.might_contain(key):
+            self.filter_skips += 1
+            return None
+        cutoff = datetime.now(timezone.utc) - self.retention
+        row = db.execute(
+            select(orm.IdempotencyRecord.account_id, orm.IdempotencyRecord.balance).where(
+                orm.IdempotencyRecord.key == key,
+                orm.IdempotencyRecord.created_at > cutoff,
+            )
+        ).first()
+        if row is None:
+            return None
+        result = IdempotentResult(account_id=row.account_id, balance=Decimal(row.balance))
+        self._remember(key, result)
+        return result
+
+    def record(self, db: Session, key: str, result: IdempotentResult) -> None:
+        """
+        Cache a result in memory once the transaction that produced it commits.
+
+        Args:
+            db (Session): SQLAlchemy session whose commit publishes the result.
+            key (str): Idempotency key of the request.
+            result (IdempotentResult): Result to replay for retries.
+        """
+        on_commit(db, lambda: self._remember(key, result))
+
+    def _remember(self, key: str, result: IdempotentResult) -> None:
+        self._cache.set(key, result)
+        self._filter.add(key)
+
+    def purge_expired(self, db: Session, batch_size: int = 5000) -> int:
+        """
+        Delete one batch of records older than the retention window.
+
+        Args:
+            db (Session): SQLAlchemy session for DB operations.
+            batch_size (int): Maximum rows deleted per call.
+
+        Returns:
+            int: Number of rows deleted.
+        """
+        cutoff = datetime.now(timezone.utc) - self.retention
+        expired = (
+            select(orm.IdempotencyRecord.key)
+            .where(orm.IdempotencyRecord.created_at <= cutoff)
+            .limit(batch_size)
+            .scalar_subquery()
+        )
+        result = db.execute(
+            delete(orm.IdempotencyRecord)
+            .where(orm.IdempotencyRecord.key.in_(expired))
+            .execution_options(synchronize_session=False)
+        )
+        return result.rowcount
+
+    def stats(self) -> dict:
+        # Cache counters plus how many DB probes the negative filter avoided.
+        return dict(self._cache.stats(), filter_skips=self.filter_skips)
+
+
+@lru_cache
+def get_idempotency_store() -> IdempotencyStore:
+    # Process-wide store configured from settings.
+    settings = get_settings()
+    return IdempotencyStore(
+        retention=timedelta(hours=settings.idempotency_retention_hours),
+        cache_size=settings.idempotency_cache_size,
+        filter_bits=settings.idempotency_filter_bits,
+        filter_hashes=settings.idempotency_filter_hashes,
+    )
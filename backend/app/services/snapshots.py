@@ -0,0 +1,185 @@
+# Per-account daily balance snapshots: incremental upkeep on mutations and range queries.
+
+from datetime import date, timedelta
+from decimal import Decimal
+from typing import Any, Dict, List
+
+from sqlalchemy import Integer, Numeric, literal, select
+from sqlalchemy.dialects.postgresql import insert as pg_insert
+from sqlalchemy.orm import Session
+
+from ..db import models as orm
+from ..domain.models import AccountSummaryResponse, DailyBalanceItem
+
+
+SNAPSHOT_COLUMNS = [
+    "account_id",
+    "day",
+    "opening_balance",
+    "closing_balance",
+    "deposit_count",
+    "deposit_total",
+    "withdrawal_count",
+    "withdrawal_total",
+]
+
+
+def _fold_into_day(upsert):
+    # On an existing row for the day keep the opening balance, add the counters and move the closing balance.
+    row = orm.DailyBalance
+    return upsert.on_conflict_do_update(
+        index_elements=[row.account_id, row.day],
+        set_={
+            "closing_balance": upsert.excluded.closing_balance,
+            "deposit_count": row.deposit_count + upsert.excluded.deposit_count,
+            "deposit_total": row.deposit_total + upsert.excluded.deposit_total,
+            "withdrawal_count": row.withdrawal_count + upsert.excluded.withdrawal_count,
+            "withdrawal_total": row.withdrawal_total + upsert.excluded.withdrawal_total,
+        },
+    )
+
+
+def daily_snapshot_upsert(moved, day: date, delta: Decimal):
+    """
+    Build a data-modifying CTE folding one balance move into the account's row for day.
+
+    moved is the CTE of the account UPDATE ... RETURNING (id, balance), so the
+    snapshot is written by the same statement that moves the balance and only
+    when the move succeeds. The first move of a day sets the opening balance;
+    later ones bump the counters and overwrite the closing balance. The account
+    row lock taken by the UPDATE orders concurrent moves.
+
+    Args:
+        moved: CTE with columns id and balance (the new balance).
+        day (date): UTC day the transaction belongs to.
+        delta (Decimal): Signed change applied to the balance.
+
+    Returns:
+        CTE to attach to the statement with add_cte().
+    """
+    amount = abs(delta)
+    is_deposit = delta > 0
+    money = Numeric(14, 2)
+    upsert = pg_insert(orm.DailyBalance).from_select(
+        SNAPSHOT_COLUMNS,
+        select(
+            moved.c.id,
+            literal(day),
+            moved.c.balance - delta,
+            moved.c.balance,
+            literal(1 if is_deposit else 0, Integer),
+            literal(amount if is_deposit else Decimal("0"), money),
+            literal(0 if is_deposit else 1, Integer),
+            literal(Decimal("0") if is_deposit else amount, money),
+        ),
+    )
+    return _fold_into_day(upsert).cte("daily_snapshot")
+
+
+def daily_snapshot_fold(account_id: int, day: date, opening: Decimal, closing: Decimal, totals: Dict[str, Any]):
+    """
+    Build a data-modifying CTE folding several moves of one day into the account's row.
+
+    Used when the caller already holds the account lock and knows the
+    balances, for example for a batch of operations.
+
+    Args:
+        account_id (int): Account the moves belong to.
+        day (date): UTC day of the moves.
+        opening (Decimal): Balance before the first move.
+        closing (Decimal): Balance after the last move.
+        totals (Dict[str, Any]): deposit_count, deposit_total, withdrawal_count and withdrawal_total.
+
+    Returns:
+        CTE to attach to the statement with add_cte().
+    """
+    upsert = pg_insert(orm.DailyBalance).values(
+        account_id=account_id, day=day, opening_balance=opening, closing_balance=closing, **totals
+    )
+    return _fold_into_day(upsert).cte("daily_snapshot")
+
+
+def balance_as_of(db: Session, account_id: int, day: date) -> Decimal:
+    """
+    Return the account balance at the end of day.
+
+    Uses the closing balance of the last snapshot on or before day. Before the
+    first snapshot the balance is that snapshot's opening balance, and an
+    account without snapshots has never moved, so its current balance applies.
+    Each case is one probe of the (account_id, day) primary key.
+
+    Args:
+        db (Session): SQLAlchemy session for DB operations.
+        account_id (int): Account to look up.
+        day (date): UTC day.
+
+    Returns:
+        Decimal: Balance at the end of day.
+    """
+    row = orm.DailyBalance
+    closing = db.execute(
+        select(row.closing_balance)
+        .where(row.account_id == account_id, row.day <= day)
+        .order_by(row.day.desc())
+        .limit(1)
+    ).scalar_one_or_none()
+    if closing is not None:
+        return Decimal(closing)
+    opening = db.execute(
+        select(row.opening_balance).where(row.account_id == account_id).order_by(row.day).limit(1)
+    ).scalar_one_or_none()
+    if opening is not None:
+        return Decimal(opening)
+    balance = db.execute(select(orm.Account.balance).where(orm.Account.id == account_id)).scalar_one_or_none()
+    if balance is None:
+        raise ValueError("Account not found")
+    return Decimal(balance)
+
+
+def summarize(db: Session, account_id: int, start: date, end: date) -> AccountSummaryResponse:
+    """
+    Summarize an account's activity between start and end inclusive.
+
+    Reads one snapshot per active day in the range, so the cost grows with
+    the number of days, not the number of transactions.
+
+    Args:
+        db (Session): SQLAlchemy session for DB operations.
+        account_id (int): Account to summarize.
+        start (date): First UTC day of the range.
+        end (date): Last UTC day of the range.
+
+    Returns:
+        AccountSummaryResponse: Opening/closing balance, totals and the active days.
+    """
+    row = orm.DailyBalance
+    snapshots = db.execute(
+        select(row).where(row.account_id == account_id, row.day >= start, row.day <= end).order_by(row.day)
+    ).scalars().all()
+    days: List[DailyBalanceItem] = [
+        DailyBalanceItem(
+            day=s.day,
+            openingBalance=s.opening_balance,
+            closingBalance=s.closing_balance,
+            depositCount=s.deposit_count,
+            depositTotal=s.deposit_total,
+            withdrawalCount=s.withdrawal_count,
+            withdrawalTotal=s.withdrawal_total,
+        )
+        for s in snapshots
+    ]
+    if days and days[0].day == start:
+        opening = days[0].openingBalance
+    else:
+        opening = balance_as_of(db, account_id, start - timedelta(days=1))
+    return AccountSummaryResponse(
+        start=start,
+        end=end,
+        openingBalance=opening,
+        closingBalance=days[-1].closingBalance if days else opening,
+        depositCount=sum(d.depositCount for d in days),
+        depositTotal=sum((d.depositTotal for d in days), Decimal("0.00")),
+        withdrawalCount=sum(d.withdrawalCount for d in days),
+        withdrawalTotal=sum((d.withdrawalTotal for d in days), Decimal("0.00")),
+        days=days,
+    )
@@ -0,0 +1 @@
+# Benchmark scripts for the ATM API; run from the backend folder with `python -m benchmarks.<name>`.
@@ -0,0 +1,130 @@
+"""Compare requests/sec and latency of the sync (threadpool) and async (DB_ASYNC) stacks.
+
+Starts one uvicorn server per mode against DATABASE_URL, logs in a set of seed
+cards, then drives GET /account/balance and GET /transactions from many
+concurrent clients for a fixed duration.
+
+Usage (from the backend folder, database seeded):
+    python -m benchmarks.bench_db_modes --concurrency 200 --duration 15
+"""
+
+import argparse
+import asyncio
+import os
+import statistics
+import subprocess
+import sys
+import time
+
+import httpx
+
+SEED_CARDS = [
+    ("TOK_VISA_1111", "1234"),
+    ("TOK_MC_2222", "4321"),
+    ("TOK_MAESTRO_3333", "3333"),
+    ("TOK_STAR_4444", "4444"),
+    ("TOK_PULSE_5555", "5555"),
+    ("TOK_PLUS_6666", "6666"),
+]
+READ_PATHS = ["/account/balance", "/transactions?limit=10"]
+
+
+def start_server(db_async: bool, port: int, workers: int) -> subprocess.Popen:
+    # Launch uvicorn for one mode and wait until it accepts connections.
+    env = dict(os.environ, DB_ASYNC="true" if db_async else "false")
+    proc = subprocess.Popen(
+        [
+            sys.executable, "-m", "uvicorn", "app.main:app",
+            "--port", str(port), "--workers", str(workers), "--log-level", "warning",
+        ],
+        env=env,
+    )
+    deadline = time.monotonic() + 30
+    while time.monotonic() < deadline:
+        try:
+            httpx.get(f"http://127.0.0.1:{port}/docs", timeout=1.0)
+            return proc
+        except httpx.HTTPError:
+            time.sleep(0.2)
+    proc.kill()
+    raise RuntimeError("server did not start")
+
+
+async def login_clients(base_url: str, count: int) -> list[httpx.AsyncClient]:
+    # Create one logged-in client per simulated ATM, cycling through the seed cards.
+    clients = []
+    limits = httpx.Limits(max_connections=1, max_keepalive_connections=1)
+    for i in range(count):
+        token, pin = SEED_CARDS[i % len(SEED_CARDS)]
+        client = httpx.AsyncClient(base_url=base_url, limits=limits, timeout=30.0)
+        resp = await client.post("/auth/pin", json={"cardToken": token, "pin": pin})
+        resp.raise_for_status()
+        clients.append(client)
+    return clients
+
+
+async def drive(base_url: str, concurrency: int, duration: float) -> dict:
+    # Hammer the read endpoints and collect per-request latencies.
+    clients = await login_clients(base_url, concurrency)
+    latencies: list[float] = []
+    errors = 0
+    stop_at = time.monotonic() + duration
+
+    async def worker(client: httpx.AsyncClient, offset: int) -> None:
+        nonlocal errors
+        i = offset
+        while time.monotonic() < stop_at:
+            start = time.perf_counter()
+            try:
+                resp = await client.get(READ_PATHS[i % len(READ_PATHS)])
+                ok = resp.status_code == 200
+            except httpx.HTTPError:
+                ok = False
+            latencies.append(time.perf_counter() - start)
+            if not ok:
+                errors += 1
+            i += 1
+
+    started = time.monotonic()
+    await asyncio.gather(*(worker(c, n) for n, c in enumerate(clients)))
+    elapsed = time.monotonic() - started
+    for client in clients:
+        try:
+            await client.post("/auth/logout")
+        except httpx.HTTPError:
+            pass
+        await client.aclose()
+
+    latencies.sort()
+    return {
+        "requests": len(latencies),
+        "errors": errors,
+        "rps": len(latencies) / elapsed,
+        "p50_ms": statistics.median(latencies) * 1000,
+        "p99_ms": latencies[int(len(latencies) * 0.99) - 1] * 1000,
+    }
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--concurrency", type=int, default=100)
+    parser.add_argument("--duration", type=float, default=10.0)
+    parser.add_argument("--workers", type=int, default=1)
+    parser.add_argument("--port", type=int, default=8765)
+    args = parser.parse_args()
+
+    for label, db_async in (("sync", False), ("async", True)):
+        proc = start_server(db_async, args.port, args.workers)
+        try:
+            result = asyncio.run(drive(f"http://127.0.0.1:{args.port}", args.concurrency, args.duration))
+        finally:
+            proc.terminate()
+            proc.wait()
+        print(
+            f"{label:>5}: {result['rps']:8.1f} req/s  p50 {result['p50_ms']:7.2f} ms  "
+            f"p99 {result['p99_ms']:7.2f} ms  ({result['requests']} requests, {result['errors']} errors)"
+        )
+
+
+if __name__ == "__main__":
+    main()
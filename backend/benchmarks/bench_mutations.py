@@ -0,0 +1,167 @@
+"""Concurrency benchmark for deposit/withdraw: previous ORM path vs the two-statement path.
+
+Creates a few benchmark accounts, then runs many threads that deposit and
+withdraw against them, each operation in its own transaction. Reports ops/s,
+p50 and p99 per implementation and checks that every account's balance equals
+its opening balance plus the sum of its recorded transactions.
+
+Usage (from the backend folder):
+    python -m benchmarks.bench_mutations --threads 32 --ops 200 --accounts 1
+"""
+
+import argparse
+import random
+import statistics
+import threading
+import time
+import uuid
+from datetime import datetime, timezone
+from decimal import Decimal
+
+from sqlalchemy import case, func, select
+from sqlalchemy.orm import Session
+
+from app.db import models as orm
+from app.db.base import SessionLocal, engine
+from app.domain.models import MoneyMutationRequest, MoneyMutationResponse
+from app.domain.session import SessionInfo
+from app.services.account import AccountService
+
+OPENING_BALANCE = Decimal("1000.00")
+
+
+def legacy_mutation(db: Session, account_id: int, payload: MoneyMutationRequest, tx_type: str) -> MoneyMutationResponse:
+    # The pre-existing implementation: idempotency SELECT, SELECT ... FOR UPDATE, ORM UPDATE, INSERT, flush.
+    existing_tx = db.execute(
+        select(orm.Transaction).where(
+            orm.Transaction.account_id == account_id,
+            orm.Transaction.idempotency_key == payload.idempotencyKey,
+        )
+    ).scalar_one_or_none()
+    if existing_tx:
+        acc = db.execute(select(orm.Account).where(orm.Account.id == existing_tx.account_id)).scalar_one()
+        return MoneyMutationResponse(balance=Decimal(acc.balance))
+    acc = db.execute(select(orm.Account).where(orm.Account.id == account_id).with_for_update()).scalar_one()
+    delta = payload.amount if tx_type == "deposit" else -payload.amount
+    new_balance = (Decimal(acc.balance) + delta).quantize(Decimal("0.01"))
+    if new_balance < Decimal("0.00"):
+        raise ValueError("Insufficient funds")
+    acc.balance = new_balance
+    db.add(
+        orm.Transaction(
+            account_id=account_id,
+            type=tx_type,
+            amount=payload.amount,
+            idempotency_key=payload.idempotencyKey,
+            created_at=datetime.now(timezone.utc),
+        )
+    )
+    db.flush()
+    return MoneyMutationResponse(balance=Decimal(acc.balance))
+
+
+def fast_mutation(db: Session, account_id: int, payload: MoneyMutationRequest, tx_type: str) -> MoneyMutationResponse:
+    # The current AccountService path.
+    session_info = SessionInfo(
+        id=0, card_id=0, token_hash="", expires_at=datetime.max.replace(tzinfo=timezone.utc), account_id=account_id
+    )
+    service = AccountService()
+    if tx_type == "deposit":
+        return service.deposit(db, session_info, payload)
+    return service.withdraw(db, session_info, payload)
+
+
+def create_accounts(count: int) -> list[int]:
+    # Fresh accounts so runs do not interfere with each other or with seed data.
+    with SessionLocal() as db:
+        customer = orm.Customer(full_name=f"bench-{uuid.uuid4().hex[:8]}")
+        db.add(customer)
+        db.flush()
+        accounts = [orm.Account(customer_id=customer.id, balance=OPENING_BALANCE) for _ in range(count)]
+        db.add_all(accounts)
+        db.commit()
+        return [account.id for account in accounts]
+
+
+def check_invariant(account_ids: list[int]) -> bool:
+    # Balance must equal opening balance plus deposits minus withdrawals, and never be negative.
+    signed = case((orm.Transaction.type == "deposit", orm.Transaction.amount), else_=-orm.Transaction.amount)
+    with SessionLocal() as db:
+        for account_id in account_ids:
+            balance = db.get(orm.Account, account_id).balance
+            net = db.execute(
+                select(func.coalesce(func.sum(signed), 0)).where(orm.Transaction.account_id == account_id)
+            ).scalar_one()
+            if balance < 0 or balance != OPENING_BALANCE + net:
+                return False
+    return True
+
+
+def run(impl, account_ids: list[int], threads: int, ops: int, seed: int) -> dict:
+    latencies: list[float] = []
+    rejected = 0
+    lock = threading.Lock()
+
+    def worker(n: int) -> None:
+        nonlocal rejected
+        rng = random.Random(seed + n)
+        local: list[float] = []
+        local_rejected = 0
+        for _ in range(ops):
+            account_id = rng.choice(account_ids)
+            tx_type = "deposit" if rng.random() < 0.5 else "withdrawal"
+            payload = MoneyMutationRequest(
+                amount=Decimal(rng.randint(1, 20000)) / 100, idempotencyKey=str(uuid.uuid4())
+            )
+            start = time.perf_counter()
+            db = SessionLocal()
+            try:
+                impl(db, account_id, payload, tx_type)
+                db.commit()
+            except ValueError:
+                db.rollback()
+                local_rejected += 1
+            finally:
+                db.close()
+            local.append(time.perf_counter() - start)
+        with lock:
+            latencies.extend(local)
+            rejected += local_rejected
+
+    pool = [threading.Thread(target=worker, args=(n,)) for n in range(threads)]
+    started = time.perf_counter()
+    for t in pool:
+        t.start()
+    for t in pool:
+        t.join()
+    elapsed = time.perf_counter() - started
+    latencies.sort()
+    return {
+        "ops_per_sec": len(latencies) / elapsed,
+        "p50_ms": statistics.median(latencies) * 1000,
+        "p99_ms": latencies[int(len(latencies) * 0.99) - 1] * 1000,
+        "rejected": rejected,
+        "invariant_ok": check_invariant(account_ids),
+    }
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--threads", type=int, default=32)
+    parser.add_argument("--ops", type=int, default=200, help="operations per thread")
+    parser.add_argument("--accounts", type=int, default=1, help="accounts shared by all threads")
+    parser.add_argument("--seed", type=int, default=7)
+    args = parser.parse_args()
+
+    orm.Base.metadata.create_all(bind=engine)
+    for label, impl in (("legacy", legacy_mutation), ("fast", fast_mutation)):
+        result = run(impl, create_accounts(args.accounts), args.threads, args.ops, args.seed)
+        print(
+            f"{label:>6}: {result['ops_per_sec']:8.1f} ops/s  p50 {result['p50_ms']:7.2f} ms  "
+            f"p99 {result['p99_ms']:7.2f} ms  rejected {result['rejected']}  "
+            f"invariant {'ok' if result['invariant_ok'] else 'BROKEN'}"
+        )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,112 @@
+"""Latency of GET /transactions keyset pages deep into a large history.
+
+Creates an account with --rows transactions (bulk INSERT ... SELECT
+generate_series), then times the page query at page 1 and at --page
+using keyset cursors, next to the equivalent OFFSET query for comparison.
+
+Usage (from the backend folder):
+    python -m benchmarks.bench_pagination --rows 1000000 --page 1000 --page-size 50
+"""
+
+import argparse
+import statistics
+import time
+import uuid
+from datetime import datetime, timezone
+
+from sqlalchemy import text
+
+from app.api.routes_transactions import _encode_cursor, _recent_transactions
+from app.db import models as orm
+from app.db.base import SessionLocal, engine
+from app.domain.session import SessionInfo
+
+
+def create_history(rows: int) -> int:
+    # One account with `rows` transactions spread one second apart.
+    with SessionLocal() as db:
+        customer = orm.Customer(full_name=f"bench-{uuid.uuid4().hex[:8]}")
+        db.add(customer)
+        db.flush()
+        account = orm.Account(customer_id=customer.id, balance=0)
+        db.add(account)
+        db.flush()
+        db.execute(
+            text(
+                """
+                INSERT INTO tbl_transactions (account_id, type, amount, idempotency_key, created_at)
+                SELECT :account_id, 'deposit', 1.00, :prefix || g, now() - make_interval(secs => g)
+                FROM generate_series(1, :rows) AS g
+                """
+            ),
+            {"account_id": account.id, "prefix": f"bench-{uuid.uuid4().hex}-", "rows": rows},
+        )
+        db.commit()
+        db.execute(text("ANALYZE tbl_transactions"))
+        db.commit()
+        return account.id
+
+
+def time_it(fn, repeat: int) -> float:
+    # Median wall time in milliseconds.
+    samples = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        fn()
+        samples.append(time.perf_counter() - start)
+    return statistics.median(samples) * 1000
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--rows", type=int, default=1_000_000)
+    parser.add_argument("--page", type=int, default=1000)
+    parser.add_argument("--page-size", type=int, default=50)
+    parser.add_argument("--repeat", type=int, default=20)
+    args = parser.parse_args()
+
+    orm.Base.metadata.create_all(bind=engine)
+    account_id = create_history(args.rows)
+    session_info = SessionInfo(
+        id=0, card_id=0, token_hash="", expires_at=datetime.max.replace(tzinfo=timezone.utc), account_id=account_id
+    )
+    offset = (args.page - 1) * args.page_size
+
+    with SessionLocal() as db:
+        # Cursor pointing just before page N, found once with OFFSET.
+        created_at, tx_id = db.execute(
+            text(
+                """
+                SELECT created_at, id FROM tbl_transactions WHERE account_id = :a
+                ORDER BY created_at DESC, id DESC OFFSET :o LIMIT 1
+                """
+            ),
+            {"a": account_id, "o": offset - 1},
+        ).one()
+        deep_cursor = _encode_cursor(created_at, tx_id)
+
+        def offset_page() -> None:
+            db.execute(
+                text(
+                    """
+                    SELECT id, type, amount, created_at FROM tbl_transactions WHERE account_id = :a
+                    ORDER BY created_at DESC, id DESC OFFSET :o LIMIT :l
+                    """
+                ),
+                {"a": account_id, "o": offset, "l": args.page_size},
+            ).all()
+
+        first = time_it(lambda: _recent_transactions(db, session_info, args.page_size), args.repeat)
+        deep = time_it(
+            lambda: _recent_transactions(db, session_info, args.page_size, deep_cursor), args.repeat
+        )
+        with_offset = time_it(offset_page, args.repeat)
+
+    print(f"rows={args.rows} page_size={args.page_size}")
+    print(f"keyset page 1      : {first:8.2f} ms")
+    print(f"keyset page {args.page:<7}: {deep:8.2f} ms")
+    print(f"OFFSET page {args.page:<7}: {with_offset:8.2f} ms")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,202 @@
+"""Contention benchmark: many cards hammering deposits and withdrawals on one joint account.
+
+Provisions one customer with one account (--opening balance) and --cards cards,
+then runs the API with MUTATION_COALESCING off and on. All --concurrency
+users log in first, each with its own card, then post random deposits and
+withdrawals until --duration is up; withdrawals are sized so that many are refused. After
+each run the account is checked against the responses: the balance equals the
+opening balance plus every accepted move, it never went negative, and every
+accepted key has exactly one transaction row and every refused one none.
+
+Usage (from the backend folder):
+    python -m benchmarks.contention --cards 50 --concurrency 50 --duration 20
+"""
+
+import argparse
+import asyncio
+import os
+import random
+import sys
+import time
+import uuid
+from decimal import Decimal
+from typing import Dict, List, Tuple
+
+import httpx
+
+from .load_flows import PIN, percentile, start_server
+
+_COALESCER = "atm_mutation_coalescer"
+
+
+def provision_account(cards: int, opening: Decimal) -> Tuple[int, List[str]]:
+    # One customer and account shared by cards cards with the load-test PIN; returns (account id, tokens).
+    from sqlalchemy import text
+
+    from app.db import models as orm
+    from app.db.base import engine
+    from app.security.hashing import hash_pin
+
+    orm.Base.metadata.create_all(bind=engine)
+    run = uuid.uuid4().hex[:8]
+    with engine.begin() as conn:
+        account_id = conn.execute(
+            text(
+                """
+                WITH c AS (
+                    INSERT INTO tbl_customers (full_name) VALUES ('contention-' || :run) RETURNING id
+                ), cards AS (
+                    INSERT INTO tbl_cards (customer_id, token, bin, last4, network, pin_hash)
+                    SELECT c.id, 'HOT_' || :run || '-' || g, '400000', '0000', 'visa', :pin_hash
+                    FROM c, generate_series(1, :n) AS g
+                )
+                INSERT INTO tbl_accounts (customer_id, balance) SELECT id, :opening FROM c RETURNING id
+                """
+            ),
+            {"run": run, "n": cards, "pin_hash": hash_pin(PIN), "opening": opening},
+        ).scalar_one()
+    return account_id, [f"HOT_{run}-{n}" for n in range(1, cards + 1)]
+
+
+def check_invariants(account_id: int, opening: Decimal, accepted: Dict[str, Decimal], refused: List[str]) -> List[str]:
+    # Compare the database with what the clients were told; returns the violations.
+    from sqlalchemy import func, select
+
+    from app.db import models as orm
+    from app.db.base import SessionLocal
+
+    problems = []
+    with SessionLocal() as db:
+        balance = db.execute(select(orm.Account.balance).where(orm.Account.id == account_id)).scalar_one()
+        rows = dict(
+            db.execute(
+                select(orm.Transaction.idempotency_key, func.count())
+                .where(orm.Transaction.account_id == account_id)
+                .group_by(orm.Transaction.idempotency_key)
+            ).all()
+        )
+        lowest = db.execute(
+            select(func.min(orm.IdempotencyRecord.balance)).where(orm.IdempotencyRecord.account_id == account_id)
+        ).scalar_one()
+    expected = opening + sum(accepted.values(), Decimal("0"))
+    if balance != expected:
+        problems.append(f"balance {balance} != opening + accepted moves {expected}")
+    if lowest is not None and lowest < 0:
+        problems.append(f"balance went negative ({lowest})")
+    if set(rows) != set(accepted) or any(count != 1 for count in rows.values()):
+        problems.append(f"{len(rows)} transaction rows for {len(accepted)} accepted requests")
+    if set(rows) & set(refused):
+        problems.append("a refused withdrawal left a transaction row")
+    return problems
+
+
+async def _coalescer_stats(client: httpx.AsyncClient) -> Dict[str, float]:
+    stats = {}
+    for line in (await client.get("/metrics")).text.splitlines():
+        if line.startswith(_COALESCER + "{"):
+            stat = line.split('"')[1]
+            stats[stat] = float(line.rsplit(" ", 1)[1])
+    return stats
+
+
+async def drive(base_url: str, cards: List[str], args: argparse.Namespace) -> dict:
+    latencies: List[float] = []
+    accepted: Dict[str, Decimal] = {}
+    refused: List[str] = []
+    errors = 0
+    limits = httpx.Limits(max_connections=1, max_keepalive_connections=1)
+
+    async def login(n: int) -> httpx.Cookies:
+        async with httpx.AsyncClient(base_url=base_url, timeout=60.0) as client:
+            resp = await client.post("/auth/pin", json={"cardToken": cards[n % len(cards)], "pin": PIN})
+            resp.raise_for_status()
+            return client.cookies
+
+    async def user(n: int, stop_at: float) -> None:
+        nonlocal errors
+        rng = random.Random(n)
+        while time.monotonic() < stop_at:
+            deposit = rng.random() < 0.5
+            amount = Decimal(rng.randint(100, 5000) if deposit else rng.randint(200, 10000)) / 100
+            key = str(uuid.uuid4())
+            started = time.perf_counter()
+            resp = await clients[n].post(
+                "/account/deposit" if deposit else "/account/withdraw",
+                json={"amount": str(amount), "idempotencyKey": key},
+            )
+            latencies.append(time.perf_counter() - started)
+            if resp.status_code == 200:
+                accepted[key] = amount if deposit else -amount
+            elif resp.status_code == 400 and not deposit:
+                refused.append(key)
+            else:
+                errors += 1
+
+    # Log everyone in first so bcrypt does not eat into the measured window; the clients connect
+    # afterwards so no keep-alive connection idles out while the slower logins finish.
+    sessions = await asyncio.gather(*(login(n) for n in range(args.concurrency)))
+    clients = [httpx.AsyncClient(base_url=base_url, limits=limits, timeout=60.0, cookies=c) for c in sessions]
+    try:
+        async with httpx.AsyncClient(base_url=base_url) as probe:
+            before = await _coalescer_stats(probe)
+            started = time.monotonic()
+            await asyncio.gather(*(user(n, started + args.duration) for n in range(args.concurrency)))
+            elapsed = time.monotonic() - started
+            after = await _coalescer_stats(probe)
+    finally:
+        for client in clients:
+            await client.aclose()
+    latencies.sort()
+    batches = after.get("batches", 0) - before.get("batches", 0)
+    operations = after.get("operations", 0) - before.get("operations", 0)
+    return {
+        "requests": len(latencies),
+        "rps": len(latencies) / elapsed,
+        "p50_ms": percentile(latencies, 50) * 1000,
+        "p99_ms": percentile(latencies, 99) * 1000,
+        "accepted": accepted,
+        "refused": refused,
+        "errors": errors,
+        "ops_per_batch": operations / batches if batches else None,
+    }
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--cards", type=int, default=50)
+    parser.add_argument("--concurrency", type=int, default=50)
+    parser.add_argument("--duration", type=float, default=20.0)
+    parser.add_argument("--opening", type=Decimal, default=Decimal("500.00"), help="opening balance")
+    parser.add_argument("--modes", default="off,on", help="MUTATION_COALESCING settings to run, in order")
+    parser.add_argument("--async", dest="db_async", action="store_true", help="run with DB_ASYNC=true")
+    parser.add_argument("--port", type=int, default=8767)
+    args = parser.parse_args()
+
+    failed = False
+    print(
+        f"{'coalescing':<11} {'req/s':>8} {'p50 ms':>8} {'p99 ms':>8} "
+        f"{'accepted':>9} {'refused':>8} {'ops/batch':>10}  invariants"
+    )
+    for mode in args.modes.split(","):
+        account_id, cards = provision_account(args.cards, args.opening)
+        os.environ["MUTATION_COALESCING"] = "true" if mode == "on" else "false"
+        proc = start_server(args.port, 1, args.db_async)
+        try:
+            result = asyncio.run(drive(f"http://127.0.0.1:{args.port}", cards, args))
+        finally:
+            proc.terminate()
+            proc.wait()
+        problems = check_invariants(account_id, args.opening, result["accepted"], result["refused"])
+        if result["errors"]:
+            problems.append(f"{result['errors']} unexpected responses")
+        failed = failed or bool(problems)
+        per_batch = f"{result['ops_per_batch']:.1f}" if result["ops_per_batch"] else "-"
+        print(
+            f"{mode:<11} {result['rps']:>8.1f} {result['p50_ms']:>8.1f} {result['p99_ms']:>8.1f} "
+            f"{len(result['accepted']):>9} {len(result['refused']):>8} {per_batch:>10}  {'; '.join(problems) or 'ok'}"
+        )
+    sys.exit(1 if failed else 0)
+
+
+if __name__ == "__main__":
+    main()
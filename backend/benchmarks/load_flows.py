@@ -0,0 +1,266 @@
+"""End-to-end load test of the ATM flows against create_app() and DATABASE_URL.
+
+Provisions --cards synthetic cards (one customer, account and card each), starts
+uvicorn on app.main:create_app, and runs --concurrency virtual users. Each user
+loops: login, --ops-per-session operations drawn from --mix, logout. It reports
+req/s, p50/p95/p99 and DB statements per request for every endpoint. The
+statement counts are scraped from /metrics, so they come from one worker when
+--workers > 1. Results are written as JSON; pass --baseline to compare with an
+earlier run.
+
+Usage (from the backend folder):
+    python -m benchmarks.load_flows --cards 200 --concurrency 50 --duration 30 \\
+        --mix balance:50,transactions:20,deposit:15,withdraw:15 --out results.json
+"""
+
+import argparse
+import asyncio
+import json
+import os
+import random
+import re
+import subprocess
+import sys
+import time
+import uuid
+from collections import defaultdict
+from typing import Dict, List, Optional, Tuple
+
+import httpx
+
+PIN = "2468"
+OPERATIONS = {
+    "balance": ("GET", "/account/balance", "/account/balance"),
+    "transactions": ("GET", "/transactions?limit=10", "/transactions"),
+    "deposit": ("POST", "/account/deposit", "/account/deposit"),
+    "withdraw": ("POST", "/account/withdraw", "/account/withdraw"),
+}
+_PER_REQUEST = re.compile(r'^atm_db_statements_per_request_(sum|count)\{route="([^"]+)"\} (\S+)$', re.M)
+
+
+def provision_cards(count: int) -> List[str]:
+    # Insert count customers, well-funded accounts and cards sharing one PIN hash; returns card tokens.
+    from sqlalchemy import text
+
+    from app.db import models as orm
+    from app.db.base import engine
+    from app.security.hashing import hash_pin
+
+    orm.Base.metadata.create_all(bind=engine)
+    run = uuid.uuid4().hex[:8]
+    with engine.begin() as conn:
+        conn.execute(
+            text(
+                """
+                WITH c AS (
+                    INSERT INTO tbl_customers (full_name)
+                    SELECT 'load-' || :run || '-' || g FROM generate_series(1, :n) AS g
+                    RETURNING id, full_name
+                ), a AS (
+                    INSERT INTO tbl_accounts (customer_id, balance) SELECT id, 1000000 FROM c
+                )
+                INSERT INTO tbl_cards (customer_id, token, bin, last4, network, pin_hash)
+                SELECT id, 'LOAD_' || substr(full_name, 6), '400000', '0000', 'visa', :pin_hash FROM c
+                """
+            ),
+            {"run": run, "n": count, "pin_hash": hash_pin(PIN)},
+        )
+    return [f"LOAD_{run}-{n}" for n in range(1, count + 1)]
+
+
+def start_server(port: int, workers: int, db_async: bool) -> subprocess.Popen:
+    # Launch uvicorn on the app factory and wait until it answers.
+    env = dict(os.environ, DB_ASYNC="true" if db_async else "false", METRICS_ENABLED="true")
+    proc = subprocess.Popen(
+        [
+            sys.executable, "-m", "uvicorn", "app.main:create_app", "--factory",
+            "--port", str(port), "--workers", str(workers), "--log-level", "warning",
+        ],
+        env=env,
+    )
+    deadline = time.monotonic() + 30
+    while time.monotonic() < deadline:
+        try:
+            httpx.get(f"http://127.0.0.1:{port}/metrics", timeout=1.0)
+            return proc
+        except httpx.HTTPError:
+            time.sleep(0.2)
+    proc.kill()
+    raise RuntimeError("server did not start")
+
+
+def parse_mix(spec: str) -> Tuple[List[str], List[float]]:
+    # "balance:50,deposit:10" -> (["balance", "deposit"], [50.0, 10.0])
+    names, weights = [], []
+    for part in spec.split(","):
+        name, _, weight = part.partition(":")
+        if name not in OPERATIONS:
+            raise SystemExit(f"unknown operation {name!r}; choose from {', '.join(OPERATIONS)}")
+        names.append(name)
+        weights.append(float(weight or 1))
+    return names, weights
+
+
+async def scrape_statements(client: httpx.AsyncClient) -> Dict[str, Tuple[float, float]]:
+    # route -> (statements, requests) from the per-request histogram.
+    totals: Dict[str, List[float]] = defaultdict(lambda: [0.0, 0.0])
+    text = (await client.get("/metrics")).text
+    for kind, route, value in _PER_REQUEST.findall(text):
+        totals[route][0 if kind == "sum" else 1] = float(value)
+    return {route: (s, c) for route, (s, c) in totals.items()}
+
+
+def percentile(sorted_values: List[float], pct: float) -> float:
+    if not sorted_values:
+        return 0.0
+    index = min(len(sorted_values) - 1, max(0, int(round(pct / 100 * len(sorted_values))) - 1))
+    return sorted_values[index]
+
+
+async def drive(base_url: str, cards: List[str], args: argparse.Namespace) -> dict:
+    names, weights = parse_mix(args.mix)
+    latencies: Dict[str, List[float]] = defaultdict(list)
+    errors: Dict[str, int] = defaultdict(int)
+    stop_at = time.monotonic() + args.duration
+    limits = httpx.Limits(max_connections=1, max_keepalive_connections=1)
+
+    async def timed(client: httpx.AsyncClient, route: str, method: str, url: str, **kwargs) -> bool:
+        started = time.perf_counter()
+        try:
+            resp = await client.request(method, url, **kwargs)
+            ok = resp.status_code == 200
+        except httpx.HTTPError:
+            ok = False
+        latencies[route].append(time.perf_counter() - started)
+        if not ok:
+            errors[route] += 1
+        return ok
+
+    async def user(n: int) -> None:
+        rng = random.Random(n)
+        async with httpx.AsyncClient(base_url=base_url, limits=limits, timeout=30.0) as client:
+            while time.monotonic() < stop_at:
+                token = cards[rng.randrange(len(cards))]
+                if not await timed(client, "/auth/pin", "POST", "/auth/pin", json={"cardToken": token, "pin": PIN}):
+                    continue
+                for name in rng.choices(names, weights, k=args.ops_per_session):
+                    method, url, route = OPERATIONS[name]
+                    body = None
+                    if method == "POST":
+                        body = {"amount": "1.00", "idempotencyKey": str(uuid.uuid4())}
+                    await timed(client, route, method, url, json=body)
+                await timed(client, "/auth/logout", "POST", "/auth/logout")
+
+    async with httpx.AsyncClient(base_url=base_url) as probe:
+        before = await scrape_statements(probe)
+        started = time.monotonic()
+        await asyncio.gather(*(user(n) for n in range(args.concurrency)))
+        elapsed = time.monotonic() - started
+        after = await scrape_statements(probe)
+
+    endpoints = {}
+    for route, samples in sorted(latencies.items()):
+        samples.sort()
+        old_statements, old_requests = before.get(route, (0.0, 0.0))
+        new_statements, new_requests = after.get(route, (0.0, 0.0))
+        statements, requests = new_statements - old_statements, new_requests - old_requests
+        endpoints[route] = {
+            "requests": len(samples),
+            "errors": errors[route],
+            "rps": len(samples) / elapsed,
+            "p50_ms": percentile(samples, 50) * 1000,
+            "p95_ms": percentile(samples, 95) * 1000,
+            "p99_ms": percentile(samples, 99) * 1000,
+            "db_statements_per_request": statements / requests if requests else None,
+        }
+    everything = sorted(s for samples in latencies.values() for s in samples)
+    return {
+        "elapsed_sec": elapsed,
+        "total": {
+            "requests": len(everything),
+            "errors": sum(errors.values()),
+            "rps": len(everything) / elapsed,
+            "p50_ms": percentile(everything, 50) * 1000,
+            "p95_ms": percentile(everything, 95) * 1000,
+            "p99_ms": percentile(everything, 99) * 1000,
+        },
+        "endpoints": endpoints,
+    }
+
+
+def git_commit() -> Optional[str]:
+    try:
+        return subprocess.run(
+            ["git", "rev-parse", "--short", "HEAD"], capture_output=True, text=True, check=True
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def print_report(result: dict, baseline: Optional[dict]) -> None:
+    def delta(old: dict, key: str, value: float) -> str:
+        if not old.get(key):
+            return "-"
+        return f"{(value - old[key]) / old[key] * 100:+.1f}%"
+
+    header = f"{'route':<20} {'req':>7} {'err':>5} {'req/s':>9} {'p50 ms':>9} {'p95 ms':>9} {'p99 ms':>9} {'stmts/req':>9}"
+    if baseline is not None:
+        header += f" {'d req/s':>8} {'d p99':>8}"
+    print(header)
+    rows = list(result["endpoints"].items()) + [("total", result["total"])]
+    for route, row in rows:
+        stmts = row.get("db_statements_per_request")
+        line = (
+            f"{route:<20} {row['requests']:>7} {row['errors']:>5} {row['rps']:>9.1f} "
+            f"{row['p50_ms']:>9.2f} {row['p95_ms']:>9.2f} {row['p99_ms']:>9.2f} "
+            f"{'-' if stmts is None else f'{stmts:.2f}':>9}"
+        )
+        if baseline is not None:
+            old = baseline["total"] if route == "total" else baseline["endpoints"].get(route, {})
+            line += f" {delta(old, 'rps', row['rps']):>8} {delta(old, 'p99_ms', row['p99_ms']):>8}"
+        print(line)
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--cards", type=int, default=200)
+    parser.add_argument("--concurrency", type=int, default=50)
+    parser.add_argument("--duration", type=float, default=30.0)
+    parser.add_argument("--mix", default="balance:50,transactions:20,deposit:15,withdraw:15")
+    parser.add_argument("--ops-per-session", type=int, default=8)
+    parser.add_argument("--workers", type=int, default=1)
+    parser.add_argument("--async", dest="db_async", action="store_true", help="run with DB_ASYNC=true")
+    parser.add_argument("--port", type=int, default=8766)
+    parser.add_argument("--out", help="write results as JSON to this file")
+    parser.add_argument("--baseline", help="JSON from an earlier run to compare against")
+    args = parser.parse_args()
+    parse_mix(args.mix)
+
+    cards = provision_cards(args.cards)
+    proc = start_server(args.port, args.workers, args.db_async)
+    try:
+        result = asyncio.run(drive(f"http://127.0.0.1:{args.port}", cards, args))
+    finally:
+        proc.terminate()
+        proc.wait()
+
+    result = {
+        "commit": git_commit(),
+        "config": {
+            key: getattr(args, key)
+            for key in ("cards", "concurrency", "duration", "mix", "ops_per_session", "workers", "db_async")
+        },
+        **result,
+    }
+    baseline = None
+    if args.baseline:
+        with open(args.baseline, encoding="utf-8") as f:
+            baseline = json.load(f)
+    print_report(result, baseline)
+    if args.out:
+        with open(args.out, "w", encoding="utf-8") as f:
+            json.dump(result, f, indent=2)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,227 @@
+"""Microbenchmarks for per-request primitives, checked against in-repo baselines.
+
+Each benchmark is calibrated so one round takes at least --min-time seconds, run
+for --rounds rounds, and summarised by its median time per call. A benchmark
+fails when its median exceeds the stored baseline by more than --tolerance.
+Baselines live in benchmarks/baselines/micro.json; refresh them with --save
+after an intended change, on the machine the comparison will run on.
+
+Usage (from the backend folder; no database needed):
+    python -m benchmarks.micro              # compare, exit 1 on regression
+    python -m benchmarks.micro --save       # record new baselines
+    python -m benchmarks.micro -k session   # only benchmarks whose name contains "session"
+"""
+
+import argparse
+import json
+import os
+import platform
+import statistics
+import sys
+import time
+from datetime import datetime, timedelta, timezone
+from decimal import Decimal
+from typing import Callable, Dict, List, Tuple
+
+# require_session imports the db package, which builds (but never connects) an engine.
+os.environ.setdefault("DATABASE_URL", "postgresql+psycopg2://bench@localhost/bench")
+
+from starlette.requests import Request  # noqa: E402
+from starlette.responses import JSONResponse  # noqa: E402
+
+from app.cache.sessions import get_session_cache  # noqa: E402
+from app.deps import require_session  # noqa: E402
+from app.domain import encoders  # noqa: E402
+from app.domain.models import (  # noqa: E402
+    MoneyMutationRequest,
+    PinLoginRequest,
+    TransactionItem,
+    TransactionsResponse,
+)
+from app.security.hashing import hash_pin, verify_pin  # noqa: E402
+from app.security.tokens import hash_token, new_token  # noqa: E402
+
+BASELINE_PATH = os.path.join(os.path.dirname(__file__), "baselines", "micro.json")
+
+Benchmark = Callable[[], object]
+
+
+class _StubResult:
+    def __init__(self, row: tuple) -> None:
+        self._row = row
+
+    def first(self) -> tuple:
+        return self._row
+
+
+class StubDB:
+    """Stands in for a Session: every execute() returns the same session row."""
+
+    def __init__(self, row: tuple) -> None:
+        self._result = _StubResult(row)
+
+    def execute(self, statement) -> _StubResult:
+        return self._result
+
+
+def _request_with_cookie(raw_token: str) -> Request:
+    return Request({"type": "http", "headers": [(b"cookie", f"atm_sess={raw_token}".encode())]})
+
+
+NEXT_CURSOR = "MjAyNS0wMS0wMVQwMDowMDowMCswMDowMHwx"
+
+
+def _transaction_rows(count: int) -> List[encoders.TransactionRow]:
+    now = datetime.now(timezone.utc)
+    return [(n, "deposit" if n % 2 else "withdraw", Decimal("12.34"), now) for n in range(count)]
+
+
+def _transactions(count: int) -> TransactionsResponse:
+    items = [
+        TransactionItem(id=tx_id, type=tx_type, amount=amount, createdAt=created_at)
+        for tx_id, tx_type, amount, created_at in _transaction_rows(count)
+    ]
+    return TransactionsResponse(items=items, nextCursor=NEXT_CURSOR)
+
+
+def _dto_items(rows: List[encoders.TransactionRow]) -> List[TransactionItem]:
+    return [TransactionItem(id=i, type=t, amount=a, createdAt=c) for i, t, a, c in rows]
+
+
+def _dto_dump_json(rows: List[encoders.TransactionRow]) -> bytes:
+    # Build the DTO and let it serialize itself, with no response_model pass.
+    return TransactionsResponse(items=_dto_items(rows), nextCursor=NEXT_CURSOR).model_dump_json().encode()
+
+
+def _dto_route_body(rows: List[encoders.TransactionRow]) -> bytes:
+    # The /transactions body as FastAPI built it before: DTOs, response_model re-validation, JSONResponse.
+    response = TransactionsResponse(items=_dto_items(rows), nextCursor=NEXT_CURSOR)
+    return JSONResponse(TransactionsResponse.model_validate(response.model_dump()).model_dump(mode="json")).body
+
+
+def build_benchmarks() -> List[Tuple[str, Benchmark]]:
+    raw_token = new_token()
+    token_hash = hash_token(raw_token)
+    pin_hash = hash_pin("1234")
+    expires = datetime.now(timezone.utc) + timedelta(hours=1)
+    session_row = (1, 1, token_hash, expires, None, 1)
+    stub_db = StubDB(session_row)
+    cookie_request = _request_with_cookie(raw_token)
+    responses = {count: _transactions(count) for count in (10, 100, 10_000)}
+    rows = {count: _transaction_rows(count) for count in (10, 100, 10_000)}
+
+    def require_session_cached() -> object:
+        return require_session(cookie_request, stub_db)
+
+    def require_session_miss() -> object:
+        get_session_cache().invalidate(token_hash)
+        return require_session(cookie_request, stub_db)
+
+    return [
+        ("new_token", new_token),
+        ("hash_token", lambda: hash_token(raw_token)),
+        ("verify_pin", lambda: verify_pin("1234", pin_hash)),
+        ("PinLoginRequest", lambda: PinLoginRequest.model_validate({"cardToken": "TOK_VISA_1111", "pin": "1234"})),
+        (
+            "MoneyMutationRequest",
+            lambda: MoneyMutationRequest.model_validate({"amount": "12.345", "idempotencyKey": "k-1"}),
+        ),
+        ("TransactionsResponse[10]", responses[10].model_dump_json),
+        ("TransactionsResponse[100]", responses[100].model_dump_json),
+        ("TransactionsResponse[10000]", responses[10_000].model_dump_json),
+        ("dto_route_body[10]", lambda: _dto_route_body(rows[10])),
+        ("dto_route_body[100]", lambda: _dto_route_body(rows[100])),
+        ("dto_dump_json[10]", lambda: _dto_dump_json(rows[10])),
+        ("dto_dump_json[100]", lambda: _dto_dump_json(rows[100])),
+        ("dto_dump_json[10000]", lambda: _dto_dump_json(rows[10_000])),
+        ("transactions_page[10]", lambda: encoders.transactions_page(rows[10], NEXT_CURSOR)),
+        ("transactions_page[100]", lambda: encoders.transactions_page(rows[100], NEXT_CURSOR)),
+        ("transactions_page[10000]", lambda: encoders.transactions_page(rows[10_000], NEXT_CURSOR)),
+        ("require_session[cached]", require_session_cached),
+        ("require_session[miss]", require_session_miss),
+    ]
+
+
+def measure(fn: Benchmark, rounds: int, min_time: float) -> Dict[str, float]:
+    # Calibrate iterations per round, then return per-call statistics in microseconds.
+    iterations = 1
+    while True:
+        started = time.perf_counter()
+        for _ in range(iterations):
+            fn()
+        elapsed = time.perf_counter() - started
+        if elapsed >= min_time or iterations >= 1 << 20:
+            break
+        iterations *= 2 if elapsed == 0 else max(2, min(10, int(min_time / elapsed) + 1))
+    samples = []
+    for _ in range(rounds):
+        started = time.perf_counter()
+        for _ in range(iterations):
+            fn()
+        samples.append((time.perf_counter() - started) / iterations * 1e6)
+    return {
+        "median_us": statistics.median(samples),
+        "min_us": min(samples),
+        "mean_us": statistics.fmean(samples),
+        "iterations": iterations,
+    }
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--rounds", type=int, default=7)
+    parser.add_argument("--min-time", type=float, default=0.05, help="seconds per round")
+    parser.add_argument("--tolerance", type=float, default=0.5, help="allowed slowdown, 0.5 = +50%%")
+    parser.add_argument("--save", action="store_true", help="write results as the new baselines")
+    parser.add_argument("-k", dest="keyword", help="only run benchmarks whose name contains this")
+    args = parser.parse_args()
+
+    baselines: Dict[str, Dict[str, float]] = {}
+    if os.path.exists(BASELINE_PATH):
+        with open(BASELINE_PATH, encoding="utf-8") as f:
+            baselines = json.load(f)["benchmarks"]
+
+    results: Dict[str, Dict[str, float]] = {}
+    regressions = []
+    print(f"{'benchmark':<30} {'median us':>12} {'min us':>12} {'baseline us':>12} {'change':>8}")
+    for name, fn in build_benchmarks():
+        if args.keyword and args.keyword not in name:
+            continue
+        stats = measure(fn, args.rounds, args.min_time)
+        results[name] = stats
+        baseline = baselines.get(name, {}).get("median_us")
+        change = ""
+        if baseline:
+            ratio = stats["median_us"] / baseline - 1
+            change = f"{ratio * 100:+.1f}%"
+            if ratio > args.tolerance:
+                regressions.append(name)
+                change += " !"
+        print(
+            f"{name:<30} {stats['median_us']:>12.2f} {stats['min_us']:>12.2f} "
+            f"{f'{baseline:.2f}' if baseline else '-':>12} {change:>8}"
+        )
+
+    if args.save:
+        if args.keyword:
+            results = dict(baselines, **results)
+        os.makedirs(os.path.dirname(BASELINE_PATH), exist_ok=True)
+        with open(BASELINE_PATH, "w", encoding="utf-8") as f:
+            json.dump(
+                {
+                    "machine": {"python": platform.python_version(), "platform": platform.platform()},
+                    "benchmarks": {name: {"median_us": round(s["median_us"], 3)} for name, s in results.items()},
+                },
+                f,
+                indent=2,
+                sort_keys=True,
+            )
+            f.write("\n")
+        print(f"baselines written to {BASELINE_PATH}")
+    elif regressions:
+        print(f"regressed beyond {args.tolerance:.0%}: {', '.join(regressions)}", file=sys.stderr)
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
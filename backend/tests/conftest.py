@@ -0,0 +1,39 @@
+"""Shared test setup: the `db` marker for tests that need Postgres, and a logged-in app client."""
+
+import os
+from contextlib import contextmanager
+
+import pytest
+
+
+def pytest_configure(config):
+    config.addinivalue_line("markers", "db: needs Postgres at DATABASE_URL; skipped when it is not set")
+
+
+def pytest_collection_modifyitems(config, items):
+    if os.getenv("DATABASE_URL"):
+        return
+    skip = pytest.mark.skip(reason="DATABASE_URL not set; test needs Postgres")
+    for item in items:
+        if "db" in item.keywords:
+            item.add_marker(skip)
+
+
+@contextmanager
+def _logged_in(card_token, pin):
+    from fastapi.testclient import TestClient
+    from app.db.seeds import seed
+    from app.main import create_app
+
+    seed()
+    with TestClient(create_app(), client=("127.0.0.1", 50000)) as client:
+        resp = client.post("/auth/pin", json={"cardToken": card_token, "pin": pin})
+        assert resp.status_code == 200, resp.text
+        yield client
+        client.post("/auth/logout")
+
+
+@pytest.fixture(scope="session")
+def login():
+    # `with login(card_token, pin) as client:` seeds the demo data, starts the app and logs in; logs out on exit.
+    return _logged_in
@@ -0,0 +1,38 @@
+from datetime import datetime, timedelta, timezone
+
+from app.services.activity import ActivityTracker
+
+
+def test_activity_is_coalesced_per_session():
+    batches = []
+    tracker = ActivityTracker(batches.append, flush_interval_sec=60, max_pending=100)
+    t0 = datetime(2025, 1, 1, tzinfo=timezone.utc)
+    tracker.record(1, t0)
+    tracker.record(1, t0 + timedelta(seconds=5))
+    tracker.record(1, t0 + timedelta(seconds=2))
+    tracker.record(2, t0)
+    assert tracker.pending() == 2
+
+    assert tracker.flush() == 2
+    assert batches == [{1: t0 + timedelta(seconds=5), 2: t0}]
+    assert tracker.flush() == 0
+
+
+def test_activity_flushes_when_batch_is_full():
+    batches = []
+    tracker = ActivityTracker(batches.append, flush_interval_sec=60, max_pending=3)
+    now = datetime.now(timezone.utc)
+    for session_id in range(3):
+        tracker.record(session_id, now)
+    assert len(batches) == 1 and len(batches[0]) == 3
+    assert tracker.pending() == 0
+
+
+def test_failed_flush_keeps_activity_pending():
+    def failing_writer(batch):
+        raise RuntimeError("db down")
+
+    tracker = ActivityTracker(failing_writer, flush_interval_sec=60, max_pending=100)
+    tracker.record(7, datetime.now(timezone.utc))
+    assert tracker.flush() == 0
+    assert tracker.pending() == 1
@@ -0,0 +1,44 @@
+from app.services.audit import AuditLogger
+
+
+def test_events_are_batched_until_flush():
+    batches = []
+    audit = AuditLogger(batches.append, flush_interval_sec=60, max_batch=100, max_queue=1000)
+    audit.log("pin_fail", "deny", card_id=1)
+    audit.log("pin_fail", "deny", card_id=2)
+    assert batches == []
+    assert audit.stats()["queued"] == 2
+
+    assert audit.flush() == 2
+    assert [[e.card_id for e in batch] for batch in batches] == [[1, 2]]
+    assert audit.stats() == {"queued": 0, "flushed": 2, "dropped": 0, "failed_flushes": 0}
+
+
+def test_full_batch_flushes_and_full_queue_drops():
+    batches = []
+    audit = AuditLogger(batches.append, flush_interval_sec=60, max_batch=3, max_queue=1000)
+    for card_id in range(7):
+        audit.log("pin_fail", "deny", card_id=card_id)
+    assert [len(batch) for batch in batches] == [3, 3]
+
+    def broken(batch):
+        raise RuntimeError("db down")
+
+    audit = AuditLogger(broken, flush_interval_sec=60, max_batch=10, max_queue=2)
+    audit.log("pin_fail", "deny")
+    audit.log("pin_fail", "deny")
+    audit.log("pin_fail", "deny")
+    assert audit.flush() == 0
+    assert audit.stats() == {"queued": 2, "flushed": 0, "dropped": 1, "failed_flushes": 1}
+
+
+def test_sync_actions_skip_the_queue():
+    batches = []
+    audit = AuditLogger(
+        batches.append, flush_interval_sec=60, max_batch=100, max_queue=100, sync_actions=frozenset({"lock"})
+    )
+    audit.log("lock", "ok", card_id=5)
+    audit.log("pin_fail", "deny", card_id=5, sync=True)
+    audit.log("pin_fail", "deny", card_id=5)
+    assert [[e.action for e in batch] for batch in batches] == [["lock"], ["pin_fail"]]
+    assert audit.stats()["queued"] == 1
@@ -0,0 +1,134 @@
+"""Versioned balance cache: ordering, evictions during reads, write-through and cross-worker eviction."""
+
+import time
+import uuid
+from datetime import datetime, timedelta, timezone
+from decimal import Decimal
+
+import pytest
+
+
+def test_older_versions_and_reads_racing_an_eviction_are_not_cached():
+    from app.cache.balances import BalanceCache
+
+    cache = BalanceCache(max_size=10, max_staleness_sec=60)
+    v1 = datetime(2026, 1, 1, tzinfo=timezone.utc)
+    v2 = v1 + timedelta(microseconds=1)
+
+    cache.write(1, Decimal("20.00"), v2)
+    cache.fill(1, Decimal("10.00"), v1, cache.ticket())
+    assert cache.get(1) == Decimal("20.00")
+
+    ticket = cache.ticket()
+    cache.evict("1")
+    cache.fill(1, Decimal("20.00"), v2, ticket)
+    assert cache.get(1) is None
+    cache.fill(1, Decimal("30.00"), v2, cache.ticket())
+    assert cache.get(1) == Decimal("30.00")
+
+    assert not BalanceCache(max_size=10, max_staleness_sec=0).enabled
+    short = BalanceCache(max_size=10, max_staleness_sec=0.05)
+    short.write(1, Decimal("1.00"), v1)
+    time.sleep(0.06)
+    assert short.get(1) is None
+
+
+@pytest.mark.db
+def test_balance_is_written_through_and_evicted_by_other_workers(login):
+    from sqlalchemy import event, text
+    from app.cache import invalidation
+    from app.cache.balances import get_balance_cache
+    from app.db.base import SessionLocal, engine
+
+    statements = []
+    with login("TOK_VISA_1111", "1234") as client:
+        assert invalidation.get_invalidation_bus().connected.wait(5)
+        resp = client.post("/account/deposit", json={"amount": "1.00", "idempotencyKey": str(uuid.uuid4())})
+        deposited = resp.json()["balance"]
+
+        def capture(conn, cursor, statement, *args):
+            statements.append(statement)
+
+        event.listen(engine, "before_cursor_execute", capture)
+        try:
+            assert client.get("/account/balance").json()["balance"] == deposited
+        finally:
+            event.remove(engine, "before_cursor_execute", capture)
+        assert not any("tbl_accounts.balance" in statement for statement in statements)
+
+        # Another process changes the account and notifies: this worker drops its entry.
+        with SessionLocal() as db:
+            account_id = db.execute(
+                text(
+                    "UPDATE tbl_accounts SET updated_at = clock_timestamp() WHERE id = "
+                    "(SELECT a.id FROM tbl_accounts a JOIN tbl_cards c ON c.customer_id = a.customer_id "
+                    "WHERE c.token = 'TOK_VISA_1111') RETURNING id"
+                )
+            ).scalar_one()
+            stamp = int(time.time() * 1000)
+            db.execute(
+                text("SELECT pg_notify(:channel, :payload)"),
+                {"channel": invalidation.CHANNEL, "payload": f"peer|{stamp}|a|{account_id}"},
+            )
+            db.commit()
+        deadline = time.monotonic() + 5
+        while get_balance_cache().get(account_id) is not None and time.monotonic() < deadline:
+            time.sleep(0.01)
+        assert get_balance_cache().get(account_id) is None
+        assert client.get("/account/balance").json()["balance"] == deposited
+
+
+class _LaggingReplica:
+    # Replica session that still returns the row as it was before the client's last write.
+    def __init__(self, row):
+        self.row = row
+
+    def execute(self, *args, **kwargs):
+        return self
+
+    def first(self):
+        return self.row
+
+    def commit(self):
+        pass
+
+    def rollback(self):
+        pass
+
+    def close(self):
+        pass
+
+
+@pytest.mark.db
+def test_replica_reads_are_not_cached_and_pinned_reads_bypass_the_cache(monkeypatch, login):
+    from types import SimpleNamespace
+    from sqlalchemy import text
+    from app.cache.balances import get_balance_cache
+    from app.db import base
+    from app.db.base import SessionLocal
+    from app.db.routing import PRIMARY_COOKIE
+
+    stale = SimpleNamespace(balance=Decimal("-1.00"), updated_at=datetime(2000, 1, 1, tzinfo=timezone.utc))
+    monkeypatch.setattr(base, "replica_engine", object())
+    monkeypatch.setattr(base, "ReplicaSessionLocal", lambda: _LaggingReplica(stale))
+    cache = get_balance_cache()
+    with login("TOK_VISA_1111", "1234") as client:
+        resp = client.post("/account/deposit", json={"amount": "1.00", "idempotencyKey": str(uuid.uuid4())})
+        deposited, pinned_until = resp.json()["balance"], resp.cookies[PRIMARY_COOKIE]
+        with SessionLocal() as db:
+            account_id = db.execute(
+                text("SELECT a.id FROM tbl_accounts a JOIN tbl_cards c ON c.customer_id = a.customer_id "
+                     "WHERE c.token = 'TOK_VISA_1111'")
+            ).scalar_one()
+
+        # Another worker's write arrives as an eviction; an unpinned read then hits the lagging replica.
+        cache.evict(str(account_id))
+        client.cookies.delete(PRIMARY_COOKIE)
+        assert client.get("/account/balance").json()["balance"] == "-1.00"
+        assert cache.get(account_id) is None
+
+        # Inside its read-your-writes window the client reads the primary, even over a cached entry.
+        cache.write(account_id, Decimal("-2.00"), datetime(2100, 1, 1, tzinfo=timezone.utc))
+        client.cookies.set(PRIMARY_COOKIE, pinned_until)
+        assert client.get("/account/balance").json()["balance"] == deposited
+        cache.clear()
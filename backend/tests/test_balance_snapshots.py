@@ -0,0 +1,89 @@
+"""Daily balance snapshots: incremental upkeep agrees with a rebuild; needs Postgres at DATABASE_URL."""
+
+import uuid
+from datetime import datetime, timedelta, timezone
+from decimal import Decimal
+
+import pytest
+
+pytestmark = pytest.mark.db
+
+SNAPSHOT_FIELDS = (
+    "opening_balance",
+    "closing_balance",
+    "deposit_count",
+    "deposit_total",
+    "withdrawal_count",
+    "withdrawal_total",
+)
+
+
+def _snapshot_rows(db, account_id):
+    from sqlalchemy import select
+    from app.db import models as orm
+
+    rows = db.execute(
+        select(orm.DailyBalance).where(orm.DailyBalance.account_id == account_id).order_by(orm.DailyBalance.day)
+    ).scalars()
+    return [(r.day, *(getattr(r, field) for field in SNAPSHOT_FIELDS)) for r in rows]
+
+
+@pytest.fixture
+def client(login):
+    with login("TOK_PLUS_6666", "6666") as test_client:
+        yield test_client
+
+
+def _move(client, kind, amount):
+    resp = client.post(f"/account/{kind}", json={"amount": amount, "idempotencyKey": str(uuid.uuid4())})
+    assert resp.status_code == 200, resp.text
+
+
+def test_mutations_keep_snapshots_equal_to_a_rebuild(client):
+    from sqlalchemy import select
+    from app.db import models as orm
+    from app.db.base import SessionLocal
+    from app.db.snapshots import rebuild_accounts
+
+    with SessionLocal() as db:
+        account_id = db.execute(
+            select(orm.Account.id)
+            .join(orm.Card, orm.Card.customer_id == orm.Account.customer_id)
+            .where(orm.Card.token == "TOK_PLUS_6666")
+        ).scalar_one()
+        rebuild_accounts(db, [account_id])
+        db.commit()
+
+    today = datetime.now(timezone.utc).date()
+    before = client.get("/account/summary", params={"start": str(today), "end": str(today)}).json()
+    _move(client, "deposit", "10.00")
+    _move(client, "withdraw", "3.50")
+    _move(client, "deposit", "0.25")
+    batch = [
+        {"type": "deposit", "amount": "4.00", "idempotencyKey": str(uuid.uuid4())},
+        {"type": "withdraw", "amount": "99999999.00", "idempotencyKey": str(uuid.uuid4())},
+        {"type": "withdraw", "amount": "1.00", "idempotencyKey": str(uuid.uuid4())},
+    ]
+    assert client.post("/account/batch", json={"mode": "best_effort", "operations": batch}).status_code == 200
+
+    with SessionLocal() as db:
+        incremental = _snapshot_rows(db, account_id)
+        rebuild_accounts(db, [account_id])
+        assert _snapshot_rows(db, account_id) == incremental
+        db.rollback()
+
+    after = client.get("/account/summary", params={"start": str(today), "end": str(today)}).json()
+    assert after["depositCount"] == before["depositCount"] + 3
+    assert Decimal(after["depositTotal"]) == Decimal(before["depositTotal"]) + Decimal("14.25")
+    assert after["withdrawalCount"] == before["withdrawalCount"] + 2
+    assert Decimal(after["closingBalance"]) == Decimal(client.get("/account/balance").json()["balance"])
+    assert after["openingBalance"] == before["openingBalance"]
+
+    yesterday = str(today - timedelta(days=1))
+    as_of = client.get("/account/balance/as-of", params={"date": yesterday}).json()
+    assert as_of == {"asOf": yesterday, "balance": after["openingBalance"]}
+
+
+def test_summary_rejects_bad_ranges(client):
+    assert client.get("/account/summary", params={"start": "2024-02-01", "end": "2024-01-01"}).status_code == 400
+    assert client.get("/account/summary", params={"start": "2000-01-01", "end": "2024-01-01"}).status_code == 400
@@ -0,0 +1,83 @@
+"""POST /account/batch semantics; needs Postgres at DATABASE_URL."""
+
+import uuid
+from decimal import Decimal
+
+import pytest
+
+pytestmark = pytest.mark.db
+
+
+@pytest.fixture
+def client(login):
+    with login("TOK_MC_2222", "4321") as test_client:
+        yield test_client
+
+
+def _op(kind, amount, key=None):
+    return {"type": kind, "amount": amount, "idempotencyKey": key or str(uuid.uuid4())}
+
+
+def _balance(client):
+    return Decimal(client.get("/account/balance").json()["balance"])
+
+
+def test_all_or_nothing_applies_in_order_and_replays(client):
+    from app.metrics.db import STATEMENTS_PER_REQUEST
+
+    start = _balance(client)
+    ops = [_op("deposit", "10.00"), _op("withdraw", "3.50"), _op("deposit", "1.00")] + [
+        _op("deposit", "0.01") for _ in range(7)
+    ]
+    before, _ = STATEMENTS_PER_REQUEST.snapshot("/account/batch")
+    resp = client.post("/account/batch", json={"operations": ops})
+    assert resp.status_code == 200, resp.text
+    statements = STATEMENTS_PER_REQUEST.snapshot("/account/batch")[0] - before
+    body = resp.json()
+    assert [r["status"] for r in body["results"]] == ["applied"] * 10
+    assert [Decimal(r["balance"]) for r in body["results"][:3]] == [start + 10, start + Decimal("6.50"), start + Decimal("7.50")]
+    assert Decimal(body["balance"]) == start + Decimal("7.57") == _balance(client)
+    assert statements <= 4  # claim, lock, write, plus at most one session lookup: independent of the batch size
+
+    replay = client.post("/account/batch", json={"operations": ops}).json()
+    assert [r["status"] for r in replay["results"]] == ["replayed"] * 10
+    assert [r["balance"] for r in replay["results"]] == [r["balance"] for r in body["results"]]
+    assert _balance(client) == start + Decimal("7.57")
+
+
+def test_all_or_nothing_rolls_back_on_failure(client):
+    start = _balance(client)
+    deposit = _op("deposit", "5.00")
+    resp = client.post("/account/batch", json={"operations": [deposit, _op("withdraw", "99999999.00")]})
+    assert resp.status_code == 400
+    assert resp.json()["detail"] == "Operation 2: Insufficient funds"
+    assert _balance(client) == start
+
+    # The rolled-back key was never consumed.
+    resp = client.post("/account/batch", json={"operations": [deposit]})
+    assert resp.json()["results"][0]["status"] == "applied"
+
+
+def test_best_effort_rejects_only_failing_operations(client):
+    start = _balance(client)
+    overdraw = _op("withdraw", "99999999.00")
+    resp = client.post(
+        "/account/batch",
+        json={"mode": "best_effort", "operations": [_op("deposit", "2.00"), overdraw, _op("withdraw", "1.00")]},
+    )
+    assert resp.status_code == 200, resp.text
+    results = resp.json()["results"]
+    assert [r["status"] for r in results] == ["applied", "rejected", "applied"]
+    assert results[1] == {
+        "idempotencyKey": overdraw["idempotencyKey"], "status": "rejected", "balance": None, "error": "Insufficient funds"
+    }
+    assert _balance(client) == start + 1
+
+    # A rejected key is released and can be used again.
+    resp = client.post("/account/batch", json={"mode": "best_effort", "operations": [dict(overdraw, amount="0.50")]})
+    assert resp.json()["results"][0]["status"] == "applied"
+
+
+def test_duplicate_keys_are_rejected(client):
+    op = _op("deposit", "1.00")
+    assert client.post("/account/batch", json={"operations": [op, op]}).status_code == 422
@@ -0,0 +1,30 @@
+from app.cache.bloom import RotatingBloomFilter
+
+
+class FakeClock:
+    def __init__(self):
+        self.now = 0.0
+
+    def __call__(self):
+        return self.now
+
+
+def test_added_keys_are_reported_and_unseen_keys_mostly_rejected():
+    bloom = RotatingBloomFilter(bits=1 << 16, hashes=4, rotate_sec=60)
+    keys = [f"key-{i}" for i in range(1000)]
+    for key in keys:
+        bloom.add(key)
+    assert all(bloom.might_contain(key) for key in keys)
+
+    false_positives = sum(bloom.might_contain(f"other-{i}") for i in range(1000))
+    assert false_positives < 20
+
+
+def test_keys_are_forgotten_after_two_rotations():
+    clock = FakeClock()
+    bloom = RotatingBloomFilter(bits=1024, hashes=3, rotate_sec=10, clock=clock)
+    bloom.add("k")
+    clock.now = 10
+    assert bloom.might_contain("k")
+    clock.now = 20
+    assert not bloom.might_contain("k")
@@ -0,0 +1,117 @@
+"""Cross-worker cache invalidation: payload routing, the LISTEN thread and its reconnect flush."""
+
+import socket
+import time
+
+import pytest
+
+
+def _wait(condition, timeout=5.0):
+    deadline = time.monotonic() + timeout
+    while not condition():
+        if time.monotonic() > deadline:
+            return False
+        time.sleep(0.01)
+    return True
+
+
+def test_handle_routes_keys_and_skips_own_notifications():
+    from app.cache.invalidation import ACCOUNT, ORIGIN, SESSION, InvalidationBus
+
+    evicted, flushed = [], []
+    bus = InvalidationBus(connect=None, keepalive_sec=30, reconnect_max_sec=30)
+    bus.subscribe(SESSION, evicted.append, lambda: flushed.append(SESSION))
+    now_ms = int(time.time() * 1000)
+
+    bus.handle(f"peer|{now_ms}|{SESSION}|abc")
+    bus.handle(f"{ORIGIN}|{now_ms}|{SESSION}|mine")
+    bus.handle(f"peer|{now_ms}|{SESSION}|*")
+    bus.handle(f"peer|{now_ms}|{ACCOUNT}|7")
+    bus.handle("garbage")
+
+    assert evicted == ["abc"]
+    assert flushed == [SESSION]
+    assert bus.received == 3
+
+
+class _FakeConnection:
+    # Records the statements run on it; never receives a notification.
+    def __init__(self, log):
+        self.log = log
+        self.notifies = []
+        self._sock, self._peer = socket.socketpair()
+
+    def cursor(self):
+        return self
+
+    def execute(self, statement):
+        self.log.append(statement)
+
+    def fileno(self):
+        return self._sock.fileno()
+
+    def poll(self):
+        pass
+
+    def close(self):
+        self._sock.close()
+        self._peer.close()
+
+
+def test_caches_are_flushed_only_after_listen():
+    from app.cache.invalidation import CHANNEL, SESSION, InvalidationBus
+
+    log = []
+    bus = InvalidationBus(lambda: _FakeConnection(log), keepalive_sec=30, reconnect_max_sec=30)
+    bus.subscribe(SESSION, lambda key: None, lambda: log.append("flush"))
+    bus.start()
+    try:
+        assert bus.connected.wait(5)
+    finally:
+        bus.stop()
+    assert log == [f"LISTEN {CHANNEL}", "flush"]
+
+
+@pytest.mark.db
+def test_listener_applies_committed_invalidations_and_flushes_after_reconnect():
+    from sqlalchemy import text
+    from app.cache import invalidation
+    from app.cache.ttl import TTLCache
+    from app.db.base import SessionLocal
+
+    connections = []
+
+    def connect():
+        connections.append(invalidation._connect())
+        return connections[-1]
+
+    cache = TTLCache(max_size=10, ttl_sec=60)
+    bus = invalidation.InvalidationBus(connect, keepalive_sec=0.2, reconnect_max_sec=0.5)
+    bus.subscribe(invalidation.SESSION, cache.invalidate, cache.clear)
+    cache.set("cached-before-start", 1)
+    bus.start()
+    try:
+        assert bus.connected.wait(5)
+        assert len(cache) == 0
+        for key in ("kept", "dropped", "rolled-back", "mine"):
+            cache.set(key, 1)
+        notify = text("SELECT pg_notify(:channel, :payload)")
+        stamp = int(time.time() * 1000)
+        with SessionLocal() as db:
+            db.execute(notify, {"channel": invalidation.CHANNEL, "payload": f"peer|{stamp}|s|rolled-back"})
+            db.rollback()
+            db.execute(notify, {"channel": invalidation.CHANNEL, "payload": f"peer|{stamp}|s|dropped"})
+            invalidation.publish(db, invalidation.SESSION, ["mine"])
+            db.commit()
+        assert _wait(lambda: cache.peek("dropped") is None)
+        time.sleep(0.1)
+        assert cache.peek("rolled-back") == 1 and cache.peek("mine") == 1
+
+        # Kill the listener's connection: it reconnects and, having possibly missed
+        # notifications in between, empties the cache.
+        with SessionLocal() as db:
+            db.execute(text("SELECT pg_terminate_backend(:pid)"), {"pid": connections[0].get_backend_pid()})
+        assert _wait(lambda: len(connections) > 1 and bus.connected.is_set())
+        assert len(cache) == 0
+    finally:
+        bus.stop()
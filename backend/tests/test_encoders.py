@@ -0,0 +1,30 @@
+"""Response encoders produce the same bytes as the FastAPI response_model path they replace."""
+
+from datetime import datetime, timedelta, timezone
+from decimal import Decimal
+
+from fastapi.responses import JSONResponse
+
+from app.domain import encoders
+from app.domain.models import TransactionItem, TransactionsResponse
+
+ROWS = [
+    (7, "deposit", Decimal("12.50"), datetime(2024, 1, 2, 3, 4, 5, 123456, tzinfo=timezone.utc)),
+    (6, "withdraw", Decimal("0.01"), datetime(2024, 1, 2, 3, 4, 6, tzinfo=timezone.utc)),
+    (5, "dépôt \"x\"", Decimal("1000.00"), datetime(2024, 1, 2, 5, 4, 6, tzinfo=timezone(timedelta(hours=2)))),
+]
+
+
+def _dto_bytes(rows, next_cursor):
+    # What FastAPI sent before: response_model validation, then JSONResponse rendering.
+    dto = TransactionsResponse(
+        items=[TransactionItem(id=i, type=t, amount=a, createdAt=c) for i, t, a, c in rows],
+        nextCursor=next_cursor,
+    )
+    return JSONResponse(dto.model_dump(mode="json")).body
+
+
+def test_transactions_page_matches_dto_json():
+    assert encoders.transactions_page(ROWS, "MjAyNHwx") == _dto_bytes(ROWS, "MjAyNHwx")
+    assert encoders.transactions_page(ROWS[:1], None) == _dto_bytes(ROWS[:1], None)
+    assert encoders.transactions_page([], None) == _dto_bytes([], None)
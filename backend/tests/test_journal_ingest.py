@@ -0,0 +1,125 @@
+"""Journal ingestion posts each key once and reports rejects; needs Postgres at DATABASE_URL."""
+
+import csv
+import io
+import json
+import uuid
+from decimal import Decimal
+
+import pytest
+
+pytestmark = pytest.mark.db
+
+
+def _account(db):
+    from sqlalchemy import select
+    from app.db import models as orm
+
+    return db.execute(
+        select(orm.Account.id, orm.Account.balance)
+        .join(orm.Card, orm.Card.customer_id == orm.Account.customer_id)
+        .where(orm.Card.token == "TOK_PULSE_5555")
+    ).one()
+
+
+def _post(journal):
+    from app.db.journal import post_journal
+
+    result = io.StringIO()
+    report = post_journal(io.StringIO(journal), "ndjson", result, "test.ndjson", chunk_size=3)
+    result.seek(0)
+    return report, {row["idempotency_key"]: row["status"] for row in csv.DictReader(result)}
+
+
+def test_journal_posts_once_and_reports_rejects():
+    from app.db.base import SessionLocal
+    from app.db.seeds import seed
+
+    seed()
+    with SessionLocal() as db:
+        account_id, opening = _account(db)
+
+    run = uuid.uuid4().hex
+    records = [
+        {"idempotency_key": f"{run}-1", "account_id": account_id, "type": "deposit", "amount": "5.00"},
+        {"idempotency_key": f"{run}-2", "account_id": account_id, "type": "withdrawal", "amount": "99999999.00"},
+        {"idempotency_key": f"{run}-3", "account_id": account_id, "type": "withdraw", "amount": "1.25"},
+        {"idempotency_key": f"{run}-1", "account_id": account_id, "type": "deposit", "amount": "5.00"},
+        {"idempotency_key": f"{run}-4", "account_id": 2**62, "type": "deposit", "amount": "1.00"},
+        {"idempotency_key": f"{run}-5", "account_id": account_id, "type": "deposit", "amount": "-1"},
+    ]
+    journal = "".join(json.dumps({**r, "created_at": "2026-01-02T03:04:05Z"}) + "\n" for r in records) + "not json\n"
+
+    report, statuses = _post(journal)
+    assert (report.read, report.posted) == (7, 2)
+    assert statuses == {
+        f"{run}-2": "overdraft",
+        f"{run}-1": "duplicate",
+        f"{run}-4": "unknown_account",
+        f"{run}-5": "invalid",
+        "": "invalid",
+    }
+    with SessionLocal() as db:
+        assert _account(db).balance == opening + Decimal("3.75")
+
+    report, statuses = _post(journal)
+    assert report.posted == 0
+    assert statuses[f"{run}-1"] == statuses[f"{run}-3"] == "duplicate"
+    with SessionLocal() as db:
+        assert _account(db).balance == opening + Decimal("3.75")
+
+
+def _snapshots(db, account_id):
+    from sqlalchemy import select
+    from app.db import models as orm
+
+    row = orm.DailyBalance
+    return db.execute(
+        select(
+            row.day,
+            row.opening_balance,
+            row.closing_balance,
+            row.deposit_count,
+            row.deposit_total,
+            row.withdrawal_count,
+            row.withdrawal_total,
+        )
+        .where(row.account_id == account_id)
+        .order_by(row.day)
+    ).all()
+
+
+def test_backdated_chunks_fold_into_snapshots_like_a_rebuild():
+    from app.db.base import SessionLocal
+    from app.db.seeds import seed
+    from app.db.snapshots import rebuild_accounts
+
+    seed()
+    with SessionLocal() as db:
+        account_id, _ = _account(db)
+        rebuild_accounts(db, [account_id])
+        db.commit()
+
+    run = uuid.uuid4().hex
+    days = ["2025-12-30", "2026-03-01", "2026-01-02", "2025-12-30", "2026-06-15", "2026-03-01", "2026-01-01"]
+    journal = "".join(
+        json.dumps(
+            {
+                "idempotency_key": f"{run}-{n}",
+                "account_id": account_id,
+                "type": "withdrawal" if n % 3 == 2 else "deposit",
+                "amount": f"{n + 1}.50",
+                "created_at": f"{day}T1{n}:00:00Z",
+            }
+        )
+        + "\n"
+        for n, day in enumerate(days)
+    )
+    report, _ = _post(journal)
+    assert report.posted == len(days)
+
+    with SessionLocal() as db:
+        folded = _snapshots(db, account_id)
+        rebuild_accounts(db, [account_id])
+        assert folded == _snapshots(db, account_id)
+        db.rollback()
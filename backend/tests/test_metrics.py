@@ -0,0 +1,60 @@
+"""Metrics registry and SQL instrumentation; the /metrics test needs Postgres at DATABASE_URL."""
+
+import pytest
+
+from app.metrics.db import normalize_sql
+from app.metrics.registry import Counter, Histogram, Registry
+
+
+def test_registry_renders_prometheus_text():
+    registry = Registry()
+    requests = registry.register(Counter("demo_total", "Demo counter.", ["route"]))
+    latency = registry.register(Histogram("demo_seconds", "Demo latency.", buckets=(0.1, 1.0), labelnames=["route"]))
+    requests.inc("/a")
+    requests.inc("/a", amount=2)
+    latency.observe(0.05, "/a")
+    latency.observe(0.5, "/a")
+    latency.observe(5, "/a")
+
+    text = registry.render()
+    assert "# TYPE demo_total counter" in text
+    assert 'demo_total{route="/a"} 3' in text
+    assert 'demo_seconds_bucket{route="/a",le="0.1"} 1' in text
+    assert 'demo_seconds_bucket{route="/a",le="1"} 2' in text
+    assert 'demo_seconds_bucket{route="/a",le="+Inf"} 3' in text
+    assert 'demo_seconds_count{route="/a"} 3' in text
+    assert latency.snapshot("/a") == (3, 5.55)
+
+
+def test_normalize_sql_strips_literals_and_folds_lists():
+    statement = """
+        SELECT tbl_sessions.id FROM tbl_sessions
+        WHERE tbl_sessions.token_hash = %(token_hash_1)s AND x = 'abc' AND y::text = $1
+        LIMIT 10
+    """
+    assert normalize_sql(statement) == (
+        "SELECT tbl_sessions.id FROM tbl_sessions WHERE tbl_sessions.token_hash = ? AND x = ? AND y::text = ? LIMIT ?"
+    )
+    assert normalize_sql("INSERT INTO t (a, b) VALUES (%s, %s), (%s, %s), (%s, %s)") == (
+        "INSERT INTO t (a, b) VALUES (?, ?), ..."
+    )
+
+
+@pytest.mark.db
+def test_metrics_endpoint_reports_statements_per_route(login):
+    from app.metrics.db import STATEMENTS_PER_REQUEST
+
+    with login("TOK_STAR_4444", "4444") as client:
+        before, _ = STATEMENTS_PER_REQUEST.snapshot("/account/balance")
+        assert client.get("/account/balance").status_code == 200
+        after, _ = STATEMENTS_PER_REQUEST.snapshot("/account/balance")
+        assert after == before + 1
+
+        resp = client.get("/metrics")
+        assert resp.status_code == 200
+        assert resp.headers["content-type"].startswith("text/plain")
+        assert 'atm_db_statements_total{route="/auth/pin"}' in resp.text
+        assert 'atm_db_pool_saturation{pool="primary"}' in resp.text
+        assert 'atm_http_request_duration_seconds_count{method="GET",route="/account/balance",status="200"}' in resp.text
+        assert 'atm_session_cache{stat="hits"}' in resp.text
+        assert 'atm_audit_writer{stat="queued"}' in resp.text
@@ -0,0 +1,180 @@
+"""Per-account mutation coalescing: grouping, per-caller outcomes, balance invariant; needs Postgres at DATABASE_URL."""
+
+import threading
+import time
+import uuid
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime, timedelta, timezone
+from decimal import Decimal
+
+import pytest
+
+pytestmark = pytest.mark.db
+
+
+def _op(kind, amount, key=None):
+    from app.domain.models import BatchOperation
+
+    return BatchOperation(type=kind, amount=amount, idempotencyKey=key or str(uuid.uuid4()))
+
+
+class _NoSession:
+    # Stands in for SessionLocal when the batch runner does not touch the database.
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        return False
+
+    def commit(self):
+        pass
+
+
+def test_waiters_join_the_next_batch_and_get_their_own_outcome(monkeypatch):
+    from app.db import base
+    from app.domain.errors import IdempotencyConflictError
+    from app.domain.models import BatchItemResult, BatchMutationResponse
+    from app.services.coalescer import MutationCoalescer
+
+    monkeypatch.setattr(base, "SessionLocal", _NoSession)
+    coalescer = MutationCoalescer(max_batch=10)
+    first_running, release = threading.Event(), threading.Event()
+    groups = []
+
+    def run(db, operations):
+        groups.append([op.idempotencyKey for op in operations])
+        if len(groups) == 1:
+            first_running.set()
+            release.wait(5)
+        results, balance = [], Decimal("10.00")
+        for op in operations:
+            key = op.idempotencyKey
+            if key == "taken":
+                error = "Idempotency key already used"
+                results.append(BatchItemResult(idempotencyKey=key, status="rejected", error=error))
+            elif op.type == "withdraw" and op.amount > balance:
+                results.append(BatchItemResult(idempotencyKey=key, status="rejected", error="Insufficient funds"))
+            else:
+                balance += op.amount if op.type == "deposit" else -op.amount
+                results.append(BatchItemResult(idempotencyKey=key, status="applied", balance=balance))
+        return BatchMutationResponse(balance=balance, results=results)
+
+    with ThreadPoolExecutor(max_workers=6) as pool:
+        leader = pool.submit(coalescer.submit, 1, _op("deposit", "1.00", "lead"), run)
+        assert first_running.wait(5)
+        ops = [_op("deposit", "2.00", "a"), _op("withdraw", "50.00", "b"), _op("deposit", "1.00", "taken")]
+        ops.append(_op("deposit", "2.00", "a"))
+        futures = []
+        for op in ops:
+            futures.append(pool.submit(coalescer.submit, 1, op, run))
+            while len(coalescer._queues[1]) < len(futures):
+                time.sleep(0.001)
+        release.set()
+        assert leader.result(5).balance == Decimal("11.00")
+        assert futures[0].result(5).balance == Decimal("12.00")
+        with pytest.raises(ValueError, match="Insufficient funds"):
+            futures[1].result(5)
+        with pytest.raises(IdempotencyConflictError):
+            futures[2].result(5)
+        futures[3].result(5)
+
+    # The repeated key waits for a batch of its own, where it is replayed.
+    assert groups == [["lead"], ["a", "b", "taken"], ["a"]]
+    assert coalescer.stats() == {"batches": 3, "operations": 5, "accounts": 0}
+
+
+def test_a_failed_batch_gives_each_caller_its_own_exception(monkeypatch):
+    from app.db import base
+    from app.services.coalescer import MutationCoalescer
+
+    monkeypatch.setattr(base, "SessionLocal", _NoSession)
+    coalescer = MutationCoalescer(max_batch=10)
+    first_running, release = threading.Event(), threading.Event()
+    cause = ValueError("Account not found")
+
+    def run(db, operations):
+        if not first_running.is_set():
+            first_running.set()
+            release.wait(5)
+        raise cause
+
+    def submit(op):
+        try:
+            coalescer.submit(1, op, run)
+        except ValueError as exc:
+            return exc
+
+    with ThreadPoolExecutor(max_workers=3) as pool:
+        leader = pool.submit(submit, _op("deposit", "1.00"))
+        assert first_running.wait(5)
+        waiters = [pool.submit(submit, _op("deposit", "1.00")) for _ in range(2)]
+        while len(coalescer._queues[1]) < 2:
+            time.sleep(0.001)
+        release.set()
+        errors = [leader.result(5)] + [future.result(5) for future in waiters]
+
+    assert all(str(exc) == "Account not found" and exc.__cause__ is cause for exc in errors)
+    assert len({id(exc) for exc in errors} | {id(cause)}) == 4
+
+
+def test_concurrent_mutations_on_one_account_keep_the_balance_invariant(monkeypatch):
+    from sqlalchemy import select
+    from app.config import get_settings
+    from app.db import models as orm
+    from app.db.base import SessionLocal
+    from app.db.seeds import seed
+    from app.domain.models import MoneyMutationRequest
+    from app.domain.session import SessionInfo
+    from app.services.account import AccountService
+
+    seed()
+    monkeypatch.setattr(get_settings(), "mutation_coalescing", True)
+    with SessionLocal() as db:
+        card_id, account_id, start = db.execute(
+            select(orm.Card.id, orm.Account.id, orm.Account.balance)
+            .join(orm.Account, orm.Account.customer_id == orm.Card.customer_id)
+            .where(orm.Card.token == "TOK_STAR_4444")
+        ).one()
+    expires = datetime.now(timezone.utc) + timedelta(minutes=5)
+    session = SessionInfo(id=0, card_id=card_id, token_hash="", expires_at=expires, account_id=account_id)
+    service = AccountService()
+    step = ((Decimal(start) + 8) / 12).quantize(Decimal("0.01"))
+    calls = [("deposit", Decimal("1.00"))] * 8 + [("withdraw", step)] * 24
+
+    def call(kind_amount):
+        kind, amount = kind_amount
+        payload = MoneyMutationRequest(amount=amount, idempotencyKey=str(uuid.uuid4()))
+        try:
+            with SessionLocal() as db:
+                return payload.idempotencyKey, kind, amount, getattr(service, kind)(db, session, payload).balance
+        except ValueError:
+            return payload.idempotencyKey, kind, amount, None
+
+    with ThreadPoolExecutor(max_workers=16) as pool:
+        outcomes = list(pool.map(call, calls))
+
+    applied = {
+        key: amount if kind == "deposit" else -amount for key, kind, amount, balance in outcomes if balance is not None
+    }
+    rejected = [kind for _, kind, _, balance in outcomes if balance is None]
+    assert rejected and set(rejected) == {"withdraw"}
+    assert all(balance >= 0 for *_, balance in outcomes if balance is not None)
+    with SessionLocal() as db:
+        final = db.execute(select(orm.Account.balance).where(orm.Account.id == account_id)).scalar_one()
+        assert final == Decimal(start) + sum(applied.values())
+        posted = dict(
+            db.execute(
+                select(orm.Transaction.idempotency_key, orm.Transaction.amount).where(
+                    orm.Transaction.idempotency_key.in_([key for key, *_ in outcomes])
+                )
+            ).all()
+        )
+        assert set(posted) == set(applied)
+        recorded = dict(
+            db.execute(
+                select(orm.IdempotencyRecord.key, orm.IdempotencyRecord.balance).where(
+                    orm.IdempotencyRecord.key.in_(list(applied))
+                )
+            ).all()
+        )
+        assert recorded == {key: balance for key, *_, balance in outcomes if balance is not None}
@@ -0,0 +1,29 @@
+import pytest
+
+from app.domain.errors import PinHasherBusyError
+from app.security.hashing import hash_pin
+from app.security.pin_pool import PinHasherPool
+
+
+def test_pool_verifies_pins():
+    pool = PinHasherPool(max_workers=1, max_pending=2)
+    hashed = hash_pin("1234")
+    try:
+        assert pool.verify("1234", hashed) is True
+        assert pool.verify("0000", hashed) is False
+    finally:
+        pool.shutdown()
+
+
+def test_pool_rejects_when_saturated():
+    pool = PinHasherPool(max_workers=1, max_pending=0)
+    hashed = hash_pin("1234")
+    try:
+        running = pool._submit(hash_pin, "4321")
+        with pytest.raises(PinHasherBusyError):
+            pool.verify("1234", hashed)
+        running.result()
+        # The slot is released once the running job finishes.
+        assert pool.verify("1234", hashed) is True
+    finally:
+        pool.shutdown()
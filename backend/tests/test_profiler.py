@@ -0,0 +1,43 @@
+import threading
+
+from app.metrics.profiler import SamplingProfiler
+
+
+def _spin(stop: threading.Event) -> None:
+    while not stop.is_set():
+        sum(range(1000))
+
+
+def test_profile_run_writes_collapsed_stacks(tmp_path):
+    stop = threading.Event()
+    worker = threading.Thread(target=_spin, args=(stop,))
+    worker.start()
+    try:
+        profiler = SamplingProfiler(interval_sec=0.002, output_dir=str(tmp_path))
+        path = profiler.start(0.2)
+        assert profiler.running
+        profiler.join()
+    finally:
+        stop.set()
+        worker.join()
+
+    assert not profiler.running
+    lines = open(path, encoding="utf-8").read().splitlines()
+    assert lines
+    stack, count = lines[0].rsplit(" ", 1)
+    assert int(count) > 0
+    assert any("_spin (test_profiler.py" in line for line in lines)
+
+
+def test_partial_sample_rate_only_samples_while_requests_in_flight(tmp_path):
+    stop = threading.Event()
+    worker = threading.Thread(target=_spin, args=(stop,))
+    worker.start()
+    try:
+        profiler = SamplingProfiler(interval_sec=0.002, output_dir=str(tmp_path))
+        path = profiler.start(0.1, sample_rate=0.5)
+        profiler.join()
+    finally:
+        stop.set()
+        worker.join()
+    assert open(path, encoding="utf-8").read() == ""
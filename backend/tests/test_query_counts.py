@@ -0,0 +1,69 @@
+"""Query-count checks for authenticated endpoints; needs a seeded Postgres at DATABASE_URL."""
+
+import uuid
+
+import pytest
+
+pytestmark = pytest.mark.db
+
+
+@pytest.fixture(scope="module")
+def client(login):
+    with login("TOK_VISA_1111", "1234") as test_client:
+        yield test_client
+
+
+@pytest.fixture
+def statements():
+    from sqlalchemy import event
+    from app.db.base import engine
+
+    captured: list[str] = []
+
+    def before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+        captured.append(statement)
+
+    event.listen(engine, "before_cursor_execute", before_cursor_execute)
+    yield captured
+    event.remove(engine, "before_cursor_execute", before_cursor_execute)
+
+
+def _prelude(captured: list[str], real_work: str) -> int:
+    # Number of statements issued before the first one that does the endpoint's real work.
+    for index, statement in enumerate(captured):
+        if real_work in statement:
+            return index
+    raise AssertionError(f"no statement touched {real_work}: {captured}")
+
+
+CASES = [
+    ("get", "/account/balance", None, "FROM tbl_accounts"),
+    ("get", "/transactions", None, "FROM tbl_transactions"),
+    ("post", "/account/deposit", {"amount": "1.00"}, "tbl_transactions"),
+    ("post", "/account/withdraw", {"amount": "1.00"}, "tbl_transactions"),
+]
+
+
+@pytest.mark.parametrize("warm", [False, True], ids=["cold-cache", "warm-cache"])
+@pytest.mark.parametrize("method, path, body, real_work", CASES, ids=[c[1] for c in CASES])
+def test_at_most_one_round_trip_before_real_work(client, statements, warm, method, path, body, real_work):
+    from app.cache.balances import get_balance_cache
+    from app.cache.sessions import get_session_cache
+
+    if not warm:
+        get_session_cache().clear()
+    else:
+        assert client.get("/account/balance").status_code == 200
+    # Only the session cache is under test; the balance must come from the database.
+    get_balance_cache().clear()
+    statements.clear()
+
+    kwargs = {}
+    if body is not None:
+        kwargs["json"] = dict(body, idempotencyKey=str(uuid.uuid4()))
+    resp = getattr(client, method)(path, **kwargs)
+    assert resp.status_code == 200, resp.text
+
+    assert _prelude(statements, real_work) <= (0 if warm else 1)
+    if warm:
+        assert not any("tbl_sessions" in statement for statement in statements)
@@ -0,0 +1,65 @@
+import pytest
+
+from app.domain.errors import LoginRateLimitedError
+from app.security.rate_limit import LoginRateLimiter, SlidingWindowRateLimiter
+
+
+class FakeClock:
+    def __init__(self, now: float = 1000.0) -> None:
+        self.now = now
+
+    def __call__(self) -> float:
+        return self.now
+
+
+def test_key_is_blocked_after_max_failures_and_recovers():
+    clock = FakeClock()
+    limiter = SlidingWindowRateLimiter(max_attempts=3, window_sec=100, max_keys=10, clock=clock)
+    for _ in range(2):
+        limiter.hit("card:A")
+        assert limiter.retry_after("card:A") is None
+    limiter.hit("card:A")
+    wait = limiter.retry_after("card:A")
+    assert wait is not None and wait > 0
+
+    # The previous window still weighs in just after the boundary, then decays.
+    clock.now = 1100.0
+    assert limiter.retry_after("card:A") is not None
+    clock.now = 1100.0 + 40
+    assert limiter.retry_after("card:A") is None
+    clock.now = 1300.0
+    assert limiter.retry_after("card:A") is None
+
+
+def test_retry_after_points_at_unblock_time():
+    clock = FakeClock(1000.0)
+    limiter = SlidingWindowRateLimiter(max_attempts=2, window_sec=100, max_keys=10, clock=clock)
+    limiter.hit("k")
+    limiter.hit("k")
+    clock.now += limiter.retry_after("k") + 0.001
+    assert limiter.retry_after("k") is None
+
+
+def test_memory_is_bounded():
+    limiter = SlidingWindowRateLimiter(max_attempts=1, window_sec=60, max_keys=3, clock=FakeClock())
+    for n in range(10):
+        limiter.hit(f"ip:{n}")
+    assert len(limiter) == 3
+    assert limiter.retry_after("ip:0") is None
+    assert limiter.retry_after("ip:9") is not None
+
+
+def test_login_limiter_checks_card_and_ip():
+    limiter = LoginRateLimiter(SlidingWindowRateLimiter(max_attempts=2, window_sec=60, max_keys=100))
+    limiter.record_failure("TOK_A", "10.0.0.1")
+    limiter.record_failure("TOK_B", "10.0.0.1")
+    with pytest.raises(LoginRateLimitedError):
+        limiter.check("TOK_C", "10.0.0.1")
+    limiter.check("TOK_A", "10.0.0.2")
+
+    limiter.record_failure("TOK_A", "10.0.0.2")
+    with pytest.raises(LoginRateLimitedError) as exc:
+        limiter.check("TOK_A", "10.0.0.3")
+    assert exc.value.retry_after > 0
+    limiter.record_success("TOK_A")
+    limiter.check("TOK_A", "10.0.0.3")
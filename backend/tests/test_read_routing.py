@@ -0,0 +1,67 @@
+"""Read-replica routing and read-your-writes pinning; needs Postgres at DATABASE_URL (used as the replica too)."""
+
+import os
+import uuid
+from decimal import Decimal
+
+import pytest
+
+pytestmark = pytest.mark.db
+
+
+def _request(cookie=None):
+    from starlette.requests import Request
+
+    headers = [(b"cookie", cookie.encode())] if cookie else []
+    return Request({"type": "http", "headers": headers})
+
+
+def test_pin_window_is_bounded():
+    from app.db.routing import PRIMARY_COOKIE, reads_pinned
+    from app.config import get_settings
+
+    window = get_settings().read_your_writes_sec
+    assert not reads_pinned(_request(), now=1000.0)
+    assert reads_pinned(_request(f"{PRIMARY_COOKIE}=1001.5"), now=1000.0)
+    assert not reads_pinned(_request(f"{PRIMARY_COOKIE}=999.0"), now=1000.0)
+    assert not reads_pinned(_request(f"{PRIMARY_COOKIE}={1000 + window + 60}"), now=1000.0)
+    assert not reads_pinned(_request(f"{PRIMARY_COOKIE}=soon"), now=1000.0)
+
+
+@pytest.fixture
+def replica(monkeypatch):
+    # A second engine on the same DSN stands in for the replica; count its checkouts.
+    from sqlalchemy import create_engine, event
+    from sqlalchemy.orm import sessionmaker
+    from app.db import base
+
+    replica_engine = create_engine(os.environ["DATABASE_URL"], future=True)
+    checkouts = []
+    event.listen(replica_engine, "checkout", lambda *args: checkouts.append(1))
+    monkeypatch.setattr(base, "replica_engine", replica_engine)
+    monkeypatch.setattr(base, "ReplicaSessionLocal", sessionmaker(bind=replica_engine, autoflush=False))
+    yield checkouts
+    replica_engine.dispose()
+
+
+def test_reads_use_replica_until_the_client_writes(replica, login):
+    from app.cache.balances import get_balance_cache
+    from app.db.routing import PRIMARY_COOKIE
+
+    with login("TOK_MAESTRO_3333", "3333") as client:
+        get_balance_cache().clear()
+        before = client.get("/account/balance").json()["balance"]
+        assert client.get("/transactions?limit=1").status_code == 200
+        assert len(replica) == 2
+
+        resp = client.post("/account/deposit", json={"amount": "1.00", "idempotencyKey": str(uuid.uuid4())})
+        assert resp.status_code == 200
+        assert PRIMARY_COOKIE in resp.cookies
+        after = client.get("/account/balance").json()["balance"]
+        assert Decimal(after) == Decimal(before) + 1
+        assert len(replica) == 2
+
+        client.cookies.delete(PRIMARY_COOKIE)
+        get_balance_cache().clear()
+        assert client.get("/account/balance").status_code == 200
+        assert len(replica) == 3
@@ -0,0 +1,60 @@
+"""Streaming statement export: serializers always, the endpoint when DATABASE_URL is set."""
+
+import csv
+import io
+import json
+import uuid
+from datetime import datetime, timedelta, timezone
+from decimal import Decimal
+
+import pytest
+
+from app.domain.models import TransactionItem
+from app.services.statements import csv_chunks, ndjson_chunks
+
+ROWS = [
+    (1, "deposit", Decimal("12.50"), datetime(2024, 1, 2, 3, 4, 5, 123456, tzinfo=timezone.utc)),
+    (2, "withdraw", Decimal("0.01"), datetime(2024, 1, 2, 3, 4, 6, tzinfo=timezone.utc)),
+    (3, "deposit", Decimal("1000.00"), datetime(2024, 1, 2, 5, 4, 6, tzinfo=timezone(timedelta(hours=2)))),
+]
+
+
+def test_ndjson_lines_match_transaction_item_json():
+    body = b"".join(ndjson_chunks([ROWS[:2], ROWS[2:]])).decode()
+    expected = "".join(
+        TransactionItem(id=i, type=t, amount=a, createdAt=c).model_dump_json() + "\n" for i, t, a, c in ROWS
+    )
+    assert body == expected
+
+
+def test_csv_has_header_and_one_line_per_row():
+    chunks = list(csv_chunks([ROWS[:1], ROWS[1:]]))
+    assert len(chunks) == 3
+    records = list(csv.DictReader(io.StringIO(b"".join(chunks).decode())))
+    assert [r["id"] for r in records] == ["1", "2", "3"]
+    assert records[0]["amount"] == "12.50"
+    assert records[0]["createdAt"] == "2024-01-02T03:04:05.123456Z"
+
+
+@pytest.mark.db
+def test_export_streams_full_history(login):
+    with login("TOK_MAESTRO_3333", "3333") as client:
+        for _ in range(3):
+            resp = client.post("/account/deposit", json={"amount": "2.00", "idempotencyKey": str(uuid.uuid4())})
+            assert resp.status_code == 200
+
+        resp = client.get("/transactions/export")
+        assert resp.status_code == 200
+        assert resp.headers["content-type"].startswith("application/x-ndjson")
+        items = [json.loads(line) for line in resp.text.splitlines()]
+        ids = [item["id"] for item in items]
+        assert ids == sorted(ids) and len(ids) >= 3
+        latest = client.get("/transactions", params={"limit": 3}).json()["items"]
+        assert items[-3:] == latest[::-1]
+
+        resp = client.get("/transactions/export", params={"format": "csv"})
+        assert resp.status_code == 200
+        assert resp.text.splitlines()[0] == "id,type,amount,createdAt"
+        assert len(resp.text.splitlines()) == len(items) + 1
+
+        assert client.get("/transactions/export", params={"format": "xml"}).status_code == 422
@@ -0,0 +1,123 @@
+"""Maintenance sweeper batches; needs Postgres at DATABASE_URL."""
+
+import uuid
+from datetime import datetime, timedelta, timezone
+
+import pytest
+
+pytestmark = pytest.mark.db
+
+
+@pytest.fixture(scope="module")
+def card_id():
+    from sqlalchemy import select
+    from app.db import models as orm
+    from app.db.base import SessionLocal
+    from app.db.seeds import seed
+
+    seed()
+    with SessionLocal() as db:
+        return db.execute(select(orm.Card.id).where(orm.Card.token == "TOK_PULSE_5555")).scalar_one()
+
+
+def _add_sessions(card_id, *, expires_in, revoked=False, count=5):
+    from app.db import models as orm
+    from app.db.base import SessionLocal
+
+    now = datetime.now(timezone.utc)
+    hashes = [uuid.uuid4().hex for _ in range(count)]
+    with SessionLocal() as db:
+        for token_hash in hashes:
+            db.add(
+                orm.Session(
+                    card_id=card_id,
+                    token_hash=token_hash,
+                    expires_at=now + expires_in,
+                    revoked_at=now if revoked else None,
+                )
+            )
+        db.commit()
+    return hashes
+
+
+def _remaining(hashes):
+    from sqlalchemy import func, select
+    from app.db import models as orm
+    from app.db.base import SessionLocal
+
+    with SessionLocal() as db:
+        return db.execute(
+            select(func.count()).select_from(orm.Session).where(orm.Session.token_hash.in_(hashes))
+        ).scalar_one()
+
+
+def test_dead_sessions_are_removed_in_batches(card_id):
+    from app.db.sweeper import expired_sessions, revoked_sessions, run_task
+
+    expired = _add_sessions(card_id, expires_in=timedelta(minutes=-1))
+    revoked = _add_sessions(card_id, expires_in=timedelta(minutes=10), revoked=True)
+    live = _add_sessions(card_id, expires_in=timedelta(minutes=10))
+
+    report = run_task("expired_sessions", expired_sessions, batch_size=2, pause_sec=0)
+    assert report.rows >= 5
+    assert report.rows_per_sec > 0
+    run_task("revoked_sessions", revoked_sessions, batch_size=2, pause_sec=0)
+
+    assert _remaining(expired) == 0
+    assert _remaining(revoked) == 0
+    assert _remaining(live) == 5
+
+
+def test_old_audit_rows_are_archived(card_id, monkeypatch):
+    from sqlalchemy import func, select
+    from app.config import get_settings
+    from app.db import models as orm
+    from app.db.base import SessionLocal, engine
+    from app.db.sweeper import old_audit_rows, run_task
+
+    orm.Base.metadata.create_all(bind=engine)
+    marker = uuid.uuid4().hex
+    old = datetime.now(timezone.utc) - timedelta(days=get_settings().audit_retention_days + 1)
+    with SessionLocal() as db:
+        for _ in range(3):
+            db.add(orm.AuditLog(card_id=card_id, action="pin_ok", result="ok", ts=old, meta={"m": marker}))
+        db.add(orm.AuditLog(card_id=card_id, action="pin_ok", result="ok", meta={"m": marker}))
+        db.commit()
+
+    monkeypatch.setattr(get_settings(), "audit_archive", True)
+    run_task("audit_log", old_audit_rows, batch_size=2, pause_sec=0)
+
+    with SessionLocal() as db:
+        live = db.execute(
+            select(func.count()).select_from(orm.AuditLog).where(orm.AuditLog.meta["m"].astext == marker)
+        ).scalar_one()
+        archived = db.execute(
+            select(func.count())
+            .select_from(orm.AuditLogArchive)
+            .where(orm.AuditLogArchive.meta["m"].astext == marker)
+        ).scalar_one()
+    assert (live, archived) == (1, 3)
+
+
+def test_only_one_process_sweeps_at_a_time():
+    from sqlalchemy import func, select
+    from app.db.base import engine
+    from app.db.sweeper import SWEEP_LOCK_KEY, sweep_exclusive
+
+    with engine.connect().execution_options(isolation_level="AUTOCOMMIT") as other:
+        assert other.execute(select(func.pg_try_advisory_lock(SWEEP_LOCK_KEY))).scalar_one()
+        assert sweep_exclusive(batch_size=100, pause_sec=0) is None
+        other.execute(select(func.pg_advisory_unlock(SWEEP_LOCK_KEY)))
+    assert [report.task for report in sweep_exclusive(batch_size=100, pause_sec=0)][0] == "expired_sessions"
+
+
+def test_loop_refuses_a_zero_interval(monkeypatch):
+    from app.db import sweeper
+    from app.config import get_settings
+
+    settings = get_settings().model_copy(update={"sweep_interval_sec": 0})
+    monkeypatch.setattr(sweeper, "get_settings", lambda: settings)
+    monkeypatch.setattr(sweeper, "sweep_exclusive", lambda *args: pytest.fail("swept"))
+    monkeypatch.setattr("sys.argv", ["sweeper", "--loop"])
+    with pytest.raises(SystemExit):
+        sweeper.main()
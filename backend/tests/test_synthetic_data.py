@@ -0,0 +1,63 @@
+"""Synthetic data generator: deterministic chunks with consistent balances; loading needs Postgres at DATABASE_URL."""
+
+from decimal import Decimal
+
+import pytest
+
+
+def _plan(**overrides):
+    from app.db.synthetic import DAY, Plan
+
+    fields = dict(
+        customer_base=1,
+        account_base=1,
+        card_base=1,
+        tx_base=1,
+        tx_per_account=40,
+        end=1_760_000_000 // DAY * DAY,
+        days=30,
+        seed=7,
+        pin_hashes=("h0", "h1"),
+        snapshots=True,
+    )
+    fields.update(overrides)
+    return Plan(**fields)
+
+
+def test_chunks_are_deterministic_and_balances_add_up():
+    from app.db.synthetic import generate_chunk
+
+    first = {table: buf.getvalue() for table, buf in generate_chunk(_plan(), 0, 5).items()}
+    again = {table: buf.getvalue() for table, buf in generate_chunk(_plan(), 0, 5).items()}
+    assert first == again
+
+    transactions = [line.split("\t") for line in first["tbl_transactions"].splitlines()]
+    assert len(transactions) == 5 * 40
+    assert len({row[4] for row in transactions}) == len(transactions)
+
+    closing = {int(line.split("\t")[0]): Decimal(line.split("\t")[2]) for line in first["tbl_accounts"].splitlines()}
+    days = [line.split("\t") for line in first["tbl_balance_daily"].splitlines()]
+    for account_id, balance in closing.items():
+        mine = [row for row in days if int(row[0]) == account_id]
+        assert mine[-1][3] == str(balance)
+        assert all(Decimal(row[2]) >= 0 and Decimal(row[3]) >= 0 for row in mine)
+        assert all(a[3] == b[2] for a, b in zip(mine, mine[1:]))
+        net = sum(Decimal(r[3]) if r[2] == "deposit" else -Decimal(r[3]) for r in transactions if int(r[1]) == account_id)
+        assert Decimal(mine[0][2]) + net == balance
+
+
+@pytest.mark.db
+def test_generate_loads_cards_that_can_log_in(login):
+    from sqlalchemy import text
+    from app.db.base import SessionLocal
+    from app.db.synthetic import generate, pin_for
+
+    report = generate(cards=3, tx_per_account=10, days=7, pin_pool=2)
+    assert report.rows == 30
+
+    with SessionLocal() as db:
+        card_id, token = db.execute(
+            text("SELECT id, token FROM tbl_cards WHERE token LIKE 'SYN_%' ORDER BY id DESC LIMIT 1")
+        ).one()
+    with login(token, pin_for(card_id, 2)) as client:
+        assert len(client.get("/transactions", params={"limit": 20}).json()["items"]) == 10
@@ -0,0 +1,50 @@
+"""Keyset pagination of GET /transactions; needs a seeded Postgres at DATABASE_URL."""
+
+import uuid
+
+import pytest
+
+pytestmark = pytest.mark.db
+
+
+@pytest.fixture(scope="module")
+def client(login):
+    with login("TOK_MAESTRO_3333", "3333") as test_client:
+        for _ in range(25):
+            resp = test_client.post(
+                "/account/deposit", json={"amount": "1.00", "idempotencyKey": str(uuid.uuid4())}
+            )
+            assert resp.status_code == 200
+        yield test_client
+
+
+def test_pages_walk_history_without_gaps_or_duplicates(client):
+    everything = client.get("/transactions", params={"limit": 100}).json()["items"]
+
+    seen = []
+    cursor = None
+    while True:
+        params = {"limit": 10}
+        if cursor:
+            params["cursor"] = cursor
+        page = client.get("/transactions", params=params).json()
+        assert len(page["items"]) <= 10
+        seen.extend(page["items"])
+        cursor = page["nextCursor"]
+        if cursor is None:
+            break
+
+    assert [item["id"] for item in seen][: len(everything)] == [item["id"] for item in everything]
+    assert len({item["id"] for item in seen}) == len(seen)
+    assert len(seen) >= 25
+
+
+def test_page_size_is_capped_and_bad_cursor_rejected(client):
+    from app.config import get_settings
+
+    max_page = get_settings().transactions_max_page_size
+    resp = client.get("/transactions", params={"limit": max_page * 10})
+    assert resp.status_code == 200
+    assert len(resp.json()["items"]) <= max_page
+
+    assert client.get("/transactions", params={"cursor": "not-a-cursor"}).status_code == 400
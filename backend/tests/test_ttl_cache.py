@@ -0,0 +1,71 @@
+from datetime import datetime, timedelta, timezone
+
+from app.cache.sessions import SessionCache
+from app.cache.ttl import TTLCache
+from app.domain.session import SessionInfo
+
+
+class FakeClock:
+    def __init__(self):
+        self.now = 0.0
+
+    def __call__(self):
+        return self.now
+
+
+def test_ttl_cache_hits_misses_and_expiry():
+    clock = FakeClock()
+    cache = TTLCache(max_size=10, ttl_sec=5, clock=clock)
+    assert cache.get("a") is None
+    cache.set("a", 1)
+    assert cache.get("a") == 1
+
+    # A shorter per-entry TTL wins; a longer one is capped at the cache TTL.
+    cache.set("short", 2, ttl_sec=1)
+    cache.set("long", 3, ttl_sec=60)
+    clock.now = 2
+    assert cache.get("short") is None
+    clock.now = 6
+    assert cache.get("long") is None
+    assert cache.get("a") is None
+
+    stats = cache.stats()
+    assert stats["hits"] == 1
+    assert stats["misses"] == 4
+    assert stats["expirations"] == 3
+
+
+def test_ttl_cache_evicts_least_recently_used():
+    cache = TTLCache(max_size=2, ttl_sec=60)
+    cache.set("a", 1)
+    cache.set("b", 2)
+    cache.get("a")
+    cache.set("c", 3)
+    assert cache.peek("b") is None
+    assert cache.peek("a") == 1
+    assert cache.peek("c") == 3
+    assert cache.stats()["evictions"] == 1
+
+    cache.invalidate("a")
+    assert cache.peek("a") is None
+    assert len(cache) == 1
+
+
+def test_session_cache_skips_a_fill_racing_an_eviction():
+    cache = SessionCache(max_size=10, ttl_sec=60)
+    now = datetime(2026, 1, 1, tzinfo=timezone.utc)
+    info = SessionInfo(id=1, card_id=1, token_hash="h", expires_at=now + timedelta(minutes=5))
+
+    # A request loads the row, then another worker's logout evicts before the fill.
+    ticket = cache.ticket()
+    cache.invalidate("h")
+    cache.fill(info, now, ticket)
+    assert cache.get("h") is None
+
+    cache.fill(info, now, cache.ticket())
+    assert cache.get("h") == info
+
+    # A cached revocation is never replaced by a live row.
+    cache.revoke(info, now)
+    cache.fill(info, now, cache.ticket())
+    assert cache.get("h").revoked_at == now